@@ -4,6 +4,7 @@ from app.config import Config
 from app.extensions import db
 from app.extensions import login_manager
 from app.extensions import migrate
+from app.instrumentation import init_instrumentation
 
 
 def create_app():
@@ -24,6 +25,9 @@ def create_app():
     # Manage migration.
     migrate.init_app(app, db)
 
+    # Đo số câu lệnh SQL theo endpoint (chỉ khi QUERY_INSTRUMENTATION bật).
+    init_instrumentation(app)
+
     # Manage login/session.
     login_manager.init_app(app)
     login_manager.login_view = "auth.show_sign_in_page"
@@ -72,6 +76,11 @@ def create_app():
     app.register_blueprint(cart_bp)
     app.register_blueprint(user_order_bp)
 
+    # Đăng ký các lệnh CLI (flask import-products, ...).
+    from app.cli import register_commands
+
+    register_commands(app)
+
     # Context processor để inject cart_count vào tất cả các template
     from app.routes.users.cart_route import get_cart_count
 
@@ -0,0 +1,269 @@
+"""
+Bộ nhớ đệm (cache) trong tiến trình có thời gian sống (TTL).
+
+Module này cung cấp lớp TTLCache an toàn luồng, dùng cho các dữ liệu tổng hợp
+được đọc nhiều nhưng thay đổi ít (thống kê dashboard, ...), và lớp cơ sở
+PeriodicRefresh cho các chỉ mục trong bộ nhớ được tính lại định kỳ. Cache nằm
+trong bộ nhớ của từng tiến trình, nên mỗi worker giữ một bản riêng và TTL giới
+hạn độ trễ dữ liệu giữa các worker.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from flask import current_app, has_app_context
+
+from app.extensions import db
+
+
+_MISSING = object()
+
+
+def config_value(key: str, default: Any) -> Any:
+    """Lấy cấu hình của ứng dụng hiện tại.
+
+    Args:
+        key: Tên cấu hình.
+        default: Giá trị trả về khi thiếu cấu hình hoặc ngoài app context.
+
+    Returns:
+        Giá trị cấu hình hoặc default.
+    """
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+class TTLCache:
+    """Cache key-value trong bộ nhớ với thời gian hết hạn cho từng mục."""
+
+    def __init__(self, ttl: float, maxsize: Optional[int] = None) -> None:
+        """Khởi tạo cache.
+
+        Args:
+            ttl: Thời gian sống mặc định của một mục (giây).
+            maxsize: Số mục tối đa; khi vượt quá, mục cũ nhất bị loại bỏ.
+                None nghĩa là không giới hạn.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict = {}
+        self._lock = threading.RLock()
+
+    def _is_alive(self, expires_at: float) -> bool:
+        return expires_at > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Lấy giá trị còn hạn theo key.
+
+        Args:
+            key: Khoá cần lấy.
+            default: Giá trị trả về nếu không có hoặc đã hết hạn.
+
+        Returns:
+            Giá trị đã lưu hoặc default.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if not self._is_alive(expires_at):
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Lưu giá trị với thời gian sống.
+
+        Args:
+            key: Khoá cần lưu.
+            value: Giá trị cần lưu.
+            ttl: Thời gian sống (giây), mặc định dùng TTL của cache.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires_at)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.pop(next(iter(self._data)))
+
+    def delete(self, key: Hashable) -> None:
+        """Xoá một mục khỏi cache (nếu có).
+
+        Args:
+            key: Khoá cần xoá.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Xoá toàn bộ cache."""
+        with self._lock:
+            self._data.clear()
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Lấy giá trị theo key, tính và lưu lại nếu chưa có hoặc đã hết hạn.
+
+        Args:
+            key: Khoá cần lấy.
+            factory: Hàm tính giá trị khi cache trượt.
+            ttl: Thời gian sống (giây) cho giá trị mới.
+
+        Returns:
+            Giá trị trong cache hoặc giá trị vừa tính.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def update(self, key: Hashable, func: Callable[[Any], Any]) -> bool:
+        """Cập nhật tại chỗ một mục còn hạn, giữ nguyên thời điểm hết hạn.
+
+        Hàm func nhận giá trị hiện tại và trả về giá trị mới; được gọi trong
+        khoá của cache nên không được truy vấn cơ sở dữ liệu.
+
+        Args:
+            key: Khoá cần cập nhật.
+            func: Hàm biến đổi giá trị.
+
+        Returns:
+            True nếu mục tồn tại và đã được cập nhật, False nếu không.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or not self._is_alive(entry[1]):
+                self._data.pop(key, None)
+                return False
+            self._data[key] = (func(entry[0]), entry[1])
+            return True
+
+
+class PeriodicRefresh:
+    """Dữ liệu dựng sẵn trong bộ nhớ tiến trình, tính lại định kỳ.
+
+    Lớp con cài đặt ``_load()`` (tính dữ liệu mới từ cơ sở dữ liệu) và đặt
+    ``interval_key`` / ``default_interval`` (chu kỳ tính lại, giây). Lần gọi
+    ``ensure_ready()`` đầu tiên tính dữ liệu ngay trong request. Khi dữ liệu
+    đã quá chu kỳ hoặc bị ``invalidate()``:
+
+    - nếu ``background`` bật, request vẫn dùng dữ liệu cũ và một luồng nền
+      tính lại (mỗi lúc chỉ một luồng);
+    - ngược lại request hiện tại tính lại.
+
+    Thay đổi áp dụng trực tiếp lên dữ liệu đang dùng phải gọi ``_touch()``
+    để lần tính lại đang chạy (nếu có) biết kết quả của nó có thể đã cũ.
+    """
+
+    interval_key: Optional[str] = None
+    default_interval: float = 300
+    background = True
+    thread_name = "periodic-refresh"
+
+    def __init__(self) -> None:
+        self._data: Any = None
+        self._lock = threading.RLock()
+        self._built_at = 0.0
+        self._expired = False
+        self._generation = 0
+        self._refreshing = False
+
+    def _load(self) -> Any:
+        """Tính dữ liệu mới từ cơ sở dữ liệu (không giữ khoá)."""
+        raise NotImplementedError
+
+    def _install(self, data: Any) -> None:
+        """Thay dữ liệu đang dùng (được gọi trong khoá)."""
+        self._data = data
+
+    def _interval(self) -> float:
+        if self.interval_key is None:
+            return self.default_interval
+        return config_value(self.interval_key, self.default_interval)
+
+    def _age(self) -> float:
+        return time.monotonic() - self._built_at
+
+    def _is_stale(self) -> bool:
+        return self._expired or self._age() >= self._interval()
+
+    def _touch(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def rebuild(self) -> None:
+        """Tính lại toàn bộ dữ liệu ngay trong luồng hiện tại."""
+        generation = self._generation
+        data = self._load()
+        with self._lock:
+            self._install(data)
+            self._built_at = time.monotonic()
+            # Dữ liệu đổi trong lúc đang tính: kết quả có thể đã cũ.
+            self._expired = generation != self._generation
+
+    def refresh(self) -> None:
+        """Làm mới dữ liệu khi đã quá chu kỳ; mặc định tính lại toàn bộ."""
+        self.rebuild()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        app = current_app._get_current_object()
+        threading.Thread(
+            target=self._background_refresh,
+            args=(app,),
+            name=self.thread_name,
+            daemon=True,
+        ).start()
+
+    def _background_refresh(self, app) -> None:
+        try:
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception:
+                    # Giữ dữ liệu cũ; lần hết hạn sau sẽ thử lại.
+                    app.logger.exception("Không làm mới được %s", self.thread_name)
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def ensure_ready(self) -> None:
+        """Tính dữ liệu nếu chưa có; làm mới khi đã quá chu kỳ."""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self.rebuild()
+        elif self._is_stale():
+            if self.background and has_app_context():
+                self._refresh_in_background()
+                return
+            with self._lock:
+                if self._is_stale():
+                    self.refresh()
+
+    def invalidate(self) -> None:
+        """Đánh dấu dữ liệu hết hạn; lần gọi sau làm mới."""
+        with self._lock:
+            self._expired = True
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Bỏ dữ liệu đang dùng; lần gọi sau phải chờ tính lại."""
+        with self._lock:
+            self._data = None
+            self._expired = False
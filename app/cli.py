@@ -0,0 +1,86 @@
+"""
+Các lệnh quản trị chạy bằng Flask CLI (``flask <lệnh>``).
+"""
+
+import click
+from flask.cli import with_appcontext
+
+from app.services.inventory_ledger_service import rebuild_stock_levels
+from app.services.product_import_service import ImportFileError, import_products_file
+from app.services.recommendation_service import build_recommendations
+from app.services.sales_rollup_service import rebuild_sales_rollups
+
+
+@click.command("import-products")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", type=int, default=None, help="Số sản phẩm mỗi lô.")
+@click.option("--dry-run", is_flag=True, help="Chỉ kiểm tra dữ liệu, không lưu.")
+@with_appcontext
+def import_products_command(path, chunk_size, dry_run):
+    """Nhập sản phẩm hàng loạt từ file CSV/XLSX tại PATH."""
+    with open(path, "rb") as stream:
+        try:
+            result = import_products_file(stream, path, chunk_size, dry_run)
+        except ImportFileError as exc:
+            raise click.ClickException(str(exc)) from exc
+
+    for error in result.errors:
+        click.echo(f"Dòng {error.line}: {error.message}", err=True)
+    if result.error_count > len(result.errors):
+        click.echo(
+            f"... và {result.error_count - len(result.errors)} lỗi khác.", err=True
+        )
+
+    label = "Hợp lệ" if dry_run else "Đã nhập"
+    click.echo(
+        f"Đã đọc {result.total_rows} dòng. {label}: {result.imported}. "
+        f"Lỗi: {result.error_count}."
+    )
+
+
+@click.command("backfill-sales-rollup")
+@click.option(
+    "--from", "date_from", type=click.DateTime(["%Y-%m-%d"]), default=None,
+    help="Ngày bắt đầu (YYYY-MM-DD), bỏ trống để tính từ đầu.",
+)
+@click.option(
+    "--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), default=None,
+    help="Ngày kết thúc (YYYY-MM-DD), bỏ trống để tính đến hiện tại.",
+)
+@with_appcontext
+def backfill_sales_rollup_command(date_from, date_to):
+    """Tính lại bảng tổng hợp bán hàng theo ngày từ đơn hàng và hóa đơn."""
+    days, product_rows = rebuild_sales_rollups(
+        date_from.date() if date_from else None,
+        date_to.date() if date_to else None,
+    )
+    click.echo(f"Đã ghi {days} ngày và {product_rows} dòng sản phẩm theo ngày.")
+
+
+@click.command("rebuild-stock-levels")
+@with_appcontext
+def rebuild_stock_levels_command():
+    """Đối soát sổ biến động tồn kho và tính lại tồn kho hiện tại."""
+    adjustments, rows = rebuild_stock_levels()
+    click.echo(f"Đã ghi {adjustments} bút toán điều chỉnh, {rows} dòng tồn kho.")
+
+
+@click.command("build-recommendations")
+@click.option("--top-k", type=int, default=None, help="Số gợi ý mỗi sản phẩm.")
+@with_appcontext
+def build_recommendations_command(top_k):
+    """Tính lại danh sách sản phẩm gợi ý từ đơn hàng và danh sách yêu thích."""
+    products, rows = build_recommendations(top_k)
+    click.echo(f"Đã ghi {rows} gợi ý cho {products} sản phẩm.")
+
+
+def register_commands(app):
+    """Đăng ký các lệnh CLI vào ứng dụng.
+
+    Args:
+        app (Flask): Ứng dụng Flask.
+    """
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(backfill_sales_rollup_command)
+    app.cli.add_command(rebuild_stock_levels_command)
+    app.cli.add_command(build_recommendations_command)
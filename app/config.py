@@ -8,4 +8,71 @@ load_dotenv()
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
\ No newline at end of file
+    SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
+
+    # Thời gian sống (giây) của bộ nhớ đệm thống kê dashboard.
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 300))
+
+    # Thời gian sống (giây) của bộ nhớ đệm số lượng sản phẩm trong giỏ hàng.
+    CART_COUNT_CACHE_TTL = int(os.getenv("CART_COUNT_CACHE_TTL", 300))
+
+    # Bộ máy tìm kiếm sản phẩm: "memory" (chỉ mục đảo ngược trong bộ nhớ)
+    # hoặc "sql" (truy vấn LIKE trực tiếp).
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory")
+
+    # Chu kỳ (giây) đồng bộ chỉ mục tìm kiếm với các sản phẩm vừa chỉnh sửa.
+    SEARCH_INDEX_SYNC_INTERVAL = int(os.getenv("SEARCH_INDEX_SYNC_INTERVAL", 60))
+
+    # Chu kỳ (giây) xây lại chỉ mục gợi ý tìm kiếm (cập nhật độ phổ biến).
+    SUGGESTION_REBUILD_INTERVAL = int(os.getenv("SUGGESTION_REBUILD_INTERVAL", 300))
+
+    # Chu kỳ (giây) xây lại chỉ mục bộ lọc sản phẩm theo thuộc tính.
+    FACET_REBUILD_INTERVAL = int(os.getenv("FACET_REBUILD_INTERVAL", 300))
+
+    # Thời gian sống (giây) của tổng số bản ghi ở chế độ phân trang theo khoá.
+    ADMIN_COUNT_CACHE_TTL = int(os.getenv("ADMIN_COUNT_CACHE_TTL", 60))
+
+    # Số đơn hàng mỗi trang lịch sử mua hàng.
+    PURCHASE_HISTORY_PER_PAGE = int(os.getenv("PURCHASE_HISTORY_PER_PAGE", 10))
+
+    # Thời gian sống (giây) của phần trang chi tiết sản phẩm đã lưu đệm.
+    PRODUCT_PAGE_CACHE_TTL = int(os.getenv("PRODUCT_PAGE_CACHE_TTL", 300))
+
+    # Các dải sản phẩm trang chủ: dùng nguyên trong HOME_RAILS_TTL giây, sau đó
+    # vẫn trả bản cũ và tính lại ở luồng nền; quá HOME_RAILS_MAX_STALE giây thì
+    # request phải chờ tính lại.
+    HOME_RAILS_TTL = int(os.getenv("HOME_RAILS_TTL", 60))
+    HOME_RAILS_MAX_STALE = int(os.getenv("HOME_RAILS_MAX_STALE", 3600))
+
+    # Xếp hạng bán chạy: chu kỳ bán rã (ngày) của doanh số và chu kỳ xây lại (giây).
+    BEST_SELLER_HALF_LIFE_DAYS = float(os.getenv("BEST_SELLER_HALF_LIFE_DAYS", 14))
+    BEST_SELLER_REBUILD_INTERVAL = int(os.getenv("BEST_SELLER_REBUILD_INTERVAL", 900))
+
+    # Gợi ý sản phẩm (flask build-recommendations): số gợi ý mỗi sản phẩm,
+    # trọng số danh sách yêu thích so với một đơn hàng, chu kỳ nạp lại (giây).
+    RECOMMENDATION_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", 20))
+    RECOMMENDATION_FAVORITE_WEIGHT = float(os.getenv("RECOMMENDATION_FAVORITE_WEIGHT", 0.5))
+    RECOMMENDATION_RELOAD_INTERVAL = int(os.getenv("RECOMMENDATION_RELOAD_INTERVAL", 900))
+
+    # Số sản phẩm được lưu và commit trong mỗi lô khi nhập hàng loạt.
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", 500))
+
+    # Dung lượng tối đa (byte) của file tải lên.
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 64 * 1024 * 1024))
+
+    # Đo số câu lệnh SQL / thời gian truy vấn theo endpoint ("1" để bật).
+    QUERY_INSTRUMENTATION = os.getenv("QUERY_INSTRUMENTATION", "0") == "1"
+
+    # Thêm header X-DB-Query-Count, X-DB-Time-Ms, ... vào response (debug).
+    QUERY_INSTRUMENTATION_HEADER = os.getenv("QUERY_INSTRUMENTATION_HEADER", "0") == "1"
+
+    # Số lần một câu lệnh cùng dạng lặp lại trong một request để bị coi là N+1.
+    QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", 10))
+
+    # Số câu lệnh chậm nhất được giữ lại để xuất ra số liệu.
+    QUERY_SLOW_STATEMENTS = int(os.getenv("QUERY_SLOW_STATEMENTS", 10))
+
+    # Đường dẫn xuất số liệu dạng Prometheus và token bảo vệ (Bearer); không
+    # có token thì không mở đường dẫn.
+    METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
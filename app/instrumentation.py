@@ -0,0 +1,321 @@
+"""
+Đo số câu lệnh SQL và thời gian truy vấn theo từng endpoint (tuỳ chọn bật).
+
+Khi bật QUERY_INSTRUMENTATION, mỗi câu lệnh SQL được đếm và bấm giờ qua các
+sự kiện ``before_cursor_execute`` / ``after_cursor_execute`` của SQLAlchemy,
+gom theo request nhờ các signal ``request_started`` / ``request_finished``
+của Flask. Cuối mỗi request:
+
+- số liệu được cộng vào bộ đếm theo endpoint, xuất ở dạng văn bản
+  Prometheus tại METRICS_PATH (chỉ khi đặt METRICS_TOKEN);
+- câu lệnh có cùng "hình dạng" (bỏ tham số, gộp danh sách IN) lặp lại quá
+  QUERY_N_PLUS_ONE_THRESHOLD lần được coi là dấu hiệu N+1 và được ghi log;
+- nếu bật QUERY_INSTRUMENTATION_HEADER, response có thêm header
+  X-DB-Query-Count, X-DB-Time-Ms, X-DB-N-Plus-One và Server-Timing.
+
+Số liệu nằm trong bộ nhớ của từng tiến trình. Truy vấn chạy trong lúc gửi
+response dạng stream (sau khi request kết thúc) không được tính.
+"""
+
+import hmac
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, abort, current_app, g, request, request_finished, request_started
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+DEFAULT_SLOW_STATEMENTS = 10
+DEFAULT_METRICS_PATH = "/metrics"
+
+# Ngưỡng (số câu lệnh / request) của histogram.
+QUERY_COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+
+# Độ dài tối đa của câu lệnh trong header, log và nhãn Prometheus.
+MAX_SHAPE_LENGTH = 200
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST_RE = re.compile(
+    rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)"
+)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def statement_shape(statement: str) -> str:
+    """Chuẩn hoá câu lệnh SQL để các lần gọi cùng dạng có cùng giá trị.
+
+    Giá trị hằng được thay bằng ``?`` và danh sách tham số ``IN (?, ?, ...)``
+    được gộp thành ``IN (?)``.
+
+    Args:
+        statement (str): Câu lệnh SQL.
+
+    Returns:
+        str: Hình dạng câu lệnh.
+    """
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _STRING_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _PLACEHOLDER_LIST_RE.sub("(?)", shape)
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_SHAPE_LENGTH:
+        return text
+    return text[: MAX_SHAPE_LENGTH - 3] + "..."
+
+
+def _label(value: str) -> str:
+    """Thoát giá trị nhãn theo định dạng văn bản của Prometheus."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _RequestStats:
+    """Số liệu truy vấn của một request."""
+
+    __slots__ = ("started", "count", "seconds", "shapes", "slowest")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: Tuple[float, str] = (0.0, "")
+
+    def add(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, shape)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Các hình dạng câu lệnh lặp lại nhiều hơn ``threshold`` lần."""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count > threshold
+        ]
+
+
+# -----------------------------------------------------------------------------
+# Bộ đếm theo endpoint
+# -----------------------------------------------------------------------------
+
+class QueryMetrics:
+    """Bộ đếm số liệu truy vấn theo endpoint, an toàn luồng."""
+
+    def __init__(self, slow_statements: int = DEFAULT_SLOW_STATEMENTS) -> None:
+        self.slow_statements = slow_statements
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, dict] = {}
+        self._slowest: List[Tuple[float, str, str]] = []
+
+    def observe(self, endpoint: str, stats: _RequestStats, n_plus_one: int) -> None:
+        """Cộng số liệu của một request vào bộ đếm."""
+        elapsed = time.perf_counter() - stats.started
+        with self._lock:
+            item = self._endpoints.get(endpoint)
+            if item is None:
+                item = self._endpoints[endpoint] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "db_seconds": 0.0,
+                    "request_seconds": 0.0,
+                    "max_queries": 0,
+                    "n_plus_one": 0,
+                    "buckets": [0] * len(QUERY_COUNT_BUCKETS),
+                }
+            item["requests"] += 1
+            item["queries"] += stats.count
+            item["db_seconds"] += stats.seconds
+            item["request_seconds"] += elapsed
+            item["max_queries"] = max(item["max_queries"], stats.count)
+            item["n_plus_one"] += n_plus_one
+            for index, bound in enumerate(QUERY_COUNT_BUCKETS):
+                if stats.count <= bound:
+                    item["buckets"][index] += 1
+
+            seconds, shape = stats.slowest
+            if shape:
+                self._slowest.append((seconds, endpoint, shape))
+                self._slowest.sort(reverse=True)
+                del self._slowest[self.slow_statements:]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._slowest.clear()
+
+    def render(self) -> str:
+        """Xuất số liệu ở định dạng văn bản của Prometheus."""
+        with self._lock:
+            endpoints = sorted(
+                (name, dict(item, buckets=list(item["buckets"])))
+                for name, item in self._endpoints.items()
+            )
+            slowest = list(self._slowest)
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, key: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for endpoint, item in endpoints:
+                lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {item[key]}')
+
+        metric("app_http_requests_total", "counter", "Số request đã xử lý.", "requests")
+        metric("app_db_queries_total", "counter", "Số câu lệnh SQL.", "queries")
+        metric(
+            "app_db_query_seconds_total", "counter",
+            "Tổng thời gian thực thi SQL (giây).", "db_seconds",
+        )
+        metric(
+            "app_http_request_seconds_total", "counter",
+            "Tổng thời gian xử lý request (giây).", "request_seconds",
+        )
+        metric(
+            "app_db_queries_per_request_max", "gauge",
+            "Số câu lệnh SQL lớn nhất trong một request.", "max_queries",
+        )
+        metric(
+            "app_db_n_plus_one_total", "counter",
+            "Số lần phát hiện câu lệnh lặp lại kiểu N+1.", "n_plus_one",
+        )
+
+        name = "app_db_queries_per_request"
+        lines.append(f"# HELP {name} Phân bố số câu lệnh SQL mỗi request.")
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, item in endpoints:
+            label = _label(endpoint)
+            for bound, count in zip(QUERY_COUNT_BUCKETS, item["buckets"]):
+                lines.append(f'{name}_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{endpoint="{label}",le="+Inf"}} {item["requests"]}')
+            lines.append(f'{name}_sum{{endpoint="{label}"}} {item["queries"]}')
+            lines.append(f'{name}_count{{endpoint="{label}"}} {item["requests"]}')
+
+        name = "app_db_slow_statement_seconds"
+        lines.append(f"# HELP {name} Các câu lệnh SQL chậm nhất đã ghi nhận (giây).")
+        lines.append(f"# TYPE {name} gauge")
+        for seconds, endpoint, shape in slowest:
+            lines.append(
+                f'{name}{{endpoint="{_label(endpoint)}",statement="{_label(_truncate(shape))}"}} '
+                f"{seconds:.6f}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
+
+
+# -----------------------------------------------------------------------------
+# Móc vào SQLAlchemy và Flask
+# -----------------------------------------------------------------------------
+
+def _current_stats() -> Optional[_RequestStats]:
+    return g.get("_query_stats") if g else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    stats = _current_stats()
+    if stats is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+def _on_request_started(sender, **extra) -> None:
+    g._query_stats = _RequestStats()
+
+
+def _on_request_finished(sender, response, **extra) -> None:
+    stats = g.pop("_query_stats", None)
+    if stats is None:
+        return
+
+    config = current_app.config
+    endpoint = request.endpoint or "unknown"
+    repeated = stats.repeated(
+        config.get("QUERY_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+    )
+    for shape, count in repeated:
+        current_app.logger.warning(
+            "Nghi vấn N+1 tại %s: %d lần %s", endpoint, count, _truncate(shape)
+        )
+    query_metrics.observe(endpoint, stats, len(repeated))
+
+    if config.get("QUERY_INSTRUMENTATION_HEADER"):
+        milliseconds = stats.seconds * 1000
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{milliseconds:.1f}"
+        response.headers["Server-Timing"] = (
+            f'db;dur={milliseconds:.1f};desc="{stats.count} queries"'
+        )
+        if repeated:
+            shape, count = repeated[0]
+            response.headers["X-DB-N-Plus-One"] = f"{count}x {_truncate(shape)}"
+
+
+def _metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    authorization = request.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(
+        authorization.encode(), f"Bearer {token}".encode()
+    ):
+        abort(404)
+    return Response(
+        query_metrics.render(),
+        mimetype="text/plain",
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+def init_instrumentation(app) -> None:
+    """Bật đo truy vấn cho ứng dụng nếu QUERY_INSTRUMENTATION được bật.
+
+    Args:
+        app (Flask): Ứng dụng Flask (đã gọi db.init_app).
+    """
+    if not app.config.get("QUERY_INSTRUMENTATION"):
+        return
+
+    query_metrics.slow_statements = app.config.get(
+        "QUERY_SLOW_STATEMENTS", DEFAULT_SLOW_STATEMENTS
+    )
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    request_started.connect(_on_request_started, app)
+    request_finished.connect(_on_request_finished, app)
+
+    # Số liệu lộ danh sách endpoint và dạng câu lệnh SQL: chỉ mở khi có token.
+    if app.config.get("METRICS_TOKEN"):
+        app.add_url_rule(
+            app.config.get("METRICS_PATH", DEFAULT_METRICS_PATH),
+            "query_metrics",
+            _metrics_view,
+        )
@@ -24,4 +24,12 @@ from .invoice_detail import InvoiceDetail
 from .order import Order
 from .order_detail import OrderDetail
 
-from .favorite import Favorite
\ No newline at end of file
+from .favorite import Favorite
+
+from .daily_sales import DailySales
+from .daily_product_sales import DailyProductSales
+
+from .inventory_movement import InventoryMovement
+from .stock_level import StockLevel
+
+from .product_recommendation import ProductRecommendation
@@ -7,6 +7,10 @@ from app.extensions import db, login_manager
 
 class Account(UserMixin, db.Model):
     __tablename__ = "TaiKhoan"
+    __table_args__ = (
+        # Đếm khách hàng theo trạng thái (dashboard).
+        db.Index("ix_TaiKhoan_role_trang_thai", "role", "trang_thai"),
+    )
 
     ma_tai_khoan = db.Column(db.Integer, primary_key=True, autoincrement=True)
     ten_tai_khoan = db.Column(db.String(256), nullable=False, unique=True)
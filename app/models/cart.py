@@ -3,6 +3,10 @@ from app.extensions import db
 
 class Cart(db.Model):
     __tablename__ = "GioHang"
+    __table_args__ = (
+        # Giỏ hàng đang hoạt động của tài khoản.
+        db.Index("ix_GioHang_tai_khoan_trang_thai", "ma_tai_khoan", "trang_thai"),
+    )
 
     def __init__(
         self,
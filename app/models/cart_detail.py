@@ -3,6 +3,10 @@ from app.extensions import db
 
 class CartDetail(db.Model):
     __tablename__ = "ChiTietGioHang"
+    __table_args__ = (
+        # Các dòng của giỏ hàng và tra một sản phẩm trong giỏ.
+        db.Index("ix_ChiTietGioHang_gio_hang_san_pham", "ma_gio_hang", "ma_san_pham"),
+    )
 
     def __init__(
         self,
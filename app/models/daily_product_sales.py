@@ -0,0 +1,16 @@
+from app.extensions import db
+
+
+class DailyProductSales(db.Model):
+    """Số lượng bán và doanh thu của từng sản phẩm theo ngày (từ chi tiết hóa đơn)."""
+
+    __tablename__ = "SanPhamBanNgay"
+
+    ngay = db.Column(db.Date, primary_key=True)
+    ma_san_pham = db.Column(db.Integer, primary_key=True)
+
+    so_luong_ban = db.Column(db.Integer, nullable=False, default=0)
+    doanh_thu = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SanPhamBanNgay {self.ngay} - SP {self.ma_san_pham}>"
@@ -0,0 +1,24 @@
+from app.extensions import db
+
+
+class DailySales(db.Model):
+    """Số liệu bán hàng tổng hợp theo ngày (cập nhật dần khi đơn hàng/hóa đơn thay đổi)."""
+
+    __tablename__ = "DoanhThuNgay"
+
+    ngay = db.Column(db.Date, primary_key=True)
+
+    # Doanh thu và số hóa đơn (không tính hóa đơn đã xóa), theo ngày tạo hóa đơn.
+    doanh_thu = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    so_hoa_don = db.Column(db.Integer, nullable=False, default=0)
+
+    # Số đơn hàng theo ngày tạo đơn, tách theo trạng thái hiện tại.
+    so_don_hang = db.Column(db.Integer, nullable=False, default=0)
+    so_don_cho_xu_ly = db.Column(db.Integer, nullable=False, default=0)
+    so_don_dang_xu_ly = db.Column(db.Integer, nullable=False, default=0)
+    so_don_dang_giao = db.Column(db.Integer, nullable=False, default=0)
+    so_don_hoan_thanh = db.Column(db.Integer, nullable=False, default=0)
+    so_don_da_huy = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DoanhThuNgay {self.ngay}>"
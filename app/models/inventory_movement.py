@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class InventoryMovement(db.Model):
+    """Một lần nhập/xuất kho (chỉ thêm, không sửa hay xoá)."""
+
+    __tablename__ = "BienDongTonKho"
+    __table_args__ = (
+        db.Index("ix_BienDongTonKho_san_pham", "ma_san_pham", "ngay_tao"),
+    )
+
+    ma_bien_dong = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    ma_san_pham = db.Column(db.Integer, nullable=False)
+
+    # NULL: biến động của tổng tồn kho sản phẩm (SanPham.so_luong).
+    ma_kich_thuoc_san_pham = db.Column(db.Integer)
+
+    loai = db.Column(db.SmallInteger, nullable=False)
+
+    # Số lượng thay đổi: dương khi nhập/hoàn trả, âm khi bán.
+    so_luong = db.Column(db.Integer, nullable=False)
+
+    ma_don_hang = db.Column(db.Integer)
+    ghi_chu = db.Column(db.String(255))
+    ngay_tao = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BienDongTonKho {self.ma_bien_dong} - SP {self.ma_san_pham}>"
@@ -3,6 +3,14 @@ from app.extensions import db
 
 class Invoice(db.Model):
     __tablename__ = "HoaDon"
+    __table_args__ = (
+        # Doanh thu theo khoảng ngày (dashboard, tính lại bảng tổng hợp), lọc
+        # theo trạng thái và khoảng ngày, hóa đơn của một tài khoản/đơn hàng.
+        db.Index("ix_HoaDon_ngay_tao_trang_thai", "ngay_tao", "trang_thai"),
+        db.Index("ix_HoaDon_trang_thai_ngay_tao", "trang_thai", "ngay_tao"),
+        db.Index("ix_HoaDon_tai_khoan_ngay_tao", "ma_tai_khoan", "ngay_tao"),
+        db.Index("idx_hoadon_donhang", "ma_don_hang"),
+    )
 
     ma_hoa_don = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
@@ -17,9 +25,7 @@ class Invoice(db.Model):
     trang_thai = db.Column(db.SmallInteger)
     
     # Link to the Order that this invoice was created from
-    # NOTE: This column needs to be added to the database manually:
-    # ALTER TABLE HoaDon ADD COLUMN ma_don_hang INT NULL;
-    # ALTER TABLE HoaDon ADD INDEX idx_hoadon_donhang (ma_don_hang);
+    # Existing databases: ``flask db upgrade`` adds the column and its index.
     ma_don_hang = db.Column(db.Integer, nullable=True)
     
     def __repr__(self):
@@ -3,6 +3,9 @@ from app.extensions import db
 
 class InvoiceDetail(db.Model):
     __tablename__ = "ChiTietHoaDon"
+    __table_args__ = (
+        db.Index("ix_ChiTietHoaDon_hoa_don", "ma_hoa_don"),
+    )
 
     ma_chi_tiet_hoa_don = db.Column(
         db.Integer, primary_key=True, autoincrement=True
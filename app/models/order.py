@@ -5,6 +5,13 @@ from app.extensions import db
 
 class Order(db.Model):
     __tablename__ = "DonHang"
+    __table_args__ = (
+        # Đơn hàng mới nhất / trong ngày (dashboard), lọc theo trạng thái và
+        # khoảng ngày (trang quản trị), đơn hàng của một tài khoản.
+        db.Index("ix_DonHang_ngay_tao", "ngay_tao"),
+        db.Index("ix_DonHang_trang_thai_ngay_tao", "trang_thai", "ngay_tao"),
+        db.Index("ix_DonHang_tai_khoan_ngay_tao", "ma_tai_khoan", "ngay_tao"),
+    )
 
     ma_don_hang = db.Column(db.Integer, primary_key=True, autoincrement=True)
     ma_tai_khoan = db.Column(db.Integer, nullable=False)
@@ -15,6 +22,10 @@ class Order(db.Model):
 
     trang_thai = db.Column(db.SmallInteger)
 
+    # 1 nếu số lượng sản phẩm của đơn đang được trừ khỏi tồn kho.
+    # Bản cài đặt cũ: ``flask db upgrade`` thêm cột này.
+    giu_ton_kho = db.Column(db.SmallInteger, nullable=False, default=0, server_default="0")
+
     # 1 đơn hàng - nhiều chi tiết đơn hàng
     chi_tiet_don_hang = db.relationship(
         "OrderDetail",
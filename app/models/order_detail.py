@@ -4,6 +4,9 @@ from datetime import datetime
 
 class OrderDetail(db.Model):
     __tablename__ = "ChiTietDonHang"
+    __table_args__ = (
+        db.Index("ix_ChiTietDonHang_don_hang", "ma_don_hang"),
+    )
 
     def __init__(
         self,
@@ -5,6 +5,10 @@ from app.extensions import db
 
 class Product(db.Model):
     __tablename__ = "SanPham"
+    __table_args__ = (
+        # Đếm sản phẩm đang bán / sắp hết hàng (dashboard).
+        db.Index("ix_SanPham_trang_thai_so_luong", "trang_thai", "so_luong"),
+    )
 
     ma_san_pham = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
@@ -25,6 +29,9 @@ class Product(db.Model):
 
     mo_ta = db.Column(db.Text, nullable=True)
 
+    bo_suu_tap = db.Column(db.Integer, nullable=True)
+    thuong_hieu = db.Column(db.Integer, nullable=True)
+
     ngay_tao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     ngay_chinh_sua = db.Column(
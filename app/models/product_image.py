@@ -5,6 +5,9 @@ from app.extensions import db
 
 class ProductImage(db.Model):
     __tablename__ = "HinhAnhSanPham"
+    __table_args__ = (
+        db.Index("ix_HinhAnhSanPham_san_pham", "ma_san_pham"),
+    )
 
     ma_hinh_anh = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
@@ -0,0 +1,21 @@
+from app.extensions import db
+
+
+class ProductRecommendation(db.Model):
+    """Danh sách sản phẩm gợi ý (mua cùng / yêu thích cùng) của từng sản phẩm.
+
+    Được ghi lại toàn bộ bởi lệnh ``flask build-recommendations``.
+    """
+
+    __tablename__ = "SanPhamGoiY"
+
+    ma_san_pham = db.Column(db.Integer, primary_key=True)
+
+    # Thứ hạng trong danh sách gợi ý của sản phẩm, bắt đầu từ 1.
+    thu_hang = db.Column(db.SmallInteger, primary_key=True)
+
+    ma_san_pham_goi_y = db.Column(db.Integer, nullable=False)
+    diem = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<SanPhamGoiY SP {self.ma_san_pham} - #{self.thu_hang} SP {self.ma_san_pham_goi_y}>"
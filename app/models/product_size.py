@@ -3,6 +3,9 @@ from app.extensions import db
 
 class ProductSize(db.Model):
     __tablename__ = "KichThuocSanPham"
+    __table_args__ = (
+        db.Index("ix_KichThuocSanPham_san_pham", "ma_san_pham"),
+    )
 
     ma_kich_thuoc_san_pham = db.Column(
         db.Integer, primary_key=True, autoincrement=True
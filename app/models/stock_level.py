@@ -0,0 +1,20 @@
+from app.extensions import db
+
+
+class StockLevel(db.Model):
+    """Tồn kho hiện tại theo sản phẩm / kích thước, cộng dồn từ BienDongTonKho."""
+
+    __tablename__ = "TonKhoSanPham"
+    __table_args__ = (
+        db.Index("ix_TonKhoSanPham_so_luong", "ma_kich_thuoc_san_pham", "so_luong"),
+    )
+
+    ma_san_pham = db.Column(db.Integer, primary_key=True)
+
+    # 0: dòng tổng của sản phẩm; khác 0: mã KichThuocSanPham.
+    ma_kich_thuoc_san_pham = db.Column(db.Integer, primary_key=True, default=0)
+
+    so_luong = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TonKhoSanPham SP {self.ma_san_pham} - KT {self.ma_kich_thuoc_san_pham}>"
@@ -0,0 +1,235 @@
+"""
+Phân trang theo khoá (keyset / "seek" pagination) cho các danh sách quản trị.
+
+Phân trang OFFSET phải quét bỏ toàn bộ các dòng trước trang hiện tại và chạy
+thêm một truy vấn COUNT(*), nên càng về các trang sau càng chậm. Phân trang
+theo khoá lọc trực tiếp ``khoá < khoá cuối của trang trước`` trên khoá chính
+(có index), chi phí mỗi trang không phụ thuộc độ sâu.
+
+Con trỏ (cursor) được ký bằng SECRET_KEY và mã hoá base64 nên không đọc/sửa
+được từ phía người dùng. Tổng số bản ghi ở chế độ này được đếm và lưu đệm
+trong một khoảng ngắn (ADMIN_COUNT_CACHE_TTL), nên chỉ là giá trị gần đúng.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from app.cache import TTLCache, config_value
+
+
+DEFAULT_COUNT_CACHE_TTL = 60
+COUNT_CACHE_SIZE = 1024
+
+_CURSOR_SALT = "keyset-pagination"
+_NEXT = "n"
+_PREV = "p"
+
+_count_cache = TTLCache(ttl=DEFAULT_COUNT_CACHE_TTL, maxsize=COUNT_CACHE_SIZE)
+
+
+# -----------------------------------------------------------------------------
+# Con trỏ
+# -----------------------------------------------------------------------------
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt=_CURSOR_SALT)
+
+
+def encode_cursor(key: Any, direction: str = _NEXT) -> str:
+    """Mã hoá con trỏ phân trang.
+
+    Args:
+        key: Giá trị khoá của bản ghi làm mốc.
+        direction: "n" để lấy các bản ghi sau mốc, "p" để lấy các bản ghi trước.
+
+    Returns:
+        str: Con trỏ dùng được trong URL.
+    """
+    return _serializer().dumps([key, direction])
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Any, str]]:
+    """Giải mã con trỏ phân trang.
+
+    Args:
+        cursor: Con trỏ nhận từ URL.
+
+    Returns:
+        tuple | None: (khoá, hướng), None nếu con trỏ rỗng hoặc không hợp lệ.
+    """
+    if not cursor:
+        return None
+    try:
+        key, direction = _serializer().loads(cursor)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    if direction not in (_NEXT, _PREV):
+        return None
+    return key, direction
+
+
+# -----------------------------------------------------------------------------
+# Đếm có lưu đệm
+# -----------------------------------------------------------------------------
+
+def _count_ttl() -> float:
+    return config_value("ADMIN_COUNT_CACHE_TTL", DEFAULT_COUNT_CACHE_TTL)
+
+
+def cached_count(query) -> int:
+    """Đếm số bản ghi của truy vấn, lưu đệm theo câu SQL và tham số.
+
+    Args:
+        query: Truy vấn SQLAlchemy (Query) đã lọc.
+
+    Returns:
+        int: Số bản ghi (có thể trễ tối đa ADMIN_COUNT_CACHE_TTL giây).
+    """
+    compiled = query.statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    return _count_cache.get_or_set(
+        key, lambda: query.order_by(None).count(), ttl=_count_ttl()
+    )
+
+
+# -----------------------------------------------------------------------------
+# Phân trang
+# -----------------------------------------------------------------------------
+
+class KeysetPagination:
+    """Kết quả phân trang theo khoá, sắp xếp khoá giảm dần (mới nhất trước).
+
+    Attributes:
+        items: Các bản ghi của trang hiện tại.
+        per_page: Số bản ghi mỗi trang.
+        total: Tổng số bản ghi gần đúng (None nếu không đếm).
+        has_prev / has_next: Còn trang trước / trang sau hay không.
+        prev_cursor / next_cursor: Con trỏ tới trang trước / trang sau.
+    """
+
+    is_keyset = True
+
+    def __init__(
+        self,
+        items: List[Any],
+        per_page: int,
+        total: Optional[int],
+        has_prev: bool,
+        has_next: bool,
+        prev_cursor: Optional[str],
+        next_cursor: Optional[str],
+    ) -> None:
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def keyset_paginate(
+    query,
+    key_column,
+    cursor: Optional[str],
+    per_page: int,
+    count: bool = True,
+) -> KeysetPagination:
+    """Lấy một trang theo con trỏ, sắp xếp theo khoá giảm dần.
+
+    Args:
+        query: Truy vấn SQLAlchemy (Query) đã lọc.
+        key_column: Cột khoá duy nhất dùng để sắp xếp (thường là khoá chính).
+        cursor: Con trỏ nhận từ URL, rỗng/không hợp lệ để lấy trang đầu.
+        per_page: Số bản ghi mỗi trang.
+        count (bool, optional): Có đếm tổng (lưu đệm) hay không. Defaults to True.
+
+    Returns:
+        KeysetPagination: Kết quả phân trang.
+    """
+    decoded = decode_cursor(cursor)
+    query = query.order_by(None)
+
+    if decoded is not None and decoded[1] == _PREV:
+        rows = (
+            query.filter(key_column > decoded[0])
+            .order_by(key_column.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        if rows:
+            items = list(reversed(rows[:per_page]))
+            has_prev = len(rows) > per_page
+            has_next = True
+        else:
+            # Không còn bản ghi phía trước (bị xoá): quay về trang đầu.
+            decoded = None
+
+    if decoded is None or decoded[1] == _NEXT:
+        after = decoded[0] if decoded is not None else None
+        page_query = query if after is None else query.filter(key_column < after)
+        rows = page_query.order_by(key_column.desc()).limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_prev = after is not None
+        has_next = len(rows) > per_page
+
+    attribute = key_column.key
+    prev_cursor = next_cursor = None
+    if items and has_prev:
+        prev_cursor = encode_cursor(getattr(items[0], attribute), _PREV)
+    if items and has_next:
+        next_cursor = encode_cursor(getattr(items[-1], attribute), _NEXT)
+
+    return KeysetPagination(
+        items=items,
+        per_page=per_page,
+        total=cached_count(query) if count else None,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
+    )
+
+
+def paginate_by_key(
+    query,
+    key_column,
+    page: int,
+    per_page: int,
+    cursor: Optional[str] = None,
+):
+    """Phân trang danh sách quản trị theo khoá giảm dần.
+
+    Khi có ``cursor`` (kể cả chuỗi rỗng) dùng phân trang theo khoá; ngược lại
+    dùng phân trang OFFSET theo số trang như cũ và gắn thêm ``next_cursor``
+    để nút "Sau" chuyển sang chế độ theo khoá.
+
+    Args:
+        query: Truy vấn SQLAlchemy (Query) đã lọc.
+        key_column: Cột khoá duy nhất dùng để sắp xếp.
+        page (int): Trang hiện tại (chế độ OFFSET).
+        per_page (int): Số bản ghi mỗi trang.
+        cursor (str, optional): Con trỏ (chế độ theo khoá). Defaults to None.
+
+    Returns:
+        QueryPagination | KeysetPagination: Kết quả phân trang.
+    """
+    if cursor is not None:
+        return keyset_paginate(query, key_column, cursor, per_page)
+
+    pagination = query.order_by(key_column.desc()).paginate(
+        page=page,
+        per_page=per_page,
+        error_out=False,
+    )
+    pagination.next_cursor = None
+    if pagination.has_next and pagination.items:
+        pagination.next_cursor = encode_cursor(
+            getattr(pagination.items[-1], key_column.key)
+        )
+    return pagination
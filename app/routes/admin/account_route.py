@@ -6,13 +6,23 @@ This module provides routes for managing user accounts in the admin panel.
 
 from datetime import datetime
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    Response,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 
 from app.decorators import admin_required
 from app.services.account_service import (
     AccountServiceError,
     DuplicateAccountError,
     ValidationError,
+    build_account_query,
     create_account,
     get_account_or_404,
     get_account_page,
@@ -20,6 +30,11 @@ from app.services.account_service import (
     search_accounts,
     update_account,
 )
+from app.services.data_export_service import (
+    EXPORT_FORMATS,
+    export_filename,
+    stream_accounts,
+)
 
 
 admin_account_bp = Blueprint(
@@ -39,8 +54,9 @@ def show_account_page():
     """
     keyword = request.args.get("keyword", "").strip()
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
 
-    pagination, accounts, total_accounts = get_account_page(keyword, page)
+    pagination, accounts, total_accounts = get_account_page(keyword, page, cursor=cursor)
     stats = get_account_stats()
 
     return render_template(
@@ -53,6 +69,29 @@ def show_account_page():
     )
 
 
+@admin_account_bp.route("/export", methods=["GET"])
+@admin_required
+def export_accounts():
+    """Export accounts matching the search keyword as CSV or NDJSON.
+
+    Returns:
+        Response: Streamed file download.
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        fmt = "csv"
+
+    query = build_account_query(request.args.get("keyword", "").strip())
+
+    return Response(
+        stream_with_context(stream_accounts(query, fmt)),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename("tai_khoan", fmt)}"'
+        },
+    )
+
+
 @admin_account_bp.route("/search", methods=["GET"])
 @admin_required
 def search_account_page():
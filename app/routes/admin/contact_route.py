@@ -34,8 +34,9 @@ def show_contact_page():
     """
     keyword = request.args.get("keyword", "").strip()
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
 
-    pagination, contacts, total_contacts = get_contact_page(keyword, page)
+    pagination, contacts, total_contacts = get_contact_page(keyword, page, cursor=cursor)
 
     return render_template(
         "admin/contact/contact.html",
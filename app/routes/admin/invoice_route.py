@@ -1,7 +1,14 @@
-from flask import Blueprint, render_template, redirect, request, url_for, flash
+from flask import Blueprint, Response, render_template, redirect, request, url_for, flash
+from flask import stream_with_context
 
 from app.decorators import admin_required
+from app.services.data_export_service import (
+    EXPORT_FORMATS,
+    export_filename,
+    stream_invoices,
+)
 from app.services.invoice_service import (
+    build_invoice_query,
     create_invoice,
     get_invoice_or_404,
     get_invoice_page,
@@ -9,6 +16,7 @@ from app.services.invoice_service import (
     update_invoice,
 )
 from app.services.invoice_detail_service import get_invoice_detail_with_product, create_invoice_detail, delete_invoice_detail
+from app.services.relation_loader_service import load_related
 from app.models.account import Account
 from app.models.product import Product
 from app.models.order import Order
@@ -36,6 +44,7 @@ def show_invoice_page():
     min_value = request.args.get("min_value", "").strip()
     max_value = request.args.get("max_value", "").strip()
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
 
     (
         pagination,
@@ -45,24 +54,22 @@ def show_invoice_page():
         dang_xu_ly,
         da_thanh_toan,
         da_huy,
-    ) = get_invoice_page(keyword, status, date_from, date_to, min_value, max_value, page)
+    ) = get_invoice_page(
+        keyword, status, date_from, date_to, min_value, max_value, page, cursor=cursor
+    )
 
     # Lấy thông tin khách hàng và đơn hàng cho mỗi hóa đơn
-    invoices_with_account = []
-    for invoice in invoices:
-        account = Account.query.get(invoice.ma_tai_khoan)
-        # Safely get order - ma_don_hang might not exist in older database
-        order = None
-        try:
-            if hasattr(invoice, 'ma_don_hang') and invoice.ma_don_hang:
-                order = Order.query.get(invoice.ma_don_hang)
-        except Exception:
-            pass
-        invoices_with_account.append({
+    # (mỗi bảng một truy vấn cho cả trang)
+    accounts = load_related(invoices, Account, "ma_tai_khoan")
+    orders = load_related(invoices, Order, "ma_don_hang")
+    invoices_with_account = [
+        {
             'invoice': invoice,
-            'account': account,
-            'order': order
-        })
+            'account': accounts.get(invoice.ma_tai_khoan),
+            'order': orders.get(getattr(invoice, 'ma_don_hang', None)),
+        }
+        for invoice in invoices
+    ]
 
     return render_template(
         "admin/invoice/invoice.html",
@@ -76,6 +83,32 @@ def show_invoice_page():
     )
 
 
+@invoice_bp.route("/export", methods=["GET"])
+@admin_required
+def export_invoices():
+    """Xuất hóa đơn kèm chi tiết (theo bộ lọc hiện tại) ra CSV hoặc NDJSON."""
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        fmt = "csv"
+
+    query = build_invoice_query(
+        request.args.get("keyword", "").strip(),
+        request.args.get("status"),
+        request.args.get("date_from", "").strip(),
+        request.args.get("date_to", "").strip(),
+        request.args.get("min_value", "").strip(),
+        request.args.get("max_value", "").strip(),
+    )
+
+    return Response(
+        stream_with_context(stream_invoices(query, fmt)),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename("hoa_don", fmt)}"'
+        },
+    )
+
+
 @invoice_bp.route("/create", methods=["GET", "POST"])
 @admin_required
 def show_create_invoice_page():
@@ -1,8 +1,16 @@
-from flask import Blueprint, render_template, redirect, request, url_for, flash
+from flask import Blueprint, Response, render_template, redirect, request, url_for, flash
+from flask import stream_with_context
 
 from app.decorators import admin_required
 from app.constants import OrderStatus
+from app.services.data_export_service import (
+    EXPORT_FORMATS,
+    export_filename,
+    stream_orders,
+)
+from app.services.inventory_service import InsufficientStockError
 from app.services.order_service import (
+    build_order_query,
     cancel_order,
     confirm_order,
     get_order_or_404,
@@ -11,6 +19,7 @@ from app.services.order_service import (
     update_order_status,
 )
 from app.services.order_detail_service import get_order_detail_with_product
+from app.services.relation_loader_service import load_related
 from app.models.account import Account
 
 
@@ -36,6 +45,7 @@ def show_order_page():
     min_value = request.args.get("min_value", "").strip()
     max_value = request.args.get("max_value", "").strip()
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
 
     (
         pagination,
@@ -46,16 +56,19 @@ def show_order_page():
         dang_giao,
         da_giao,
         da_huy,
-    ) = get_order_page(keyword, status, date_from, date_to, min_value, max_value, page)
+    ) = get_order_page(
+        keyword, status, date_from, date_to, min_value, max_value, page, cursor=cursor
+    )
 
-    # Lấy thông tin khách hàng cho mỗi đơn hàng
-    orders_with_account = []
-    for order in orders:
-        account = Account.query.get(order.ma_tai_khoan)
-        orders_with_account.append({
+    # Lấy thông tin khách hàng cho mỗi đơn hàng (một truy vấn cho cả trang)
+    accounts = load_related(orders, Account, "ma_tai_khoan")
+    orders_with_account = [
+        {
             'order': order,
-            'account': account
-        })
+            'account': accounts.get(order.ma_tai_khoan)
+        }
+        for order in orders
+    ]
 
     return render_template(
         "admin/order/order.html",
@@ -71,6 +84,32 @@ def show_order_page():
     )
 
 
+@order_bp.route("/export", methods=["GET"])
+@admin_required
+def export_orders():
+    """Xuất danh sách đơn hàng (theo bộ lọc hiện tại) ra CSV hoặc NDJSON."""
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        fmt = "csv"
+
+    query = build_order_query(
+        request.args.get("keyword", "").strip(),
+        request.args.get("status"),
+        request.args.get("date_from", "").strip(),
+        request.args.get("date_to", "").strip(),
+        request.args.get("min_value", "").strip(),
+        request.args.get("max_value", "").strip(),
+    )
+
+    return Response(
+        stream_with_context(stream_orders(query, fmt)),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename("don_hang", fmt)}"'
+        },
+    )
+
+
 @order_bp.route("/detail/<int:id>", methods=["GET"])
 @admin_required
 def show_order_detail_page(id):
@@ -159,6 +198,8 @@ def update_order_status_route(id):
             flash(f"Trạng thái đơn hàng đã được cập nhật. Hóa đơn #{invoice.ma_hoa_don} đã tồn tại.", "success")
         else:
             flash("Trạng thái đơn hàng đã được cập nhật thành công.", "success")
+    except InsufficientStockError as exc:
+        flash(f"Không thể cập nhật trạng thái: {exc}", "error")
     except (TypeError, ValueError):
         flash("Trạng thái không hợp lệ.", "error")
     
@@ -1,6 +1,12 @@
-from flask import Blueprint, render_template, redirect, request, url_for
+from flask import Blueprint, flash, render_template, redirect, request, url_for
 
 from app.decorators import admin_required
+from app.services.product_import_service import (
+    IMPORT_COLUMNS,
+    IMPORT_EXTENSIONS,
+    ImportFileError,
+    import_products_file,
+)
 from app.services.product_service import (
     create_product,
     get_product_or_404,
@@ -27,6 +33,7 @@ def show_all_products():
     keyword = request.args.get("keyword", "").strip()
     status = request.args.get("status")
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
 
     (
         pagination,
@@ -35,7 +42,7 @@ def show_all_products():
         con_hang,
         het_hang,
         ten_sp_noi_bat,
-    ) = get_product_page(keyword, status, page)
+    ) = get_product_page(keyword, status, page, cursor=cursor)
 
     return render_template(
         "admin/product/product.html",
@@ -191,3 +198,35 @@ def delete_product(id):
     product = get_product_or_404(id)
     soft_delete_product(product)
     return redirect(url_for("product.show_all_products"))
+
+
+@product_bp.route("/import", methods=["GET", "POST"])
+@admin_required
+def import_products_page():
+    """Nhập sản phẩm hàng loạt từ file CSV/XLSX hoặc hiển thị form tải lên.
+
+    Returns:
+        Response: Template nhập sản phẩm kèm kết quả (nếu đã tải file).
+    """
+    result = None
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        dry_run = request.form.get("dry_run") == "1"
+
+        if not upload or not upload.filename:
+            flash("Vui lòng chọn file cần nhập.", "error")
+        else:
+            try:
+                result = import_products_file(
+                    upload.stream, upload.filename, dry_run=dry_run
+                )
+            except ImportFileError as exc:
+                flash(str(exc), "error")
+
+    return render_template(
+        "admin/product/product_import.html",
+        result=result,
+        columns=IMPORT_COLUMNS,
+        extensions=",".join(IMPORT_EXTENSIONS),
+    )
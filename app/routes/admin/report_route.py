@@ -1,12 +1,20 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 from flask import send_file
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font
 from datetime import datetime
 
 from app.decorators import admin_required
-from app.services.report_service import build_report_data
+from app.services.report_export_service import (
+    XLSX_MIMETYPE,
+    export_report_file,
+    parse_export_date,
+)
+from app.services.report_service import (
+    COMPARISONS,
+    DEFAULT_COMPARISON,
+    DEFAULT_GRANULARITY,
+    GRANULARITIES,
+    build_report_data,
+)
 
 
 
@@ -17,53 +25,41 @@ report_bp = Blueprint(
 )
 
 
+def _report_args() -> dict:
+    """Đọc khoảng ngày, độ chi tiết và cách so sánh từ query string."""
+    return {
+        "date_from": parse_export_date(request.args.get("date_from")),
+        "date_to": parse_export_date(request.args.get("date_to")),
+        "granularity": request.args.get("granularity", DEFAULT_GRANULARITY),
+        "compare": request.args.get("compare", DEFAULT_COMPARISON),
+    }
+
+
 @report_bp.route("/", methods=["GET"])
 @admin_required
 def show_report_page():
-    """Hiển thị trang báo cáo doanh thu và lượt mua."""
-    report_data = build_report_data()
-    return render_template("admin/report/report.html", **report_data)
+    """Hiển thị trang báo cáo doanh thu và lượt mua theo khoảng ngày."""
+    report_data = build_report_data(**_report_args())
+    return render_template(
+        "admin/report/report.html",
+        granularities=GRANULARITIES,
+        comparisons=COMPARISONS,
+        **report_data,
+    )
 
 
 @report_bp.route("/export-excel", methods=["GET"])
 @admin_required
 def export_report_excel():
-    """Xuất báo cáo doanh thu và lượt mua dưới dạng file Excel."""
-    report_data = build_report_data()
-
-    revenue = report_data["revenue_stats"]
-    purchase = report_data["purchase_stats"]
-    status_list = report_data["status_breakdown"]
-
-    # page1
-    wb = Workbook()
-    ws1 = wb.active
-    ws1.title = "Tổng quan"
-
-    ws1.append(["Thông tin", "Giá trị"])
-    ws1.append(["Tổng doanh thu", revenue["total_revenue"]])
-    ws1.append(["Tổng lượt mua", purchase["total_orders"]])
-    ws1.append(["Giá trị đơn trung bình", purchase["avg_order_value"]])
-    ws1.append(["Tỷ lệ huỷ đơn (%)", purchase["cancel_rate"]])
-
-    for cell in ws1[1]:
-        cell.font = Font(bold=True)
-    ws1.freeze_panes = "A2"
-
-    # page2
-    ws2 = wb.create_sheet(title="Trạng thái đơn hàng")
-    ws2.append(["Trạng thái", "Số đơn", "Tỷ lệ (%)"])
-    for item in status_list:
-        ws2.append([item["label"], item["value"], item["percent"]])
-    for cell in ws2[1]:
-        cell.font = Font(bold=True)
+    """Xuất báo cáo doanh thu, lượt mua và danh sách đơn hàng ra file Excel.
 
-    ws2.freeze_panes = "A2"
+    Nhận cùng tham số với trang báo cáo (date_from, date_to, granularity,
+    compare); các sheet đơn hàng và chi tiết đơn hàng dùng cùng khoảng ngày.
+    """
+    report_data = build_report_data(**_report_args())
+    period = report_data["period"]
 
-    # export
-    file_stream = BytesIO()
-    wb.save(file_stream)
-    file_stream.seek(0)
+    file_stream = export_report_file(report_data, period["date_from"], period["date_to"])
 
     filename = f"bao_cao_doanhthu{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
@@ -71,5 +67,5 @@ def export_report_excel():
         file_stream,
         as_attachment=True,
         download_name=filename,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        mimetype=XLSX_MIMETYPE,
     )
@@ -2,9 +2,8 @@ from flask import Blueprint, redirect, render_template, session, url_for, reques
 from flask_login import current_user, login_required, logout_user
 from app.extensions import db
 from app.services.dashboard_service import get_dashboard_data, get_website_info
-from app.models.product import Product
 from app.models.order import Order
-from app.services.user_product_service import get_best_seller_products, get_new_products
+from app.services.home_rail_service import home_rails
 from app.services.favorite_service import get_user_favorites, get_user_favorite_ids
 from app.constants import OrderStatus
 
@@ -17,14 +16,8 @@ main_bp = Blueprint(
 
 @main_bp.route("/")
 def show_home_page():
-    best_sellers = get_best_seller_products()
-    new_products = get_new_products()
-    slide_products = (
-        Product.query.filter(Product.trang_thai == 1)
-        .order_by(Product.so_luong.desc())
-        .limit(4)
-        .all()
-    )
+    # Các dải sản phẩm dùng chung cho mọi khách, lấy từ bộ đệm.
+    rails = home_rails.get()
 
     # Lấy danh sách ID sản phẩm yêu thích của user (nếu đã đăng nhập)
     favorite_ids = []
@@ -33,9 +26,9 @@ def show_home_page():
 
     return render_template(
         "index.html",
-        slide_products=slide_products,
-        best_sellers=best_sellers,
-        new_products=new_products,
+        slide_products=rails.slide_products,
+        best_sellers=rails.best_sellers,
+        new_products=rails.new_products,
         favorite_ids=favorite_ids,
     )
 
@@ -20,14 +20,14 @@ from app.services.user_cart_service import (
     build_cart_items_for_display,
     build_checkout_items,
     build_single_product_checkout,
-    calculate_cart_totals,
     clear_cart_items,
     get_active_cart,
     get_cart_item,
-    get_cart_item_count,
-    get_cart_items,
+    get_cached_cart_item_count,
     get_or_create_active_cart,
-    paginate_items,
+    invalidate_cart_count,
+    load_cart_page,
+    load_cart_view,
     remove_cart_item,
     update_cart_item_quantity,
     update_cart_modified_time,
@@ -55,18 +55,17 @@ def show_cart_page():
         Template được render với danh sách sản phẩm trong giỏ hàng.
     """
     cart = get_active_cart(current_user.ma_tai_khoan)
+    page = max(request.args.get("page", 1, type=int), 1)
 
-    cart_items_all = []
+    cart_items = []
     total_price = 0.0
+    pagination = {"page": page, "total_pages": 1, "total_items": 0}
 
     if cart:
-        items = get_cart_items(cart.ma_gio_hang)
-        cart_items_all = build_cart_items_for_display(items)
-        total_price, _ = calculate_cart_totals(items)
-
-    # Phân trang
-    page = int(request.args.get("page", 1))
-    cart_items, pagination = paginate_items(cart_items_all, page)
+        # Phân trang ngay trong cơ sở dữ liệu
+        cart_view, pagination = load_cart_page(cart.ma_gio_hang, page)
+        cart_items = build_cart_items_for_display(cart_view.items)
+        total_price = cart_view.total_price
 
     return render_template(
         "cart.html",
@@ -127,9 +126,12 @@ def update_cart(id: int, action: str):
     if cart_item is None:
         return redirect(url_for("cart.show_cart_page"))
 
-    update_cart_item_quantity(cart_item, action)
+    still_in_cart = update_cart_item_quantity(cart_item, action)
     update_cart_modified_time(cart)
     db.session.commit()
+    if not still_in_cart:
+        # Xoá sau khi commit để request khác không lưu lại số lượng cũ.
+        invalidate_cart_count(current_user.ma_tai_khoan)
 
     return redirect(url_for("cart.show_cart_page"))
 
@@ -160,6 +162,7 @@ def remove_cart(id: int):
     remove_cart_item(cart_item)
     update_cart_modified_time(cart)
     db.session.commit()
+    invalidate_cart_count(current_user.ma_tai_khoan)
 
     return redirect(url_for("cart.show_cart_page"))
 
@@ -183,6 +186,7 @@ def clear_cart():
     clear_cart_items(cart.ma_gio_hang)
     update_cart_modified_time(cart)
     db.session.commit()
+    invalidate_cart_count(current_user.ma_tai_khoan)
 
     return redirect(url_for("cart.show_cart_page"))
 
@@ -194,7 +198,8 @@ def clear_cart():
 def get_cart_count() -> int:
     """Lấy số lượng sản phẩm trong giỏ hàng của người dùng hiện tại.
 
-    Hàm này được dùng cho việc hiển thị badge số lượng giỏ hàng.
+    Hàm này được dùng cho việc hiển thị badge số lượng giỏ hàng; kết quả được
+    lưu đệm nên việc render trang không phát sinh truy vấn giỏ hàng.
 
     Returns:
         Số lượng sản phẩm trong giỏ hàng, 0 nếu chưa đăng nhập.
@@ -202,7 +207,7 @@ def get_cart_count() -> int:
     if not current_user.is_authenticated:
         return 0
 
-    return get_cart_item_count(current_user.ma_tai_khoan)
+    return get_cached_cart_item_count(current_user.ma_tai_khoan)
 
 
 # -----------------------------------------------------------------------------
@@ -223,15 +228,14 @@ def show_checkout_page():
     if cart is None:
         return redirect(url_for("cart.show_cart_page"))
 
-    cart_details = get_cart_items(cart.ma_gio_hang)
-    cart_items = build_checkout_items(cart_details)
-    total_price, total_quantity = calculate_cart_totals(cart_details)
+    cart_view = load_cart_view(cart.ma_gio_hang)
+    cart_items = build_checkout_items(cart_view.items)
 
     return render_template(
         "checkouts.html",
         cart_items=cart_items,
-        total_price=total_price,
-        total_quantity=total_quantity,
+        total_price=cart_view.total_price,
+        total_quantity=cart_view.total_quantity,
         user=current_user,
     )
 
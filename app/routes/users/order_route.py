@@ -10,25 +10,25 @@ Blueprint này xử lý các thao tác đơn hàng phía người dùng bao gồ
 - Xem hóa đơn
 """
 
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from app.constants import OrderStatus
 from app.services.invoice_detail_service import get_invoice_detail_with_product
-from app.services.invoice_service import get_invoices_by_user
+from app.services.inventory_service import InsufficientStockError
 from app.models.product import Product
 from app.services.user_order_service import (
-    build_purchase_history,
+    DEFAULT_PURCHASE_HISTORY_PER_PAGE,
     cancel_user_order,
     create_order_from_cart,
     create_order_from_product,
     get_active_cart,
     get_cart_details,
     get_related_order,
-    get_user_completed_orders,
     get_user_invoice_or_none,
     get_user_order_or_none,
     get_user_orders,
+    load_purchase_history,
 )
 
 user_order_bp = Blueprint(
@@ -129,12 +129,16 @@ def create_order():
             flash("Sản phẩm không đủ số lượng trong kho.", "error")
             return redirect(url_for("main.show_home_page"))
 
-        # Tạo đơn hàng từ sản phẩm
-        order = create_order_from_product(
-            user_id=current_user.ma_tai_khoan,
-            product=product,
-            quantity=quantity
-        )
+        # Tạo đơn hàng từ sản phẩm (tồn kho được kiểm tra lại khi trừ kho)
+        try:
+            order = create_order_from_product(
+                user_id=current_user.ma_tai_khoan,
+                product=product,
+                quantity=quantity
+            )
+        except InsufficientStockError:
+            flash("Sản phẩm không đủ số lượng trong kho.", "error")
+            return redirect(url_for("main.show_home_page"))
     else:
         # Xử lý đơn hàng từ giỏ hàng
         cart = get_active_cart(current_user.ma_tai_khoan)
@@ -145,11 +149,15 @@ def create_order():
         if not cart_details:
             abort(400)
 
-        order = create_order_from_cart(
-            user_id=current_user.ma_tai_khoan,
-            cart=cart,
-            cart_details=cart_details
-        )
+        try:
+            order = create_order_from_cart(
+                user_id=current_user.ma_tai_khoan,
+                cart=cart,
+                cart_details=cart_details
+            )
+        except InsufficientStockError as exc:
+            flash(str(exc), "error")
+            return redirect(url_for("cart.show_cart_page"))
 
     return redirect(url_for("user_order.show_order_detail", order_id=order.ma_don_hang))
 
@@ -195,18 +203,24 @@ def cancel_order(order_id: int):
 def show_purchase_history():
     """Hiển thị lịch sử mua hàng (đơn hàng đã hoàn thành kèm hóa đơn) của người dùng.
 
+    Phân trang theo con trỏ qua tham số ``cursor``.
+
     Returns:
         Template được render với lịch sử mua hàng của người dùng.
     """
-    user_id = current_user.ma_tai_khoan
-
-    completed_orders = get_user_completed_orders(user_id)
-    invoices = get_invoices_by_user(user_id)
-    purchase_history = build_purchase_history(completed_orders, invoices)
+    per_page = current_app.config.get(
+        "PURCHASE_HISTORY_PER_PAGE", DEFAULT_PURCHASE_HISTORY_PER_PAGE
+    )
+    pagination, purchase_history = load_purchase_history(
+        current_user.ma_tai_khoan,
+        cursor=request.args.get("cursor"),
+        per_page=per_page,
+    )
 
     return render_template(
         "user/purchase_history.html",
         purchase_history=purchase_history,
+        pagination=pagination,
         OrderStatus=OrderStatus
     )
 
@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, redirect, request, url_for, jsonif
 from flask_login import current_user, login_required
 
 from app.models.product import Product
-from app.services.user_product_service import get_related_products
+from app.services.user_product_service import render_product_detail_content
 from app.services.favorite_service import (
     is_product_favorited,
     toggle_favorite,
@@ -18,7 +18,8 @@ user_product_bp = Blueprint(
 @user_product_bp.route("/<int:product_id>", methods=["GET"])
 def show_product_detail(product_id):
     product = Product.query.get_or_404(product_id)
-    related_products = get_related_products(product)
+    # Phần chung cho mọi người dùng được lưu đệm; phần riêng tính sau.
+    product_detail_content = render_product_detail_content(product)
 
     # Kiểm tra sản phẩm đã được yêu thích chưa
     is_favorited = False
@@ -28,7 +29,7 @@ def show_product_detail(product_id):
     return render_template(
         "user/product_detail.html",
         product=product,
-        related_products=related_products,
+        product_detail_content=product_detail_content,
         is_favorited=is_favorited,
     )
 
@@ -1,5 +1,11 @@
-from flask import Blueprint, render_template, request
-from app.models.product import Product
+from flask import Blueprint, jsonify, render_template, request, url_for
+from app.services.facet_service import PRICE_RANGES, bitset_to_ids, product_facets
+from app.services.search_service import (
+    RankedPagination,
+    search_product_ids,
+    search_products as search_product_page,
+)
+from app.services.suggestion_service import MAX_SUGGESTIONS, product_suggestions
 
 
 search_bp = Blueprint(
@@ -13,12 +19,7 @@ search_bp = Blueprint(
 def search_products():
     keyword = request.args.get("keyword", "").strip()
     page = request.args.get("page", 1, type=int)
-    query = Product.query.filter(Product.trang_thai == 1)
-
-    if keyword:
-        query = query.filter(Product.ten_san_pham.ilike(f"%{keyword}%"))
-
-    pagination = query.order_by(Product.ngay_tao.desc()).paginate(page=page, per_page=6)
+    pagination = search_product_page(keyword, page=page, per_page=6)
 
     return render_template(
         "user/search_results.html",
@@ -26,3 +27,71 @@ def search_products():
         pagination=pagination,
         keyword=keyword,
     )
+
+
+@search_bp.route("/suggest", methods=["GET"])
+def suggest_products():
+    """Trả về gợi ý tìm kiếm (JSON) cho chuỗi đang gõ."""
+    prefix = request.args.get("q", "").strip()
+    limit = request.args.get("limit", MAX_SUGGESTIONS, type=int)
+
+    suggestions = []
+    for item in product_suggestions.suggest(prefix, max(limit, 1)):
+        if item.kind == "product":
+            url = url_for("user_product.show_product_detail", product_id=item.ref_id)
+        else:
+            url = url_for("search.search_products", keyword=item.label)
+        suggestions.append({"type": item.kind, "label": item.label, "url": url})
+
+    return jsonify({"query": prefix, "suggestions": suggestions})
+
+
+@search_bp.route("/browse", methods=["GET"])
+def browse_products():
+    """Lọc sản phẩm theo thuộc tính, trả về JSON gồm sản phẩm và bộ đếm."""
+    keyword = request.args.get("keyword", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 12, type=int), 1), 48)
+
+    price_keys = {key for key, _, _, _ in PRICE_RANGES}
+    selection = {
+        "gender": set(request.args.getlist("gender", type=int)),
+        "material": set(request.args.getlist("material", type=int)),
+        "size": set(request.args.getlist("size", type=float)),
+        "price": set(request.args.getlist("price")) & price_keys,
+        "collection": set(request.args.getlist("collection", type=int)),
+    }
+
+    ranked_ids = search_product_ids(keyword) if keyword else None
+    result = product_facets.browse(selection, ranked_ids)
+
+    if ranked_ids is None:
+        ids = bitset_to_ids(result["bits"])
+    else:
+        ids = [pid for pid in ranked_ids if result["bits"] >> pid & 1]
+
+    pagination = RankedPagination(page=page, per_page=per_page, error_out=False, ids=ids)
+
+    products = [
+        {
+            "id": product.ma_san_pham,
+            "name": product.ten_san_pham,
+            "price": float(product.gia_xuat),
+            "image": url_for("static", filename=product.anh_chinh),
+            "url": url_for("user_product.show_product_detail", product_id=product.ma_san_pham),
+        }
+        for product in pagination.items
+    ]
+
+    return jsonify(
+        {
+            "products": products,
+            "facets": result["facets"],
+            "pagination": {
+                "page": pagination.page,
+                "per_page": pagination.per_page,
+                "total": pagination.total,
+                "pages": pagination.pages,
+            },
+        }
+    )
@@ -12,6 +12,8 @@ from sqlalchemy.types import String
 
 from app.extensions import db
 from app.models.account import Account
+from app.pagination import paginate_by_key
+from app.services.status_count_service import count_by_status
 
 
 class AccountServiceError(Exception):
@@ -43,25 +45,24 @@ def get_all_accounts() -> List[Account]:
     return Account.query.order_by(Account.ma_tai_khoan.desc()).all()
 
 
-def get_account_page(keyword: str, page: int, per_page: int = 10):
+def get_account_page(
+    keyword: str, page: int, per_page: int = 10, cursor: Optional[str] = None
+):
     """Get paginated accounts with optional search filter.
 
     Args:
         keyword (str): Search keyword for filtering.
         page (int): Current page number.
         per_page (int, optional): Items per page. Defaults to 10.
+        cursor (str, optional): Keyset pagination cursor; when given, page
+            is ignored. Defaults to None.
 
     Returns:
         tuple: (pagination, accounts, total_accounts)
     """
     query = build_account_query(keyword)
 
-    pagination = db.paginate(
-        query.order_by(Account.ma_tai_khoan.desc()),
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
+    pagination = paginate_by_key(query, Account.ma_tai_khoan, page, per_page, cursor)
 
     total_accounts = Account.query.count()
 
@@ -307,10 +308,12 @@ def get_account_stats() -> dict:
     Returns:
         dict: Statistics including total accounts, active accounts, admin count.
     """
-    total = Account.query.count()
-    active = Account.query.filter_by(trang_thai=1).count()
-    admins = Account.query.filter_by(role=1).count()
-    users = Account.query.filter_by(role=0).count()
+    status_counts = count_by_status(Account)
+    role_counts = count_by_status(Account, column="role")
+    total = status_counts.total
+    active = status_counts.get(1)
+    admins = role_counts.get(1)
+    users = role_counts.get(0)
 
     return {
         "total": total,
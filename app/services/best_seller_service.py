@@ -0,0 +1,275 @@
+"""
+Module service xếp hạng sản phẩm bán chạy theo tốc độ bán.
+
+Điểm của một sản phẩm là tổng số lượng đã bán (chi tiết của các đơn hàng đã
+hoàn thành) trong cửa sổ dài nhất (90 ngày) gần đây, mỗi ngày được nhân
+hệ số suy giảm theo hàm mũ với chu kỳ bán rã BEST_SELLER_HALF_LIFE_DAYS:
+hàng bán hôm qua nặng hơn hàng bán tháng trước. Ngoài điểm, số lượng bán
+trong các cửa sổ 7/30/90 ngày cũng được giữ để xếp hạng theo từng cửa sổ.
+
+Hệ số suy giảm được tính tương đối với ngày xây chỉ mục (2^((ngày - mốc) /
+bán rã)), nên thời gian trôi qua không làm đổi thứ tự và đơn hàng vừa hoàn
+thành chỉ cần cộng thêm vào điểm của sản phẩm. Danh sách xếp hạng được sắp
+sẵn; đọc top k chỉ duyệt đầu danh sách, không tổng hợp chi tiết đơn hàng mỗi
+request.
+
+Chỉ mục nằm trong bộ nhớ của từng tiến trình, được xây ở lần gọi đầu tiên và
+xây lại định kỳ ở luồng nền (BEST_SELLER_REBUILD_INTERVAL) để loại phần bán ra
+đã trượt khỏi cửa sổ và nhận đơn hàng hoàn thành ở worker khác.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.cache import PeriodicRefresh, config_value
+from app.constants import OrderStatus
+from app.extensions import db
+from app.models.order import Order
+from app.models.order_detail import OrderDetail
+from app.models.product import Product
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_REBUILD_INTERVAL = 900
+DEFAULT_HALF_LIFE_DAYS = 14
+
+# Các cửa sổ (số ngày) được theo dõi; cửa sổ dài nhất giới hạn dữ liệu nạp.
+WINDOWS = (7, 30, 90)
+
+
+# -----------------------------------------------------------------------------
+# Chỉ mục
+# -----------------------------------------------------------------------------
+
+class SalesRanking:
+    """Điểm bán hàng và danh sách xếp hạng tại một thời điểm.
+
+    Attributes:
+        today: Ngày xây chỉ mục, mốc của các cửa sổ và hệ số suy giảm.
+        half_life: Chu kỳ bán rã (ngày).
+        scores: Mã sản phẩm -> điểm đã suy giảm.
+        sold: Mã sản phẩm -> số lượng bán theo từng cửa sổ (cùng thứ tự WINDOWS).
+        products: Mã sản phẩm đang bán -> giới tính.
+    """
+
+    def __init__(self, today: date, half_life: float) -> None:
+        self.today = today
+        self.half_life = half_life
+        self.scores: Dict[int, float] = {}
+        self.sold: Dict[int, List[int]] = {}
+        self.products: Dict[int, int] = {}
+        self._ranked: Dict[Optional[int], List[int]] = {}
+
+    def add(self, product_id: int, day: date, quantity: int) -> bool:
+        """Cộng số lượng bán của một sản phẩm trong một ngày.
+
+        Args:
+            product_id: Mã sản phẩm.
+            day: Ngày bán (ngày tạo đơn hàng).
+            quantity: Số lượng, âm để trừ.
+
+        Returns:
+            bool: False nếu ngày nằm ngoài cửa sổ dài nhất (bỏ qua).
+        """
+        age = (self.today - day).days
+        if age >= WINDOWS[-1] or not quantity:
+            return False
+
+        self.scores[product_id] = (
+            self.scores.get(product_id, 0.0)
+            + quantity * 2 ** (-age / self.half_life)
+        )
+        sold = self.sold.setdefault(product_id, [0] * len(WINDOWS))
+        for index, window in enumerate(WINDOWS):
+            if age < window:
+                sold[index] += quantity
+        return True
+
+    def rerank(self) -> None:
+        """Sắp lại danh sách xếp hạng theo điểm và theo từng cửa sổ."""
+        ranked = {
+            None: sorted(
+                (pid for pid, score in self.scores.items() if score > 0),
+                key=lambda pid: (-self.scores[pid], pid),
+            )
+        }
+        for index, window in enumerate(WINDOWS):
+            ranked[window] = sorted(
+                (pid for pid, sold in self.sold.items() if sold[index] > 0),
+                key=lambda pid: (-self.sold[pid][index], pid),
+            )
+        self._ranked = ranked
+
+    def top(
+        self,
+        limit: int,
+        window: Optional[int] = None,
+        gender: Optional[int] = None,
+        exclude: Iterable[int] = (),
+    ) -> List[int]:
+        """Lấy mã các sản phẩm đang bán xếp hạng cao nhất.
+
+        Args:
+            limit: Số sản phẩm tối đa.
+            window: Xếp theo số lượng bán trong cửa sổ này (một giá trị của
+                WINDOWS); None để xếp theo điểm suy giảm.
+            gender: Chỉ lấy sản phẩm có giới tính này.
+            exclude: Mã các sản phẩm bỏ qua.
+
+        Returns:
+            list: Mã sản phẩm, cao nhất trước.
+        """
+        exclude = set(exclude)
+        result = []
+        for product_id in self._ranked.get(window, ()):
+            if len(result) >= limit:
+                break
+            if product_id in exclude or product_id not in self.products:
+                continue
+            if gender is not None and self.products[product_id] != gender:
+                continue
+            result.append(product_id)
+        return result
+
+
+def _load_daily_sales(since: date):
+    """Số lượng bán theo (sản phẩm, ngày) của các đơn hàng đã hoàn thành."""
+    day = func.date(Order.ngay_tao)
+    query = (
+        db.session.query(OrderDetail.ma_san_pham, day, func.sum(OrderDetail.so_luong))
+        .join(Order, Order.ma_don_hang == OrderDetail.ma_don_hang)
+        .filter(
+            Order.trang_thai == OrderStatus.COMPLETED,
+            Order.ngay_tao >= datetime.combine(since, datetime.min.time()),
+        )
+    )
+    for product_id, value, quantity in query.group_by(OrderDetail.ma_san_pham, day):
+        # func.date trả về date (MySQL) hoặc chuỗi (SQLite).
+        yield product_id, date.fromisoformat(str(value)[:10]), int(quantity or 0)
+
+
+def _load_active_products(product_ids: Optional[List[int]] = None) -> Dict[int, int]:
+    query = db.session.query(Product.ma_san_pham, Product.gioi_tinh).filter(
+        Product.trang_thai == 1
+    )
+    if product_ids is not None:
+        query = query.filter(Product.ma_san_pham.in_(product_ids))
+    return dict(query.all())
+
+
+# -----------------------------------------------------------------------------
+# Bộ máy xếp hạng
+# -----------------------------------------------------------------------------
+
+def _today() -> date:
+    # Ngày tạo đơn hàng được lưu theo giờ UTC.
+    return datetime.utcnow().date()
+
+
+class BestSellerEngine(PeriodicRefresh):
+    """Quản lý bảng xếp hạng bán chạy của tiến trình hiện tại.
+
+    Bảng được xây ở lần gọi đầu tiên. Sang ngày mới hoặc sau mỗi chu kỳ
+    (``BEST_SELLER_REBUILD_INTERVAL``) bảng được xây lại ở luồng nền, trong
+    lúc đó request vẫn đọc bảng cũ; đơn hàng hoàn thành và sản phẩm thay đổi
+    trong tiến trình được áp dụng ngay.
+    """
+
+    interval_key = "BEST_SELLER_REBUILD_INTERVAL"
+    default_interval = DEFAULT_REBUILD_INTERVAL
+    thread_name = "best-seller-rebuild"
+
+    def _is_stale(self) -> bool:
+        # Sang ngày mới thì các cửa sổ dịch đi một ngày: xây lại.
+        return super()._is_stale() or self._data.today != _today()
+
+    def _load(self) -> SalesRanking:
+        today = _today()
+        ranking = SalesRanking(
+            today, config_value("BEST_SELLER_HALF_LIFE_DAYS", DEFAULT_HALF_LIFE_DAYS)
+        )
+        for product_id, day, quantity in _load_daily_sales(
+            today - timedelta(days=WINDOWS[-1] - 1)
+        ):
+            ranking.add(product_id, day, quantity)
+        ranking.products = _load_active_products()
+        ranking.rerank()
+        return ranking
+
+    def top(
+        self,
+        limit: int,
+        window: Optional[int] = None,
+        gender: Optional[int] = None,
+        exclude: Iterable[int] = (),
+    ) -> List[int]:
+        """Lấy mã các sản phẩm bán chạy nhất. Xem SalesRanking.top()."""
+        self.ensure_ready()
+        with self._lock:
+            return self._data.top(limit, window, gender, exclude)
+
+    def on_order_status_changed(self, order: Order, old_status: Optional[int]) -> bool:
+        """Cập nhật điểm sau khi commit thay đổi trạng thái đơn hàng.
+
+        Đơn chuyển sang hoàn thành được cộng vào điểm, đơn rời trạng thái hoàn
+        thành bị trừ. Không làm gì nếu bảng chưa được xây.
+
+        Args:
+            order: Đơn hàng vừa đổi trạng thái.
+            old_status: Trạng thái trước khi đổi.
+
+        Returns:
+            bool: True nếu bảng xếp hạng thay đổi.
+        """
+        was_completed = old_status == OrderStatus.COMPLETED
+        is_completed = order.trang_thai == OrderStatus.COMPLETED
+        if was_completed == is_completed or order.ngay_tao is None:
+            return False
+        self._touch()
+        if self._data is None:
+            return False
+
+        sign = 1 if is_completed else -1
+        day = order.ngay_tao.date()
+        lines: List[Tuple[int, int]] = [
+            (detail.ma_san_pham, detail.so_luong or 0)
+            for detail in order.chi_tiet_don_hang
+        ]
+        with self._lock:
+            changed = False
+            for product_id, quantity in lines:
+                changed = self._data.add(product_id, day, sign * quantity) or changed
+            if changed:
+                self._data.rerank()
+        return changed
+
+    def refresh_products(self, product_ids: Iterable[int]) -> None:
+        """Cập nhật trạng thái đang bán của các sản phẩm vừa thay đổi.
+
+        Không làm gì nếu bảng chưa được xây.
+
+        Args:
+            product_ids: Mã các sản phẩm cần cập nhật.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        self._touch()
+        if self._data is None:
+            return
+
+        active = _load_active_products(product_ids)
+        with self._lock:
+            for product_id in product_ids:
+                if product_id in active:
+                    self._data.products[product_id] = active[product_id]
+                else:
+                    self._data.products.pop(product_id, None)
+
+
+best_sellers = BestSellerEngine()
@@ -1,5 +1,6 @@
 from app.extensions import db
 from app.models.category import Category
+from app.services.status_count_service import count_by_status
 from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
@@ -57,9 +58,10 @@ def get_category_page(keyword: str, status: str, page: int, per_page: int = 3):
         error_out=False,
     )
 
-    total_categories = Category.query.filter(Category.trang_thai != 3).count()
-    con_hang = Category.query.filter_by(trang_thai=1).count()
-    het_hang = Category.query.filter_by(trang_thai=2).count()
+    status_counts = count_by_status(Category)
+    total_categories = status_counts.total_excluding(3)
+    con_hang = status_counts.get(1)
+    het_hang = status_counts.get(2)
 
     danh_muc_noi_bat = Category.query.filter(Category.trang_thai != 3).limit(3).all()
     ten_dm_noi_bat = ", ".join(dm.ten_danh_muc for dm in danh_muc_noi_bat)
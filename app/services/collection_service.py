@@ -1,5 +1,6 @@
 from app.extensions import db
 from app.models.collection import Collection
+from app.services.status_count_service import count_by_status
 from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
@@ -58,9 +59,10 @@ def get_collection_page(keyword: str, status: str, page: int, per_page: int = 3)
         error_out=False,
     )
 
-    total_collections = Collection.query.filter(Collection.trang_thai != 3).count()
-    con_hang = Collection.query.filter_by(trang_thai=1).count()
-    het_hang = Collection.query.filter_by(trang_thai=2).count()
+    status_counts = count_by_status(Collection)
+    total_collections = status_counts.total_excluding(3)
+    con_hang = status_counts.get(1)
+    het_hang = status_counts.get(2)
 
     bo_suu_tap_noi_bat = (
         Collection.query.filter(Collection.trang_thai != 3).limit(3).all()
@@ -6,6 +6,7 @@ Module này cung cấp logic nghiệp vụ cho các thao tác quản lý liên h
 
 from app.extensions import db
 from app.models.contact import Contact
+from app.pagination import paginate_by_key
 from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
@@ -34,24 +35,22 @@ def build_contact_query(keyword: str):
     return query
 
 
-def get_contact_page(keyword: str, page: int, per_page: int = 10):
+def get_contact_page(keyword: str, page: int, per_page: int = 10, cursor: str = None):
     """Lấy dữ liệu liên hệ theo trang kèm thống kê.
 
     Args:
         keyword (str): Từ khoá tìm kiếm.
         page (int): Trang hiện tại.
         per_page (int, optional): Số bản ghi mỗi trang. Defaults to 10.
+        cursor (str, optional): Con trỏ phân trang theo khoá; khi có thì bỏ
+            qua page. Defaults to None.
 
     Returns:
         tuple: (pagination, contacts, total_contacts)
     """
     query = build_contact_query(keyword)
 
-    pagination = query.order_by(Contact.ngay_tao.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
+    pagination = paginate_by_key(query, Contact.ma_lien_he, page, per_page, cursor)
 
     total_contacts = Contact.query.count()
 
@@ -0,0 +1,302 @@
+"""
+Module service bộ nhớ đệm thống kê dashboard.
+
+Module này giữ các chỉ số của trang tổng quan quản trị (doanh thu, đơn hàng,
+sản phẩm, ...) trong bộ nhớ đệm có TTL. Các thao tác ghi (tạo đơn hàng, đổi
+trạng thái đơn hàng, tạo hóa đơn, cập nhật sản phẩm) cập nhật trực tiếp các
+bộ đếm thay vì tính lại toàn bộ; phần nào không thể cập nhật dần sẽ được đánh
+dấu cần tính lại và chỉ truy vấn lại phần đó ở lần đọc tiếp theo.
+"""
+
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.cache import TTLCache, config_value
+from app.constants import OrderStatus
+from app.services.dashboard_service import (
+    build_recent_order_item,
+    build_revenue_summary,
+    get_brand_stats,
+    get_category_stats,
+    get_customer_stats,
+    get_low_stock_products,
+    get_order_stats,
+    get_out_of_stock_products,
+    get_product_stats,
+    get_recent_orders,
+    get_revenue_totals,
+)
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_TTL = 300
+RECENT_ORDERS_LIMIT = 5
+LOW_STOCK_THRESHOLD = 10
+
+_CACHE_KEY = "dashboard"
+
+# Các trạng thái được tính là "đang chờ" trên dashboard.
+_PENDING_STATUSES = (
+    OrderStatus.PENDING,
+    OrderStatus.PROCESSING,
+    OrderStatus.SHIPPING,
+)
+
+# Các phần dữ liệu của dashboard và hàm tính lại tương ứng.
+SECTION_LOADERS: Dict[str, Callable[[], Any]] = {
+    "revenue": get_revenue_totals,
+    "orders": get_order_stats,
+    "customers": get_customer_stats,
+    "products": get_product_stats,
+    "categories": get_category_stats,
+    "brands": get_brand_stats,
+    "recent_orders": get_recent_orders,
+    "low_stock_products": get_low_stock_products,
+    "out_of_stock_products": get_out_of_stock_products,
+}
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def _order_bucket(status: Optional[int]) -> Optional[str]:
+    """Xác định bộ đếm dashboard ứng với trạng thái đơn hàng."""
+    if status in _PENDING_STATUSES:
+        return "pending"
+    if status == OrderStatus.COMPLETED:
+        return "completed"
+    if status == OrderStatus.CANCELLED:
+        return "cancelled"
+    return None
+
+
+def _product_flags(status: Optional[int], quantity: Optional[int]) -> Dict[str, bool]:
+    """Xác định sản phẩm thuộc những bộ đếm/danh sách nào của dashboard."""
+    quantity = quantity or 0
+    return {
+        "active": status == 1,
+        "out_of_stock": quantity == 0,
+        "low_stock": status == 1 and 0 < quantity <= LOW_STOCK_THRESHOLD,
+        "out_of_stock_list": status in (1, 2) and quantity == 0,
+    }
+
+
+def _replace_recent_order(state: Dict[str, Any], item: Dict[str, Any]) -> None:
+    """Thay thế đơn hàng trong danh sách gần đây nếu nó đang hiển thị."""
+    recent_orders = state.get("recent_orders")
+    if recent_orders is None:
+        return
+    state["recent_orders"] = [
+        item if existing["id"] == item["id"] else existing
+        for existing in recent_orders
+    ]
+
+
+# -----------------------------------------------------------------------------
+# Bộ nhớ đệm thống kê
+# -----------------------------------------------------------------------------
+
+class DashboardMetricsStore:
+    """Bộ nhớ đệm các chỉ số dashboard, cập nhật dần từ các thao tác ghi.
+
+    Trạng thái là một dict gồm ngày tính ("day") và các phần dữ liệu trong
+    SECTION_LOADERS. Phần có giá trị None được tính lại ở lần đọc kế tiếp.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        self._cache = TTLCache(ttl=ttl)
+
+    def _ttl(self) -> float:
+        return config_value("DASHBOARD_CACHE_TTL", self._cache.ttl)
+
+    def _mutate(self, func: Callable[[Dict[str, Any]], None]) -> None:
+        """Áp dụng thay đổi lên trạng thái đang cache (nếu còn hạn)."""
+
+        def apply(state: Dict[str, Any]) -> Dict[str, Any]:
+            if state["day"] == date.today():
+                func(state)
+            return state
+
+        self._cache.update(_CACHE_KEY, apply)
+
+    # -------------------------------------------------------------------------
+    # Đọc dữ liệu
+    # -------------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lấy dữ liệu dashboard, chỉ truy vấn các phần còn thiếu.
+
+        Returns:
+            Dict có cùng cấu trúc với compute_dashboard_data().
+        """
+        today = date.today()
+        state = self._cache.get(_CACHE_KEY)
+
+        if state is None or state["day"] != today:
+            state = {"day": today, **{name: None for name in SECTION_LOADERS}}
+            state.update({name: loader() for name, loader in SECTION_LOADERS.items()})
+            self._cache.set(_CACHE_KEY, state, ttl=self._ttl())
+        else:
+            missing = {
+                name: loader()
+                for name, loader in SECTION_LOADERS.items()
+                if state.get(name) is None
+            }
+            if missing:
+                self._cache.update(_CACHE_KEY, lambda current: {**current, **missing})
+                state = {**state, **missing}
+
+        return {
+            "revenue": build_revenue_summary(*state["revenue"]),
+            "orders": dict(state["orders"]),
+            "customers": dict(state["customers"]),
+            "products": dict(state["products"]),
+            "categories": dict(state["categories"]),
+            "brands": dict(state["brands"]),
+            "recent_orders": list(state["recent_orders"]),
+            "low_stock_products": list(state["low_stock_products"]),
+            "out_of_stock_products": list(state["out_of_stock_products"]),
+        }
+
+    def invalidate(self, section: Optional[str] = None) -> None:
+        """Đánh dấu một phần (hoặc toàn bộ) dữ liệu cần tính lại.
+
+        Args:
+            section: Tên phần dữ liệu trong SECTION_LOADERS, None để xoá toàn bộ.
+        """
+        if section is None:
+            self._cache.delete(_CACHE_KEY)
+            return
+
+        self._mutate(lambda state: state.__setitem__(section, None))
+
+    # -------------------------------------------------------------------------
+    # Cập nhật từ thao tác ghi
+    # -------------------------------------------------------------------------
+
+    def on_order_created(self, order) -> None:
+        """Cập nhật bộ đếm khi có đơn hàng mới.
+
+        Args:
+            order: Đơn hàng vừa được tạo (đã commit).
+        """
+        item = build_recent_order_item(order)
+        bucket = _order_bucket(order.trang_thai)
+
+        def apply(state: Dict[str, Any]) -> None:
+            if state["orders"] is not None:
+                orders = dict(state["orders"])
+                orders["total"] += 1
+                orders["new_today"] += 1
+                if bucket:
+                    orders[bucket] += 1
+                state["orders"] = orders
+
+            if state["recent_orders"] is not None:
+                state["recent_orders"] = [item, *state["recent_orders"]][
+                    :RECENT_ORDERS_LIMIT
+                ]
+
+        self._mutate(apply)
+
+    def on_order_status_changed(self, order, old_status: Optional[int]) -> None:
+        """Chuyển đơn hàng giữa các bộ đếm khi trạng thái thay đổi.
+
+        Args:
+            order: Đơn hàng đã cập nhật (đã commit).
+            old_status: Trạng thái trước khi cập nhật.
+        """
+        item = build_recent_order_item(order)
+        old_bucket = _order_bucket(old_status)
+        new_bucket = _order_bucket(order.trang_thai)
+
+        def apply(state: Dict[str, Any]) -> None:
+            if old_bucket != new_bucket and state["orders"] is not None:
+                orders = dict(state["orders"])
+                if old_bucket:
+                    orders[old_bucket] -= 1
+                if new_bucket:
+                    orders[new_bucket] += 1
+                state["orders"] = orders
+            _replace_recent_order(state, item)
+
+        self._mutate(apply)
+
+    def on_order_updated(self, order) -> None:
+        """Làm mới đơn hàng trong danh sách gần đây khi thông tin thay đổi.
+
+        Args:
+            order: Đơn hàng đã cập nhật (đã commit).
+        """
+        item = build_recent_order_item(order)
+        self._mutate(lambda state: _replace_recent_order(state, item))
+
+    def on_invoice_created(self, invoice) -> None:
+        """Cộng doanh thu khi có hóa đơn mới.
+
+        Args:
+            invoice: Hóa đơn vừa được tạo (đã commit).
+        """
+        if invoice.trang_thai == 3 or invoice.ngay_tao is None:
+            return
+
+        amount = float(invoice.tong_tien_tam_tinh or 0)
+        created_on = invoice.ngay_tao.date()
+
+        def apply(state: Dict[str, Any]) -> None:
+            if state["revenue"] is None or created_on != state["day"]:
+                # Hóa đơn ngoài ngày hôm nay: tính lại doanh thu cho chắc chắn.
+                state["revenue"] = None
+                return
+            today_revenue, yesterday_revenue = state["revenue"]
+            state["revenue"] = (today_revenue + amount, yesterday_revenue)
+
+        self._mutate(apply)
+
+    def on_invoice_changed(self) -> None:
+        """Đánh dấu doanh thu cần tính lại khi hóa đơn bị sửa hoặc xoá."""
+        self.invalidate("revenue")
+
+    def on_product_changed(
+        self,
+        product,
+        old_state: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    ) -> None:
+        """Cập nhật thống kê sản phẩm khi sản phẩm được tạo hoặc cập nhật.
+
+        Args:
+            product: Sản phẩm sau khi thay đổi (đã commit).
+            old_state: Bộ (trang_thai, so_luong) trước khi thay đổi, None nếu
+                sản phẩm mới được tạo.
+        """
+        new_flags = _product_flags(product.trang_thai, product.so_luong)
+        old_flags = _product_flags(*old_state) if old_state else None
+
+        def apply(state: Dict[str, Any]) -> None:
+            # Phần đã bị invalidate (None) để snapshot() tính lại.
+            if state["products"] is not None:
+                products = dict(state["products"])
+                if old_flags is None:
+                    products["total"] += 1
+                for name in ("active", "out_of_stock", "low_stock"):
+                    products[name] += int(new_flags[name]) - int(
+                        old_flags[name] if old_flags else False
+                    )
+                state["products"] = products
+
+            # Danh sách sắp hết/hết hàng được tính lại nếu sản phẩm liên quan.
+            if new_flags["low_stock"] or (old_flags and old_flags["low_stock"]):
+                state["low_stock_products"] = None
+            if new_flags["out_of_stock_list"] or (
+                old_flags and old_flags["out_of_stock_list"]
+            ):
+                state["out_of_stock_products"] = None
+
+        self._mutate(apply)
+
+
+dashboard_metrics = DashboardMetricsStore()
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, date
-from typing import Dict, Any
+from typing import Any, Dict, Tuple
 
 from sqlalchemy import func
 
@@ -10,10 +10,18 @@ from app.models.invoice import Invoice
 from app.models.account import Account
 from app.models.category import Category
 from app.models.brand import Brand
+from app.models.stock_level import StockLevel
+from app.services.inventory_ledger_service import PRODUCT_LEVEL
+from app.services.status_count_service import count_by_status
 
 
 def get_today_revenue() -> Dict[str, Any]:
     """Tính doanh thu hôm nay và so sánh với hôm qua."""
+    return build_revenue_summary(*get_revenue_totals())
+
+
+def get_revenue_totals() -> Tuple[float, float]:
+    """Tính tổng doanh thu (từ hóa đơn) của hôm nay và hôm qua."""
     today = date.today()
     yesterday = today - timedelta(days=1)
 
@@ -46,6 +54,11 @@ def get_today_revenue() -> Dict[str, Any]:
         or 0
     )
 
+    return float(today_revenue), float(yesterday_revenue)
+
+
+def build_revenue_summary(today_revenue, yesterday_revenue) -> Dict[str, Any]:
+    """Định dạng doanh thu hôm nay kèm mức tăng trưởng so với hôm qua."""
     growth = (
         yesterday_revenue - today_revenue if yesterday_revenue > 0 else today_revenue
     )
@@ -61,12 +74,13 @@ def get_today_revenue() -> Dict[str, Any]:
 
 def get_order_stats() -> Dict[str, Any]:
     """Thống kê đơn hàng."""
-    total_orders = Order.query.count()
-    pending_orders = Order.query.filter(
-        Order.trang_thai.in_([0, 1, 2])
-    ).count()  # Chờ xác nhận, đang xử lý, đang giao
-    completed_orders = Order.query.filter_by(trang_thai=3).count()
-    cancelled_orders = Order.query.filter_by(trang_thai=4).count()
+    status_counts = count_by_status(Order)
+    total_orders = status_counts.total
+    pending_orders = status_counts.total_of(
+        [0, 1, 2]
+    )  # Chờ xác nhận, đang xử lý, đang giao
+    completed_orders = status_counts.get(3)
+    cancelled_orders = status_counts.get(4)
 
     # Đơn hàng mới hôm nay
     today = date.today()
@@ -132,8 +146,9 @@ def get_product_stats() -> Dict[str, Any]:
 
 def get_category_stats() -> Dict[str, Any]:
     """Thống kê danh mục."""
-    total_categories = Category.query.count()
-    active_categories = Category.query.filter_by(trang_thai=1).count()
+    status_counts = count_by_status(Category)
+    total_categories = status_counts.total
+    active_categories = status_counts.get(1)
 
     return {"total": total_categories, "active": active_categories}
 
@@ -154,47 +169,61 @@ def get_recent_orders(limit: int = 5) -> list:
         .all()
     )
 
-    result = []
-    for order in orders:
-        status_info = get_order_status_info(order.trang_thai)
-        result.append(
-            {
-                "id": order.ma_don_hang,
-                "customer_name": getattr(order, "account", None).ho_ten
-                if getattr(order, "account", None)
-                else "N/A",
-                "total": float(order.tong_tien_tam_tinh or 0),
-                "formatted_total": f"₫{order.tong_tien_tam_tinh or 0:,.0f}",
-                "status": status_info["label"],
-                "status_class": status_info["class"],
-                "created_at": order.ngay_tao.strftime("%d/%m/%Y %H:%M")
-                if order.ngay_tao
-                else "",
-            }
-        )
+    return [build_recent_order_item(order) for order in orders]
+
+
+def build_recent_order_item(order: Order) -> Dict[str, Any]:
+    """Định dạng một đơn hàng cho danh sách đơn hàng gần đây."""
+    status_info = get_order_status_info(order.trang_thai)
+    return {
+        "id": order.ma_don_hang,
+        "customer_name": getattr(order, "account", None).ho_ten
+        if getattr(order, "account", None)
+        else "N/A",
+        "total": float(order.tong_tien_tam_tinh or 0),
+        "formatted_total": f"₫{order.tong_tien_tam_tinh or 0:,.0f}",
+        "status": status_info["label"],
+        "status_class": status_info["class"],
+        "created_at": order.ngay_tao.strftime("%d/%m/%Y %H:%M")
+        if order.ngay_tao
+        else "",
+    }
 
-    return result
+
+def _stock_level_query(*criteria):
+    """Truy vấn tồn kho hiện tại (TonKhoSanPham) kèm tên sản phẩm.
+
+    Điều kiện số lượng được lọc trên chỉ mục (ma_kich_thuoc_san_pham,
+    so_luong) của bảng tổng hợp; SanPham chỉ được tra theo khoá chính.
+    """
+    return (
+        db.session.query(
+            StockLevel.so_luong, Product.ma_san_pham, Product.ten_san_pham
+        )
+        .join(Product, Product.ma_san_pham == StockLevel.ma_san_pham)
+        .filter(StockLevel.ma_kich_thuoc_san_pham == PRODUCT_LEVEL, *criteria)
+    )
 
 
 def get_low_stock_products(limit: int = 5) -> list:
     """Lấy danh sách sản phẩm sắp hết hàng."""
-    products = (
-        Product.query.filter(
-            Product.trang_thai == 1, Product.so_luong <= 10, Product.so_luong > 0
+    rows = (
+        _stock_level_query(
+            StockLevel.so_luong > 0, StockLevel.so_luong <= 10, Product.trang_thai == 1
         )
-        .order_by(Product.so_luong.asc())
+        .order_by(StockLevel.so_luong.asc(), StockLevel.ma_san_pham)
         .limit(limit)
         .all()
     )
 
     result = []
-    for product in products:
+    for stock, product_id, name in rows:
         result.append(
             {
-                "id": product.ma_san_pham,
-                "name": product.ten_san_pham,
-                "stock": product.so_luong,
-                "status": "warning" if product.so_luong <= 5 else "normal",
+                "id": product_id,
+                "name": name,
+                "stock": stock,
+                "status": "warning" if stock <= 5 else "normal",
             }
         )
 
@@ -202,20 +231,20 @@ def get_low_stock_products(limit: int = 5) -> list:
 
 
 def get_out_of_stock_products(limit: int = 5) -> list:
-    """Lấy danh sách sản phẩm hết hàng."""
-    products = (
-        Product.query.filter(Product.trang_thai == 1, Product.so_luong == 0)
+    """Lấy danh sách sản phẩm hết hàng (đang bán hoặc đã chuyển sang hết hàng)."""
+    rows = (
+        _stock_level_query(StockLevel.so_luong == 0, Product.trang_thai.in_((1, 2)))
         .order_by(Product.ten_san_pham)
         .limit(limit)
         .all()
     )
 
     result = []
-    for product in products:
+    for _, product_id, name in rows:
         result.append(
             {
-                "id": product.ma_san_pham,
-                "name": product.ten_san_pham,
+                "id": product_id,
+                "name": name,
                 "stock": 0,
                 "status": "danger",
             }
@@ -239,7 +268,18 @@ def get_order_status_info(status: int) -> Dict[str, str]:
 
 
 def get_dashboard_data() -> Dict[str, Any]:
-    """Tổng hợp tất cả dữ liệu cho dashboard."""
+    """Lấy dữ liệu dashboard từ bộ nhớ đệm thống kê.
+
+    Dữ liệu được tính đầy đủ một lần (xem compute_dashboard_data) rồi cập nhật
+    dần từ các thao tác ghi; chỉ tính lại khi cache hết hạn hoặc sang ngày mới.
+    """
+    from app.services.dashboard_metrics_service import dashboard_metrics
+
+    return dashboard_metrics.snapshot()
+
+
+def compute_dashboard_data() -> Dict[str, Any]:
+    """Tổng hợp tất cả dữ liệu cho dashboard trực tiếp từ cơ sở dữ liệu."""
     return {
         "revenue": get_today_revenue(),
         "orders": get_order_stats(),
@@ -0,0 +1,292 @@
+"""
+Module service xuất dữ liệu hàng loạt (CSV / NDJSON).
+
+Các hàm trong module này nhận truy vấn đã lọc từ các hàm build_*_query có
+sẵn, đọc dữ liệu theo lô bằng server-side cursor (``yield_per``) và sinh ra
+từng đoạn văn bản để route trả về bằng ``Response`` dạng stream. Không có
+thời điểm nào toàn bộ kết quả nằm trong bộ nhớ.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import groupby
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from app.models.account import Account
+from app.models.invoice import Invoice
+from app.models.invoice_detail import InvoiceDetail
+from app.models.order import Order
+
+
+# Số dòng đọc mỗi lần từ server-side cursor.
+EXPORT_BATCH_SIZE = 1000
+
+# Số dòng gom lại trước khi gửi một đoạn cho client.
+ROWS_PER_CHUNK = 500
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+ORDER_COLUMNS = (
+    "ma_don_hang",
+    "ma_tai_khoan",
+    "ho_ten",
+    "email",
+    "ngay_tao",
+    "ngay_dat_hang",
+    "trang_thai",
+    "tong_tien_tam_tinh",
+)
+
+INVOICE_COLUMNS = (
+    "ma_hoa_don",
+    "ma_don_hang",
+    "ma_tai_khoan",
+    "ho_ten",
+    "ngay_tao",
+    "ngay_dat_hang",
+    "trang_thai",
+    "tong_tien_tam_tinh",
+)
+
+INVOICE_LINE_COLUMNS = (
+    "ma_chi_tiet_hoa_don",
+    "ma_san_pham",
+    "so_luong",
+    "don_gia",
+    "thanh_tien",
+)
+
+ACCOUNT_COLUMNS = (
+    "ma_tai_khoan",
+    "ten_tai_khoan",
+    "ho_ten",
+    "email",
+    "so_dien_thoai",
+    "dia_chi",
+    "gioi_tinh",
+    "ngay_sinh",
+    "trang_thai",
+    "role",
+)
+
+
+# -----------------------------------------------------------------------------
+# Định dạng giá trị
+# -----------------------------------------------------------------------------
+
+def _to_plain(value):
+    """Chuyển giá trị từ cơ sở dữ liệu sang kiểu ghi được ra CSV/JSON."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _plain_row(row: Sequence) -> list:
+    return [_to_plain(value) for value in row]
+
+
+def iter_csv(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Sinh nội dung CSV theo từng đoạn.
+
+    Đoạn đầu tiên có BOM UTF-8 để Excel hiển thị đúng tiếng Việt.
+
+    Args:
+        columns: Tên các cột (dòng tiêu đề).
+        rows: Các dòng dữ liệu.
+
+    Yields:
+        str: Một đoạn CSV gồm tối đa ROWS_PER_CHUNK dòng.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(_plain_row(row))
+        if index % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    """Sinh nội dung NDJSON (mỗi dòng một object JSON) theo từng đoạn.
+
+    Args:
+        records: Các bản ghi dạng dict.
+
+    Yields:
+        str: Một đoạn gồm tối đa ROWS_PER_CHUNK dòng.
+    """
+    lines: List[str] = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False, default=_to_plain))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_filename(basename: str, fmt: str) -> str:
+    """Tạo tên file xuất kèm thời điểm xuất.
+
+    Args:
+        basename (str): Tên gốc (ví dụ "don_hang").
+        fmt (str): Định dạng file.
+
+    Returns:
+        str: Tên file, ví dụ "don_hang_20250101_120000.csv".
+    """
+    return f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+
+def _stream(fmt: str, columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    if fmt == "ndjson":
+        return iter_ndjson(
+            dict(zip(columns, _plain_row(row))) for row in rows
+        )
+    return iter_csv(columns, rows)
+
+
+# -----------------------------------------------------------------------------
+# Đơn hàng
+# -----------------------------------------------------------------------------
+
+def stream_orders(query, fmt: str = "csv") -> Iterator[str]:
+    """Xuất đơn hàng theo truy vấn đã lọc.
+
+    Args:
+        query: Truy vấn từ build_order_query() (đã join Account).
+        fmt (str, optional): "csv" hoặc "ndjson". Defaults to "csv".
+
+    Returns:
+        Iterator[str]: Các đoạn nội dung file.
+    """
+    rows = (
+        query.with_entities(
+            Order.ma_don_hang,
+            Order.ma_tai_khoan,
+            Account.ho_ten,
+            Account.email,
+            Order.ngay_tao,
+            Order.ngay_dat_hang,
+            Order.trang_thai,
+            Order.tong_tien_tam_tinh,
+        )
+        .order_by(Order.ma_don_hang)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+    return _stream(fmt, ORDER_COLUMNS, rows)
+
+
+# -----------------------------------------------------------------------------
+# Hóa đơn
+# -----------------------------------------------------------------------------
+
+def _iter_invoice_groups(query) -> Iterator[Tuple[tuple, List[tuple]]]:
+    """Duyệt hóa đơn kèm chi tiết, gom các dòng liên tiếp cùng hóa đơn.
+
+    Yields:
+        tuple: (các cột hóa đơn, danh sách các cột chi tiết).
+    """
+    rows = (
+        query.outerjoin(InvoiceDetail, InvoiceDetail.ma_hoa_don == Invoice.ma_hoa_don)
+        .with_entities(
+            Invoice.ma_hoa_don,
+            Invoice.ma_don_hang,
+            Invoice.ma_tai_khoan,
+            Account.ho_ten,
+            Invoice.ngay_tao,
+            Invoice.ngay_dat_hang,
+            Invoice.trang_thai,
+            Invoice.tong_tien_tam_tinh,
+            InvoiceDetail.ma_chi_tiet_hoa_don,
+            InvoiceDetail.ma_san_pham,
+            InvoiceDetail.so_luong,
+            InvoiceDetail.don_gia,
+            InvoiceDetail.thanh_tien,
+        )
+        .order_by(Invoice.ma_hoa_don, InvoiceDetail.ma_chi_tiet_hoa_don)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    invoice_width = len(INVOICE_COLUMNS)
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        lines = [
+            tuple(row[invoice_width:])
+            for row in group
+            if row[invoice_width] is not None
+        ]
+        yield tuple(group[0][:invoice_width]), lines
+
+
+def stream_invoices(query, fmt: str = "csv") -> Iterator[str]:
+    """Xuất hóa đơn kèm chi tiết hóa đơn theo truy vấn đã lọc.
+
+    CSV có một dòng cho mỗi chi tiết (thông tin hóa đơn lặp lại; hóa đơn
+    không có chi tiết vẫn có một dòng). NDJSON có một object cho mỗi hóa đơn
+    với danh sách "chi_tiet".
+
+    Args:
+        query: Truy vấn từ build_invoice_query() (đã join Account).
+        fmt (str, optional): "csv" hoặc "ndjson". Defaults to "csv".
+
+    Returns:
+        Iterator[str]: Các đoạn nội dung file.
+    """
+    groups = _iter_invoice_groups(query)
+
+    if fmt == "ndjson":
+        return iter_ndjson(
+            {
+                **dict(zip(INVOICE_COLUMNS, _plain_row(header))),
+                "chi_tiet": [
+                    dict(zip(INVOICE_LINE_COLUMNS, _plain_row(line)))
+                    for line in lines
+                ],
+            }
+            for header, lines in groups
+        )
+
+    empty_line = (None,) * len(INVOICE_LINE_COLUMNS)
+    return iter_csv(
+        INVOICE_COLUMNS + INVOICE_LINE_COLUMNS,
+        (header + line for header, lines in groups for line in (lines or [empty_line])),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Tài khoản
+# -----------------------------------------------------------------------------
+
+def stream_accounts(query, fmt: str = "csv") -> Iterator[str]:
+    """Xuất tài khoản (không gồm mật khẩu) theo truy vấn đã lọc.
+
+    Args:
+        query: Truy vấn từ build_account_query().
+        fmt (str, optional): "csv" hoặc "ndjson". Defaults to "csv".
+
+    Returns:
+        Iterator[str]: Các đoạn nội dung file.
+    """
+    rows = (
+        query.with_entities(*(getattr(Account, column) for column in ACCOUNT_COLUMNS))
+        .order_by(Account.ma_tai_khoan)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+    return _stream(fmt, ACCOUNT_COLUMNS, rows)
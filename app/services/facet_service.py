@@ -0,0 +1,369 @@
+"""
+Module service lọc sản phẩm theo thuộc tính (faceted browse).
+
+Module này giữ trong bộ nhớ, với mỗi giá trị thuộc tính (giới tính, chất liệu,
+kích thước còn hàng, khoảng giá, bộ sưu tập), tập các sản phẩm đang bán dưới
+dạng bitset (số nguyên Python, bit thứ i ứng với mã sản phẩm i). Lọc theo tổ
+hợp bất kỳ là phép AND/OR trên các bitset và số lượng của từng giá trị là số
+bit 1, không cần join trong cơ sở dữ liệu cho mỗi request.
+
+Trong cùng một thuộc tính các giá trị được OR với nhau, giữa các thuộc tính
+được AND. Số lượng của một thuộc tính được tính với bộ lọc của các thuộc tính
+còn lại (người dùng thấy còn bao nhiêu sản phẩm nếu chọn thêm giá trị đó).
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.cache import PeriodicRefresh
+from app.extensions import db
+from app.models.collection import Collection
+from app.models.material import Material
+from app.models.product import Product
+from app.models.product__material import ProductMaterial
+from app.models.product_size import ProductSize
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_REBUILD_INTERVAL = 300
+
+FACETS = ("gender", "material", "size", "price", "collection")
+
+GENDER_LABELS = {
+    0: "Unisex",
+    1: "Nam",
+    2: "Nữ",
+}
+
+# Khoảng giá bán: (khoá, nhãn, giá từ, giá đến - không bao gồm).
+PRICE_RANGES = (
+    ("duoi-1tr", "Dưới 1 triệu", 0, 1_000_000),
+    ("1tr-3tr", "1 - 3 triệu", 1_000_000, 3_000_000),
+    ("3tr-5tr", "3 - 5 triệu", 3_000_000, 5_000_000),
+    ("5tr-10tr", "5 - 10 triệu", 5_000_000, 10_000_000),
+    ("tren-10tr", "Trên 10 triệu", 10_000_000, None),
+)
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def price_range_key(price) -> Optional[str]:
+    """Xác định khoảng giá chứa giá bán.
+
+    Args:
+        price: Giá bán.
+
+    Returns:
+        str | None: Khoá khoảng giá, None nếu không có giá.
+    """
+    if price is None:
+        return None
+    price = float(price)
+    for key, _, low, high in PRICE_RANGES:
+        if price >= low and (high is None or price < high):
+            return key
+    return None
+
+
+def size_label(size: float) -> str:
+    """Định dạng kích thước (10.0 -> "10", 10.5 -> "10.5")."""
+    return f"{size:g}"
+
+
+def bitset_to_ids(bits: int, limit: Optional[int] = None) -> List[int]:
+    """Liệt kê mã sản phẩm trong bitset theo thứ tự giảm dần.
+
+    Args:
+        bits: Bitset cần liệt kê.
+        limit: Số mã tối đa cần lấy (None để lấy tất cả).
+
+    Returns:
+        list[int]: Mã sản phẩm, mã lớn (sản phẩm mới) trước.
+    """
+    binary = format(bits, "b")
+    width = len(binary)
+    ids = []
+    position = binary.find("1")
+    while position != -1 and (limit is None or len(ids) < limit):
+        ids.append(width - 1 - position)
+        position = binary.find("1", position + 1)
+    return ids
+
+
+# -----------------------------------------------------------------------------
+# Chỉ mục thuộc tính
+# -----------------------------------------------------------------------------
+
+class FacetIndex:
+    """Bitset sản phẩm theo từng giá trị thuộc tính.
+
+    Lớp này không tự khoá, việc đồng bộ luồng do FacetEngine đảm nhận.
+    """
+
+    def __init__(self) -> None:
+        self.all = 0
+        self._bits: Dict[str, Dict[object, int]] = {facet: {} for facet in FACETS}
+        self._values: Dict[int, Dict[str, Set[object]]] = {}
+        self.labels: Dict[str, Dict[object, str]] = {
+            "gender": dict(GENDER_LABELS),
+            "price": {key: label for key, label, _, _ in PRICE_RANGES},
+            "material": {},
+            "collection": {},
+        }
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, product_id: int, values: Dict[str, Iterable[object]]) -> None:
+        """Thêm hoặc thay thế một sản phẩm.
+
+        Args:
+            product_id: Mã sản phẩm.
+            values: Dict thuộc tính -> các giá trị của sản phẩm.
+        """
+        self.remove(product_id)
+
+        bit = 1 << product_id
+        stored = {}
+        for facet in FACETS:
+            facet_values = {value for value in values.get(facet, ()) if value is not None}
+            for value in facet_values:
+                buckets = self._bits[facet]
+                buckets[value] = buckets.get(value, 0) | bit
+            stored[facet] = facet_values
+
+        self._values[product_id] = stored
+        self.all |= bit
+
+    def remove(self, product_id: int) -> None:
+        """Xoá một sản phẩm (nếu có).
+
+        Args:
+            product_id: Mã sản phẩm.
+        """
+        stored = self._values.pop(product_id, None)
+        if stored is None:
+            return
+
+        mask = ~(1 << product_id)
+        self.all &= mask
+        for facet, facet_values in stored.items():
+            buckets = self._bits[facet]
+            for value in facet_values:
+                buckets[value] &= mask
+                if not buckets[value]:
+                    del buckets[value]
+
+    def match(self, selection: Dict[str, Set[object]], exclude: Optional[str] = None) -> int:
+        """Tính bitset các sản phẩm thoả bộ lọc.
+
+        Args:
+            selection: Dict thuộc tính -> các giá trị được chọn.
+            exclude: Thuộc tính bỏ qua khi lọc (dùng để đếm).
+
+        Returns:
+            int: Bitset sản phẩm thoả bộ lọc.
+        """
+        bits = self.all
+        for facet, selected in selection.items():
+            if facet == exclude or not selected:
+                continue
+            buckets = self._bits[facet]
+            union = 0
+            for value in selected:
+                union |= buckets.get(value, 0)
+            bits &= union
+        return bits
+
+    def counts(self, selection: Dict[str, Set[object]], base: int) -> Dict[str, Dict[object, int]]:
+        """Đếm số sản phẩm của từng giá trị thuộc tính.
+
+        Args:
+            selection: Dict thuộc tính -> các giá trị được chọn.
+            base: Bitset giới hạn thêm (ví dụ kết quả tìm kiếm từ khoá).
+
+        Returns:
+            dict: Thuộc tính -> {giá trị: số sản phẩm}.
+        """
+        result = {}
+        for facet in FACETS:
+            scope = self.match(selection, exclude=facet) & base
+            result[facet] = {
+                value: (bits & scope).bit_count()
+                for value, bits in self._bits[facet].items()
+            }
+        return result
+
+
+# -----------------------------------------------------------------------------
+# Nạp dữ liệu
+# -----------------------------------------------------------------------------
+
+def _load_facet_values(*criteria) -> Dict[int, Dict[str, Set[object]]]:
+    """Nạp giá trị thuộc tính của các sản phẩm đang bán thoả điều kiện.
+
+    Dùng ba truy vấn: sản phẩm, chất liệu và kích thước còn hàng.
+
+    Args:
+        *criteria: Điều kiện lọc trên Product.
+
+    Returns:
+        dict: Mã sản phẩm -> {thuộc tính: tập giá trị}.
+    """
+    rows = (
+        db.session.query(
+            Product.ma_san_pham, Product.gioi_tinh, Product.gia_xuat, Product.bo_suu_tap
+        )
+        .filter(Product.trang_thai == 1, *criteria)
+        .all()
+    )
+
+    values: Dict[int, Dict[str, Set[object]]] = {}
+    for product_id, gender, price, collection_id in rows:
+        values[product_id] = {
+            "gender": {gender},
+            "price": {price_range_key(price)},
+            "collection": {collection_id},
+            "material": set(),
+            "size": set(),
+        }
+
+    if not values:
+        return values
+
+    materials = (
+        db.session.query(ProductMaterial.ma_san_pham, ProductMaterial.ma_chat_lieu)
+        .join(Product, Product.ma_san_pham == ProductMaterial.ma_san_pham)
+        .filter(Product.trang_thai == 1, *criteria)
+    )
+    for product_id, material_id in materials:
+        values[product_id]["material"].add(material_id)
+
+    sizes = (
+        db.session.query(ProductSize.ma_san_pham, ProductSize.ten_kich_thuoc)
+        .join(Product, Product.ma_san_pham == ProductSize.ma_san_pham)
+        .filter(Product.trang_thai == 1, ProductSize.so_luong > 0, *criteria)
+    )
+    for product_id, size in sizes:
+        values[product_id]["size"].add(float(size))
+
+    return values
+
+
+def _load_labels(index: FacetIndex) -> None:
+    """Nạp nhãn hiển thị cho chất liệu, bộ sưu tập và kích thước."""
+    index.labels["material"] = dict(
+        db.session.query(Material.ma_chat_lieu, Material.ten_chat_lieu).all()
+    )
+    index.labels["collection"] = dict(
+        db.session.query(Collection.ma_bo_suu_tap, Collection.ten_bo_suu_tap).all()
+    )
+
+
+# -----------------------------------------------------------------------------
+# Bộ máy lọc
+# -----------------------------------------------------------------------------
+
+class FacetEngine(PeriodicRefresh):
+    """Quản lý chỉ mục thuộc tính của tiến trình hiện tại.
+
+    Chỉ mục được xây ở lần gọi đầu tiên và xây lại ở luồng nền sau mỗi chu kỳ
+    (``FACET_REBUILD_INTERVAL``) để nhận thay đổi từ các worker khác, trong
+    lúc đó request vẫn dùng chỉ mục cũ; thay đổi sản phẩm trong tiến trình
+    được áp dụng ngay.
+    """
+
+    interval_key = "FACET_REBUILD_INTERVAL"
+    default_interval = DEFAULT_REBUILD_INTERVAL
+    thread_name = "facet-rebuild"
+
+    def _load(self) -> FacetIndex:
+        index = FacetIndex()
+        for product_id, values in _load_facet_values().items():
+            index.add(product_id, values)
+        _load_labels(index)
+        return index
+
+    def refresh_products(self, product_ids: Iterable[int]) -> None:
+        """Cập nhật chỉ mục cho các sản phẩm vừa thay đổi.
+
+        Không làm gì nếu chỉ mục chưa được xây.
+
+        Args:
+            product_ids: Mã các sản phẩm cần cập nhật.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        self._touch()
+        if self._data is None:
+            return
+
+        values = _load_facet_values(Product.ma_san_pham.in_(product_ids))
+        with self._lock:
+            for product_id in product_ids:
+                if product_id in values:
+                    self._data.add(product_id, values[product_id])
+                else:
+                    self._data.remove(product_id)
+
+    def browse(
+        self,
+        selection: Dict[str, Set[object]],
+        product_ids: Optional[Iterable[int]] = None,
+    ) -> dict:
+        """Lọc sản phẩm và đếm số lượng theo từng giá trị thuộc tính.
+
+        Args:
+            selection: Dict thuộc tính -> các giá trị được chọn.
+            product_ids: Giới hạn trong các mã sản phẩm này (ví dụ kết quả
+                tìm kiếm từ khoá), None để không giới hạn.
+
+        Returns:
+            dict: Gồm "bits" (bitset kết quả), "total" (số sản phẩm) và
+            "facets" (thuộc tính -> danh sách {value, label, count, selected}).
+        """
+        self.ensure_ready()
+        with self._lock:
+            index = self._data
+            base = index.all
+            if product_ids is not None:
+                base = 0
+                for product_id in product_ids:
+                    base |= 1 << product_id
+                base &= index.all
+
+            bits = index.match(selection) & base
+            counts = index.counts(selection, base)
+
+            facets = {}
+            for facet in FACETS:
+                labels = index.labels.get(facet, {})
+                selected = selection.get(facet, set())
+                if facet == "price":
+                    ordered = [key for key, _, _, _ in PRICE_RANGES]
+                else:
+                    ordered = sorted(counts[facet])
+                facets[facet] = [
+                    {
+                        "value": value,
+                        "label": (
+                            size_label(value)
+                            if facet == "size"
+                            else labels.get(value, str(value))
+                        ),
+                        "count": counts[facet].get(value, 0),
+                        "selected": value in selected,
+                    }
+                    for value in ordered
+                    if counts[facet].get(value, 0) or value in selected
+                ]
+
+        return {"bits": bits, "total": bits.bit_count(), "facets": facets}
+
+
+product_facets = FacetEngine()
@@ -8,6 +8,8 @@ from typing import Optional
 from app.extensions import db
 from app.models.favorite import Favorite
 from app.models.product import Product
+from app.services.relation_loader_service import load_related
+from sqlalchemy.orm import selectinload
 
 
 def get_user_favorites(user_id: int) -> list[dict]:
@@ -20,10 +22,13 @@ def get_user_favorites(user_id: int) -> list[dict]:
         list[dict]: Danh sách dict chứa thông tin sản phẩm yêu thích.
     """
     favorites = Favorite.query.filter_by(ma_tai_khoan=user_id).all()
+    products = load_related(
+        favorites, Product, "ma_san_pham", options=(selectinload(Product.hinh_anhs),)
+    )
 
     result = []
     for fav in favorites:
-        product = Product.query.get(fav.ma_san_pham)
+        product = products.get(fav.ma_san_pham)
         if product:
             # Lấy ảnh đầu tiên nếu có
             image_url = None
@@ -0,0 +1,137 @@
+"""
+Module service các dải sản phẩm của trang chủ (slide, bán chạy, mới nhất).
+
+Các dải giống nhau với mọi khách nên được tính cùng lúc và giữ trong bộ nhớ
+của tiến trình dưới dạng bản chụp (snapshot) chỉ gồm dữ liệu thuần, không
+phải đối tượng ORM, để dùng chung an toàn giữa các request và luồng.
+
+Bộ đệm theo kiểu stale-while-revalidate: trong HOME_RAILS_TTL giây bản chụp
+được dùng nguyên; sau đó request vẫn nhận bản chụp cũ ngay lập tức và một
+luồng nền tính lại. Chỉ khi chưa có bản chụp hoặc bản chụp cũ hơn
+HOME_RAILS_MAX_STALE giây thì request mới phải chờ tính lại. Nhờ vậy trang
+chủ của khách chưa đăng nhập không truy vấn cơ sở dữ liệu.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.cache import PeriodicRefresh, config_value
+from app.models.product import Product
+from app.services.user_cart_service import get_main_images
+from app.services.user_product_service import get_best_seller_products
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_STALE = 3600
+
+SLIDE_LIMIT = 4
+BEST_SELLER_LIMIT = 5
+NEW_PRODUCT_LIMIT = 5
+
+
+@dataclass(frozen=True)
+class RailProduct:
+    """Dữ liệu một sản phẩm cần để hiển thị trên dải trang chủ."""
+
+    ma_san_pham: int
+    ten_san_pham: str
+    mo_ta: str
+    gia_xuat: object
+    so_luong: int
+    anh: Optional[str]
+
+
+@dataclass(frozen=True)
+class HomeRailsSnapshot:
+    """Các dải sản phẩm của trang chủ tại một thời điểm."""
+
+    slide_products: Tuple[RailProduct, ...]
+    best_sellers: Tuple[RailProduct, ...]
+    new_products: Tuple[RailProduct, ...]
+
+
+# -----------------------------------------------------------------------------
+# Tính các dải
+# -----------------------------------------------------------------------------
+
+def _active_products(order_by, limit: int) -> List[Product]:
+    return (
+        Product.query.filter(Product.trang_thai == 1)
+        .order_by(order_by)
+        .limit(limit)
+        .all()
+    )
+
+
+def load_home_rails() -> HomeRailsSnapshot:
+    """Tính tất cả các dải sản phẩm của trang chủ.
+
+    Slide là các sản phẩm đầu của dải bán chạy (xếp theo tốc độ bán) nên
+    dùng chung một lần lấy; ảnh chính của mọi sản phẩm được nạp bằng một
+    truy vấn.
+
+    Returns:
+        HomeRailsSnapshot: Bản chụp các dải.
+    """
+    ranked = get_best_seller_products(max(SLIDE_LIMIT, BEST_SELLER_LIMIT))
+    newest = _active_products(Product.ngay_tao.desc(), NEW_PRODUCT_LIMIT)
+
+    images = get_main_images(
+        [product.ma_san_pham for product in ranked + newest]
+    )
+
+    def snapshot(products: List[Product]) -> Tuple[RailProduct, ...]:
+        return tuple(
+            RailProduct(
+                ma_san_pham=product.ma_san_pham,
+                ten_san_pham=product.ten_san_pham,
+                mo_ta=product.mo_ta or "",
+                gia_xuat=product.gia_xuat,
+                so_luong=product.so_luong,
+                anh=images.get(product.ma_san_pham),
+            )
+            for product in products
+        )
+
+    return HomeRailsSnapshot(
+        slide_products=snapshot(ranked[:SLIDE_LIMIT]),
+        best_sellers=snapshot(ranked[:BEST_SELLER_LIMIT]),
+        new_products=snapshot(newest),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Bộ đệm
+# -----------------------------------------------------------------------------
+
+class HomeRails(PeriodicRefresh):
+    """Bộ đệm stale-while-revalidate cho các dải sản phẩm trang chủ."""
+
+    interval_key = "HOME_RAILS_TTL"
+    default_interval = DEFAULT_TTL
+    thread_name = "home-rails-refresh"
+
+    def _load(self) -> HomeRailsSnapshot:
+        return load_home_rails()
+
+    def get(self) -> HomeRailsSnapshot:
+        """Lấy các dải sản phẩm, tính lại ở luồng nền khi đã hết hạn.
+
+        Returns:
+            HomeRailsSnapshot: Bản chụp các dải.
+        """
+        max_stale = config_value("HOME_RAILS_MAX_STALE", DEFAULT_MAX_STALE)
+        if self._data is not None and self._age() >= max_stale:
+            # Bản chụp quá cũ: request phải chờ tính lại.
+            with self._lock:
+                if self._age() >= max_stale:
+                    self.rebuild()
+        self.ensure_ready()
+        return self._data
+
+
+home_rails = HomeRails()
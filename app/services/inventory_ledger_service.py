@@ -0,0 +1,255 @@
+"""
+Module service sổ biến động tồn kho.
+
+Mọi thay đổi tồn kho (nhập hàng, bán, hoàn trả khi hủy đơn, điều chỉnh) được
+ghi thành một dòng trong BienDongTonKho, không bao giờ sửa hay xoá. Bảng
+TonKhoSanPham giữ tồn kho hiện tại theo sản phẩm (ma_kich_thuoc_san_pham = 0)
+và theo từng kích thước, được cộng dồn ngay trong transaction ghi sổ nên luôn
+bằng tổng các biến động. Dashboard đọc danh sách sắp hết/hết hàng từ bảng
+nhỏ có chỉ mục này thay vì lọc toàn bộ bảng SanPham.
+
+Dòng tổng của sản phẩm theo dõi SanPham.so_luong, các dòng kích thước theo dõi
+KichThuocSanPham.so_luong. Hai mức được ghi sổ riêng vì đơn hàng không có
+kích thước. Lệnh ``flask rebuild-stock-levels`` ghi bút toán đối soát cho
+phần chênh lệch với dữ liệu gốc rồi tính lại TonKhoSanPham.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from app.extensions import db
+from app.models.inventory_movement import InventoryMovement
+from app.models.product import Product
+from app.models.product_size import ProductSize
+from app.models.stock_level import StockLevel
+from app.services.sales_rollup_service import increment_counters
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+# Loại biến động.
+MOVEMENT_RECEIPT = 1
+MOVEMENT_SALE = 2
+MOVEMENT_CANCELLATION = 3
+MOVEMENT_ADJUSTMENT = 4
+
+MOVEMENT_LABELS = {
+    MOVEMENT_RECEIPT: "Nhập kho",
+    MOVEMENT_SALE: "Bán hàng",
+    MOVEMENT_CANCELLATION: "Hoàn trả do hủy đơn",
+    MOVEMENT_ADJUSTMENT: "Điều chỉnh",
+}
+
+# Mã kích thước của dòng tổng sản phẩm trong TonKhoSanPham.
+PRODUCT_LEVEL = 0
+
+
+@dataclass(frozen=True)
+class StockMovement:
+    """Một biến động cần ghi sổ."""
+
+    product_id: int
+    quantity: int
+    kind: int
+    size_id: Optional[int] = None
+    order_id: Optional[int] = None
+    note: Optional[str] = None
+
+
+# -----------------------------------------------------------------------------
+# Ghi sổ
+# -----------------------------------------------------------------------------
+
+def record_movements(movements: Iterable[StockMovement]) -> None:
+    """Ghi các biến động và cộng dồn vào tồn kho hiện tại (không commit).
+
+    Người gọi tự cập nhật cột so_luong của SanPham/KichThuocSanPham trong
+    cùng transaction.
+
+    Args:
+        movements: Các biến động; biến động có số lượng 0 bị bỏ qua.
+    """
+    rows = []
+    totals: Dict[Tuple[int, int], int] = {}
+    for movement in movements:
+        if not movement.quantity:
+            continue
+        rows.append(
+            {
+                "ma_san_pham": movement.product_id,
+                "ma_kich_thuoc_san_pham": movement.size_id,
+                "loai": movement.kind,
+                "so_luong": movement.quantity,
+                "ma_don_hang": movement.order_id,
+                "ghi_chu": movement.note,
+            }
+        )
+        key = (movement.product_id, movement.size_id or PRODUCT_LEVEL)
+        totals[key] = totals.get(key, 0) + movement.quantity
+
+    if not rows:
+        return
+
+    db.session.execute(insert(InventoryMovement), rows)
+    for (product_id, size_id), quantity in sorted(totals.items()):
+        increment_counters(
+            StockLevel,
+            {"ma_san_pham": product_id, "ma_kich_thuoc_san_pham": size_id},
+            {"so_luong": quantity},
+        )
+
+
+def record_movement(
+    product_id: int,
+    quantity: int,
+    kind: int,
+    size_id: Optional[int] = None,
+    order_id: Optional[int] = None,
+    note: Optional[str] = None,
+) -> None:
+    """Ghi một biến động tồn kho (không commit). Xem record_movements()."""
+    record_movements(
+        [StockMovement(product_id, quantity, kind, size_id, order_id, note)]
+    )
+
+
+def record_new_stock(product_ids: Iterable[int]) -> None:
+    """Mở tồn kho cho các sản phẩm vừa tạo (đã flush, chưa commit).
+
+    Tạo dòng TonKhoSanPham cho sản phẩm và từng kích thước của nó (kể cả khi
+    số lượng bằng 0) và ghi một bút toán nhập kho cho số lượng ban đầu.
+
+    Args:
+        product_ids: Mã các sản phẩm mới.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    levels = [
+        (product_id, PRODUCT_LEVEL, quantity or 0)
+        for product_id, quantity in db.session.execute(
+            select(Product.ma_san_pham, Product.so_luong).where(
+                Product.ma_san_pham.in_(product_ids)
+            )
+        )
+    ]
+    levels.extend(
+        (product_id, size_id, quantity or 0)
+        for size_id, product_id, quantity in db.session.execute(
+            select(
+                ProductSize.ma_kich_thuoc_san_pham,
+                ProductSize.ma_san_pham,
+                ProductSize.so_luong,
+            ).where(ProductSize.ma_san_pham.in_(product_ids))
+        )
+    )
+
+    db.session.execute(
+        insert(StockLevel),
+        [
+            {"ma_san_pham": product_id, "ma_kich_thuoc_san_pham": size_id, "so_luong": 0}
+            for product_id, size_id, _ in levels
+        ],
+    )
+    record_movements(
+        StockMovement(
+            product_id,
+            quantity,
+            MOVEMENT_RECEIPT,
+            size_id=size_id or None,
+            note="Tồn kho ban đầu",
+        )
+        for product_id, size_id, quantity in levels
+    )
+
+
+# -----------------------------------------------------------------------------
+# Đối soát
+# -----------------------------------------------------------------------------
+
+def _ledger_balances() -> Dict[Tuple[int, int], int]:
+    """Tổng biến động theo (sản phẩm, kích thước)."""
+    size_key = func.coalesce(InventoryMovement.ma_kich_thuoc_san_pham, PRODUCT_LEVEL)
+    return {
+        (product_id, size_id): int(total or 0)
+        for product_id, size_id, total in db.session.execute(
+            select(
+                InventoryMovement.ma_san_pham,
+                size_key,
+                func.sum(InventoryMovement.so_luong),
+            ).group_by(InventoryMovement.ma_san_pham, size_key)
+        )
+    }
+
+
+def rebuild_stock_levels() -> Tuple[int, int]:
+    """Đối soát sổ với dữ liệu gốc và tính lại toàn bộ TonKhoSanPham.
+
+    Với mỗi sản phẩm/kích thước mà tổng biến động khác so_luong hiện tại (dữ
+    liệu có trước khi có sổ, hoặc bị sửa trực tiếp trong CSDL), ghi một bút
+    toán điều chỉnh bằng phần chênh lệch. Sau đó TonKhoSanPham được ghi lại
+    từ so_luong của SanPham và KichThuocSanPham.
+
+    Returns:
+        tuple: (số bút toán điều chỉnh đã ghi, số dòng TonKhoSanPham).
+    """
+    balances = _ledger_balances()
+    current = {
+        (product_id, PRODUCT_LEVEL): quantity or 0
+        for product_id, quantity in db.session.execute(
+            select(Product.ma_san_pham, Product.so_luong)
+        )
+    }
+    current.update(
+        ((product_id, size_id), quantity or 0)
+        for product_id, size_id, quantity in db.session.execute(
+            select(
+                ProductSize.ma_san_pham,
+                ProductSize.ma_kich_thuoc_san_pham,
+                ProductSize.so_luong,
+            )
+        )
+    )
+
+    adjustments = [
+        {
+            "ma_san_pham": product_id,
+            "ma_kich_thuoc_san_pham": size_id or None,
+            "loai": MOVEMENT_ADJUSTMENT,
+            "so_luong": quantity - balances.get((product_id, size_id), 0),
+            "ghi_chu": "Đối soát tồn kho",
+        }
+        for (product_id, size_id), quantity in sorted(current.items())
+        if quantity != balances.get((product_id, size_id), 0)
+    ]
+    if adjustments:
+        db.session.execute(insert(InventoryMovement), adjustments)
+
+    db.session.execute(delete(StockLevel))
+    db.session.execute(
+        insert(StockLevel).from_select(
+            ["ma_san_pham", "ma_kich_thuoc_san_pham", "so_luong"],
+            select(
+                Product.ma_san_pham,
+                literal(PRODUCT_LEVEL),
+                func.coalesce(Product.so_luong, 0),
+            ),
+        )
+    )
+    db.session.execute(
+        insert(StockLevel).from_select(
+            ["ma_san_pham", "ma_kich_thuoc_san_pham", "so_luong"],
+            select(
+                ProductSize.ma_san_pham,
+                ProductSize.ma_kich_thuoc_san_pham,
+                func.coalesce(ProductSize.so_luong, 0),
+            ),
+        )
+    )
+    db.session.commit()
+    return len(adjustments), len(current)
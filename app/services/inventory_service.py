@@ -0,0 +1,254 @@
+"""
+Module service giữ và hoàn trả tồn kho sản phẩm.
+
+Tồn kho được trừ bằng một lệnh ``UPDATE ... WHERE so_luong >= :qty`` cho mỗi
+sản phẩm, trong cùng transaction với đơn hàng: cơ sở dữ liệu tự kiểm tra và
+trừ trong một bước nên hai đơn hàng đồng thời không thể cùng lấy món hàng
+cuối cùng. Lệnh nào không cập nhật được dòng nào nghĩa là không đủ hàng, cả
+transaction bị rollback.
+
+Để tránh dồn khoá trên các sản phẩm bán chạy, việc trừ kho được thực hiện ở
+bước cuối, ngay trước commit (khoá dòng chỉ giữ trong thời gian rất ngắn), và
+luôn theo thứ tự mã sản phẩm tăng dần để các đơn nhiều sản phẩm không khoá
+chéo nhau (deadlock). Không dùng SELECT ... FOR UPDATE.
+
+Đơn hàng được đánh dấu ``giu_ton_kho = 1`` khi đã giữ hàng; việc hoàn trả chỉ
+xảy ra một lần nhờ lệnh cập nhật có điều kiện trên chính cờ này. Mỗi lần trừ
+hoặc hoàn trả được ghi vào sổ biến động tồn kho (inventory_ledger_service).
+"""
+
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.extensions import db
+from app.models.order import Order
+from app.models.product import Product
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.inventory_ledger_service import (
+    MOVEMENT_CANCELLATION,
+    MOVEMENT_SALE,
+    StockMovement,
+    record_movements,
+)
+from app.services.product_service import refresh_product_indexes
+
+
+# Trạng thái sản phẩm: đang bán / hết hàng.
+PRODUCT_ACTIVE = 1
+PRODUCT_OUT_OF_STOCK = 2
+
+
+class InsufficientStockError(Exception):
+    """Không đủ tồn kho cho một sản phẩm trong đơn hàng."""
+
+    def __init__(self, product_id: int, requested: int) -> None:
+        super().__init__(
+            f"Sản phẩm #{product_id} không đủ số lượng trong kho (cần {requested})."
+        )
+        self.product_id = product_id
+        self.requested = requested
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def order_quantities(lines: Iterable) -> Dict[int, int]:
+    """Cộng số lượng theo sản phẩm từ các dòng chi tiết (đơn hàng, giỏ hàng).
+
+    Args:
+        lines: Các dòng có thuộc tính ma_san_pham và so_luong.
+
+    Returns:
+        dict: Mã sản phẩm -> tổng số lượng.
+    """
+    quantities: Dict[int, int] = {}
+    for line in lines:
+        quantities[line.ma_san_pham] = quantities.get(line.ma_san_pham, 0) + (
+            line.so_luong or 0
+        )
+    return quantities
+
+
+def _set_reserved_flag(order: Order, reserved: bool) -> bool:
+    """Đổi cờ giữ hàng của đơn nếu đang ở trạng thái ngược lại.
+
+    Returns:
+        bool: True nếu lệnh này là lệnh đổi cờ (chỉ một tiến trình thắng).
+    """
+    result = db.session.execute(
+        update(Order)
+        .where(
+            Order.ma_don_hang == order.ma_don_hang,
+            Order.giu_ton_kho == (0 if reserved else 1),
+        )
+        .values(giu_ton_kho=1 if reserved else 0)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(order, "giu_ton_kho", 1 if reserved else 0)
+    return result.rowcount == 1
+
+
+# -----------------------------------------------------------------------------
+# Giữ và hoàn trả tồn kho
+# -----------------------------------------------------------------------------
+
+def reserve_stock(quantities: Dict[int, int], order_id: Optional[int] = None) -> Set[int]:
+    """Trừ tồn kho các sản phẩm trong transaction hiện tại.
+
+    Sản phẩm về 0 được chuyển sang trạng thái hết hàng. Không commit; khi
+    thiếu hàng, người gọi phải rollback.
+
+    Args:
+        quantities: Mã sản phẩm -> số lượng cần giữ.
+        order_id (int, optional): Mã đơn hàng, ghi kèm vào sổ biến động.
+
+    Returns:
+        set: Mã các sản phẩm vừa chuyển sang hết hàng.
+
+    Raises:
+        InsufficientStockError: Một sản phẩm không đủ hàng hoặc không còn bán.
+    """
+    reserved = []
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        if quantity <= 0:
+            continue
+
+        result = db.session.execute(
+            update(Product)
+            .where(
+                Product.ma_san_pham == product_id,
+                Product.trang_thai == PRODUCT_ACTIVE,
+                Product.so_luong >= quantity,
+            )
+            # MySQL gán SET lần lượt từ trái sang phải: trạng thái phải được
+            # tính trước khi so_luong bị trừ.
+            .ordered_values(
+                (
+                    Product.trang_thai,
+                    case(
+                        (Product.so_luong == quantity, PRODUCT_OUT_OF_STOCK),
+                        else_=Product.trang_thai,
+                    ),
+                ),
+                (Product.so_luong, Product.so_luong - quantity),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStockError(product_id, quantity)
+        reserved.append(product_id)
+
+    if not reserved:
+        return set()
+
+    record_movements(
+        StockMovement(product_id, -quantities[product_id], MOVEMENT_SALE, order_id=order_id)
+        for product_id in reserved
+    )
+    return set(
+        db.session.scalars(
+            select(Product.ma_san_pham).where(
+                Product.ma_san_pham.in_(reserved), Product.so_luong == 0
+            )
+        )
+    )
+
+
+def release_stock(quantities: Dict[int, int], order_id: Optional[int] = None) -> Set[int]:
+    """Cộng lại tồn kho các sản phẩm trong transaction hiện tại.
+
+    Sản phẩm đang hết hàng có lại số lượng được chuyển về trạng thái đang bán
+    (sản phẩm đã xoá giữ nguyên trạng thái).
+
+    Args:
+        quantities: Mã sản phẩm -> số lượng hoàn trả.
+        order_id (int, optional): Mã đơn hàng, ghi kèm vào sổ biến động.
+
+    Returns:
+        set: Mã các sản phẩm vừa có hàng trở lại.
+    """
+    restocked = set()
+    released = []
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        if quantity <= 0:
+            continue
+        released.append(StockMovement(
+            product_id, quantity, MOVEMENT_CANCELLATION, order_id=order_id
+        ))
+
+        result = db.session.execute(
+            update(Product)
+            .where(
+                Product.ma_san_pham == product_id,
+                Product.trang_thai == PRODUCT_OUT_OF_STOCK,
+            )
+            .values(so_luong=Product.so_luong + quantity, trang_thai=PRODUCT_ACTIVE)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            restocked.add(product_id)
+            continue
+
+        db.session.execute(
+            update(Product)
+            .where(Product.ma_san_pham == product_id)
+            .values(so_luong=Product.so_luong + quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+    record_movements(released)
+    return restocked
+
+
+def reserve_order_stock(order: Order, lines: Iterable) -> Set[int]:
+    """Giữ hàng cho đơn hàng (gọi ở bước cuối, ngay trước commit).
+
+    Args:
+        order (Order): Đơn hàng (đã flush).
+        lines: Các dòng chi tiết của đơn hàng.
+
+    Returns:
+        set: Mã các sản phẩm vừa chuyển sang hết hàng.
+
+    Raises:
+        InsufficientStockError: Không đủ hàng.
+    """
+    if not _set_reserved_flag(order, True):
+        return set()
+    return reserve_stock(order_quantities(lines), order.ma_don_hang)
+
+
+def release_order_stock(order: Order) -> Set[int]:
+    """Hoàn trả hàng đã giữ của đơn hàng (ví dụ khi huỷ đơn).
+
+    Không làm gì nếu đơn chưa giữ hàng hoặc đã được hoàn trả trước đó.
+
+    Args:
+        order (Order): Đơn hàng.
+
+    Returns:
+        set: Mã các sản phẩm vừa có hàng trở lại.
+    """
+    if not _set_reserved_flag(order, False):
+        return set()
+    return release_stock(order_quantities(order.chi_tiet_don_hang), order.ma_don_hang)
+
+
+def on_stock_changed(product_ids: Iterable[int]) -> None:
+    """Cập nhật bộ đệm sau khi commit thay đổi tồn kho.
+
+    Args:
+        product_ids: Mã các sản phẩm vừa đổi trạng thái còn/hết hàng.
+    """
+    # Số lượng của mọi sản phẩm trong đơn đều đổi: tính lại toàn bộ dashboard
+    # ở lần đọc sau thay vì để trống từng phần mà các bộ đếm khác cập nhật vào.
+    dashboard_metrics.invalidate()
+
+    product_ids = list(product_ids)
+    if product_ids:
+        refresh_product_indexes(product_ids)
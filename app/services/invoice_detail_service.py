@@ -1,5 +1,7 @@
 from app.models.invoice_detail import InvoiceDetail
 from app.models.product import Product
+from app.services.relation_loader_service import load_related
+from app.services.sales_rollup_service import record_invoice_line_changed
 
 
 def get_invoice_details_by_invoice_id(invoice_id: int):
@@ -25,16 +27,15 @@ def get_invoice_detail_with_product(invoice_id: int):
     """
     invoice_details = InvoiceDetail.query.filter_by(ma_hoa_don=invoice_id).all()
     
-    # Thêm thông tin sản phẩm vào mỗi chi tiết
-    result = []
-    for detail in invoice_details:
-        product = Product.query.get(detail.ma_san_pham)
-        result.append({
+    # Thêm thông tin sản phẩm vào mỗi chi tiết (một truy vấn cho tất cả)
+    products = load_related(invoice_details, Product, "ma_san_pham")
+    return [
+        {
             'detail': detail,
-            'product': product
-        })
-    
-    return result
+            'product': products.get(detail.ma_san_pham)
+        }
+        for detail in invoice_details
+    ]
 
 
 def get_invoice_detail_or_404(invoice_detail_id: int):
@@ -77,6 +78,7 @@ def create_invoice_detail(ma_hoa_don: int, ma_san_pham: int, so_luong: int, don_
         ngay_tao=datetime.utcnow(),
     )
     db.session.add(invoice_detail)
+    record_invoice_line_changed(ma_hoa_don, ma_san_pham, so_luong, thanh_tien)
     db.session.commit()
     return invoice_detail
 
@@ -94,6 +96,8 @@ def update_invoice_detail(invoice_detail: InvoiceDetail, so_luong: int = None, d
     """
     from app.extensions import db
     
+    old_quantity, old_amount = invoice_detail.so_luong, invoice_detail.thanh_tien
+
     if so_luong is not None:
         invoice_detail.so_luong = so_luong
     
@@ -104,6 +108,12 @@ def update_invoice_detail(invoice_detail: InvoiceDetail, so_luong: int = None, d
     if so_luong is not None or don_gia is not None:
         invoice_detail.thanh_tien = float(invoice_detail.so_luong) * float(invoice_detail.don_gia)
     
+    record_invoice_line_changed(
+        invoice_detail.ma_hoa_don,
+        invoice_detail.ma_san_pham,
+        invoice_detail.so_luong - old_quantity,
+        float(invoice_detail.thanh_tien or 0) - float(old_amount or 0),
+    )
     db.session.commit()
     return invoice_detail
 
@@ -115,5 +125,11 @@ def delete_invoice_detail(invoice_detail: InvoiceDetail):
         invoice_detail (InvoiceDetail): Chi tiết hóa đơn cần xóa.
     """
     from app.extensions import db
+    record_invoice_line_changed(
+        invoice_detail.ma_hoa_don,
+        invoice_detail.ma_san_pham,
+        -invoice_detail.so_luong,
+        -float(invoice_detail.thanh_tien or 0),
+    )
     db.session.delete(invoice_detail)
     db.session.commit()
@@ -1,8 +1,15 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.extensions import db
 from app.models.invoice import Invoice
 from app.models.account import Account
-from sqlalchemy import or_, cast, func
+from app.pagination import paginate_by_key
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.sales_rollup_service import (
+    record_invoice_changed,
+    record_invoice_created,
+)
+from app.services.status_count_service import count_by_status
+from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
 
@@ -33,18 +40,18 @@ def build_invoice_query(keyword: str, status: str, date_from: str, date_to: str,
         # Mặc định loại trừ các hóa đơn đã xóa
         query = query.filter(Invoice.trang_thai != 3)
 
-    # Lọc theo ngày
+    # Lọc theo ngày (so sánh trực tiếp trên cột để dùng được index ngay_tao)
     if date_from:
         try:
             date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(func.date(Invoice.ngay_tao) >= date_from_obj.date())
+            query = query.filter(Invoice.ngay_tao >= date_from_obj)
         except (TypeError, ValueError):
             pass
 
     if date_to:
         try:
             date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
-            query = query.filter(func.date(Invoice.ngay_tao) <= date_to_obj.date())
+            query = query.filter(Invoice.ngay_tao < date_to_obj + timedelta(days=1))
         except (TypeError, ValueError):
             pass
 
@@ -76,7 +83,7 @@ def build_invoice_query(keyword: str, status: str, date_from: str, date_to: str,
     return query
 
 
-def get_invoice_page(keyword: str, status: str, date_from: str, date_to: str, min_value: str, max_value: str, page: int, per_page: int = 10):
+def get_invoice_page(keyword: str, status: str, date_from: str, date_to: str, min_value: str, max_value: str, page: int, per_page: int = 10, cursor: str = None):
     """Lấy dữ liệu hóa đơn theo trang kèm thống kê.
 
     Args:
@@ -88,33 +95,27 @@ def get_invoice_page(keyword: str, status: str, date_from: str, date_to: str, mi
         max_value (str): Giá trị tối đa.
         page (int): Trang hiện tại.
         per_page (int, optional): Số bản ghi mỗi trang. Defaults to 10.
+        cursor (str, optional): Con trỏ phân trang theo khoá; khi có thì bỏ
+            qua page. Defaults to None.
 
     Returns:
         tuple: (pagination, invoices, total_invoices, cho_xac_nhan, dang_xu_ly, da_thanh_toan, da_huy)
     """
     query = build_invoice_query(keyword, status, date_from, date_to, min_value, max_value)
 
-    pagination = query.order_by(Invoice.ma_hoa_don.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
+    pagination = paginate_by_key(query, Invoice.ma_hoa_don, page, per_page, cursor)
 
     # Thống kê theo trạng thái (loại trừ đã xóa)
-    total_invoices = Invoice.query.filter(Invoice.trang_thai != 3).count()
-    cho_xac_nhan = Invoice.query.filter_by(trang_thai=0).count()
-    dang_xu_ly = Invoice.query.filter_by(trang_thai=1).count()
-    da_thanh_toan = Invoice.query.filter_by(trang_thai=2).count()
-    da_huy = Invoice.query.filter_by(trang_thai=4).count()
+    status_counts = count_by_status(Invoice)
 
     return (
         pagination,
         pagination.items,
-        total_invoices,
-        cho_xac_nhan,
-        dang_xu_ly,
-        da_thanh_toan,
-        da_huy,
+        status_counts.total_excluding(3),
+        status_counts.get(0),
+        status_counts.get(1),
+        status_counts.get(2),
+        status_counts.get(4),
     )
 
 
@@ -159,7 +160,9 @@ def create_invoice(ma_tai_khoan: int, tong_tien_tam_tinh: float = None, ngay_dat
         trang_thai=trang_thai,
     )
     db.session.add(invoice)
+    record_invoice_created(invoice)
     db.session.commit()
+    dashboard_metrics.on_invoice_created(invoice)
     return invoice
 
 
@@ -176,6 +179,8 @@ def update_invoice(invoice: Invoice, ma_tai_khoan: int = None, tong_tien_tam_tin
     Returns:
         Invoice: Hóa đơn sau khi cập nhật.
     """
+    old_status, old_amount = invoice.trang_thai, invoice.tong_tien_tam_tinh
+
     if ma_tai_khoan is not None:
         invoice.ma_tai_khoan = ma_tai_khoan
     
@@ -191,7 +196,9 @@ def update_invoice(invoice: Invoice, ma_tai_khoan: int = None, tong_tien_tam_tin
     if trang_thai is not None:
         invoice.trang_thai = trang_thai
     
+    record_invoice_changed(invoice, old_status, old_amount)
     db.session.commit()
+    dashboard_metrics.on_invoice_changed()
     return invoice
 
 
@@ -201,8 +208,11 @@ def soft_delete_invoice(invoice: Invoice):
     Args:
         invoice (Invoice): Hóa đơn cần xóa.
     """
+    old_status = invoice.trang_thai
     invoice.trang_thai = 3  # Trạng thái đã xóa
+    record_invoice_changed(invoice, old_status, invoice.tong_tien_tam_tinh)
     db.session.commit()
+    dashboard_metrics.on_invoice_changed()
 
 
 def check_ma_don_hang_column_exists():
@@ -282,6 +292,7 @@ def create_invoice_from_order(order):
     db.session.flush()  # Để lấy ma_hoa_don
     
     # Tạo chi tiết hóa đơn từ chi tiết đơn hàng
+    invoice_details = []
     for order_detail in order.chi_tiet_don_hang:
         invoice_detail = InvoiceDetail(
             ma_hoa_don=invoice.ma_hoa_don,
@@ -292,21 +303,9 @@ def create_invoice_from_order(order):
             ngay_tao=datetime.utcnow(),
         )
         db.session.add(invoice_detail)
+        invoice_details.append(invoice_detail)
     
+    record_invoice_created(invoice, invoice_details)
     db.session.commit()
+    dashboard_metrics.on_invoice_created(invoice)
     return invoice, True
-
-
-def get_invoices_by_user(user_id: int):
-    """Lấy tất cả hóa đơn của một người dùng.
-
-    Args:
-        user_id (int): Mã tài khoản người dùng.
-
-    Returns:
-        list: Danh sách hóa đơn của người dùng (loại trừ đã xóa).
-    """
-    return Invoice.query.filter(
-        Invoice.ma_tai_khoan == user_id,
-        Invoice.trang_thai != 3  # Loại trừ đã xóa
-    ).order_by(Invoice.ngay_tao.desc()).all()
@@ -1,5 +1,6 @@
 from app.models.order_detail import OrderDetail
 from app.models.product import Product
+from app.services.relation_loader_service import load_related
 
 
 def get_order_details_by_order_id(order_id: int):
@@ -25,16 +26,15 @@ def get_order_detail_with_product(order_id: int):
     """
     order_details = OrderDetail.query.filter_by(ma_don_hang=order_id).all()
     
-    # Thêm thông tin sản phẩm vào mỗi chi tiết
-    result = []
-    for detail in order_details:
-        product = Product.query.get(detail.ma_san_pham)
-        result.append({
+    # Thêm thông tin sản phẩm vào mỗi chi tiết (một truy vấn cho tất cả)
+    products = load_related(order_details, Product, "ma_san_pham")
+    return [
+        {
             'detail': detail,
-            'product': product
-        })
-    
-    return result
+            'product': products.get(detail.ma_san_pham)
+        }
+        for detail in order_details
+    ]
 
 
 def get_order_detail_or_404(order_detail_id: int):
@@ -1,9 +1,21 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.extensions import db
 from app.models.order import Order
 from app.models.account import Account
+from app.pagination import paginate_by_key
 from app.constants import OrderStatus
-from sqlalchemy import or_, cast, func
+from app.services.best_seller_service import best_sellers
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.home_rail_service import home_rails
+from app.services.inventory_service import (
+    InsufficientStockError,
+    on_stock_changed,
+    release_order_stock,
+    reserve_order_stock,
+)
+from app.services.sales_rollup_service import record_order_status_changed
+from app.services.status_count_service import count_by_status
+from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
 
@@ -38,18 +50,18 @@ def build_order_query(
         except (TypeError, ValueError):
             pass
 
-    # Lọc theo ngày
+    # Lọc theo ngày (so sánh trực tiếp trên cột để dùng được index ngay_tao)
     if date_from:
         try:
             date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(func.date(Order.ngay_tao) >= date_from_obj.date())
+            query = query.filter(Order.ngay_tao >= date_from_obj)
         except (TypeError, ValueError):
             pass
 
     if date_to:
         try:
             date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
-            query = query.filter(func.date(Order.ngay_tao) <= date_to_obj.date())
+            query = query.filter(Order.ngay_tao < date_to_obj + timedelta(days=1))
         except (TypeError, ValueError):
             pass
 
@@ -90,6 +102,7 @@ def get_order_page(
     max_value: str,
     page: int,
     per_page: int = 10,
+    cursor: str = None,
 ):
     """Lấy dữ liệu đơn hàng theo trang kèm thống kê.
 
@@ -102,35 +115,28 @@ def get_order_page(
         max_value (str): Giá trị tối đa.
         page (int): Trang hiện tại.
         per_page (int, optional): Số bản ghi mỗi trang. Defaults to 10.
+        cursor (str, optional): Con trỏ phân trang theo khoá; khi có thì bỏ
+            qua page. Defaults to None.
 
     Returns:
         tuple: (pagination, orders, total_orders, cho_xac_nhan, dang_xu_ly, dang_giao, da_giao, da_huy)
     """
     query = build_order_query(keyword, status, date_from, date_to, min_value, max_value)
 
-    pagination = query.order_by(Order.ma_don_hang.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
+    pagination = paginate_by_key(query, Order.ma_don_hang, page, per_page, cursor)
 
-    # Thống kê theo trạng thái
-    total_orders = Order.query.count()
-    cho_xac_nhan = Order.query.filter_by(trang_thai=OrderStatus.PENDING).count()
-    dang_xu_ly = Order.query.filter_by(trang_thai=OrderStatus.PROCESSING).count()
-    dang_giao = Order.query.filter_by(trang_thai=OrderStatus.SHIPPING).count()
-    da_giao = Order.query.filter_by(trang_thai=OrderStatus.COMPLETED).count()
-    da_huy = Order.query.filter_by(trang_thai=OrderStatus.CANCELLED).count()
+    # Thống kê theo trạng thái (một truy vấn GROUP BY)
+    status_counts = count_by_status(Order)
 
     return (
         pagination,
         pagination.items,
-        total_orders,
-        cho_xac_nhan,
-        dang_xu_ly,
-        dang_giao,
-        da_giao,
-        da_huy,
+        status_counts.total,
+        status_counts.get(OrderStatus.PENDING),
+        status_counts.get(OrderStatus.PROCESSING),
+        status_counts.get(OrderStatus.SHIPPING),
+        status_counts.get(OrderStatus.COMPLETED),
+        status_counts.get(OrderStatus.CANCELLED),
     )
 
 
@@ -150,6 +156,8 @@ def update_order_status(order: Order, new_status: int):
     """Cập nhật trạng thái đơn hàng.
 
     Khi trạng thái chuyển sang COMPLETED (đã giao), tự động tạo hóa đơn.
+    Chuyển sang CANCELLED hoàn trả hàng đã giữ; khôi phục đơn đã hủy giữ lại
+    hàng cho đơn.
 
     Args:
         order (Order): Đơn hàng cần cập nhật.
@@ -157,6 +165,9 @@ def update_order_status(order: Order, new_status: int):
 
     Returns:
         tuple: (Order, Invoice or None, bool) - Đơn hàng, hóa đơn (nếu tạo), và flag cho biết có tạo hóa đơn mới không.
+
+    Raises:
+        InsufficientStockError: Khôi phục đơn đã hủy nhưng không còn đủ hàng.
     """
     old_status = order.trang_thai
     order.trang_thai = new_status
@@ -164,7 +175,21 @@ def update_order_status(order: Order, new_status: int):
     if new_status == OrderStatus.PROCESSING:
         order.ngay_dat_hang = datetime.utcnow()
 
+    record_order_status_changed(order, old_status)
+    stock_changed = set()
+    if new_status == OrderStatus.CANCELLED:
+        stock_changed = release_order_stock(order)
+    elif old_status == OrderStatus.CANCELLED:
+        try:
+            stock_changed = reserve_order_stock(order, order.chi_tiet_don_hang)
+        except InsufficientStockError:
+            db.session.rollback()
+            raise
     db.session.commit()
+    dashboard_metrics.on_order_status_changed(order, old_status)
+    on_stock_changed(stock_changed)
+    if best_sellers.on_order_status_changed(order, old_status):
+        home_rails.invalidate()
 
     # Nếu trạng thái chuyển sang COMPLETED và trước đó không phải COMPLETED
     # thì tự động tạo hóa đơn
@@ -191,12 +216,14 @@ def confirm_order(order: Order):
     if order.trang_thai == OrderStatus.PENDING:
         order.trang_thai = OrderStatus.PROCESSING
         order.ngay_dat_hang = datetime.utcnow()
+        record_order_status_changed(order, OrderStatus.PENDING)
         db.session.commit()
+        dashboard_metrics.on_order_status_changed(order, OrderStatus.PENDING)
     return order
 
 
 def cancel_order(order: Order):
-    """Hủy đơn hàng (chuyển sang trạng thái đã hủy).
+    """Hủy đơn hàng (chuyển sang trạng thái đã hủy) và hoàn trả hàng đã giữ.
 
     Args:
         order (Order): Đơn hàng cần hủy.
@@ -210,8 +237,13 @@ def cancel_order(order: Order):
         OrderStatus.PROCESSING,
         OrderStatus.SHIPPING,
     ]:
+        old_status = order.trang_thai
         order.trang_thai = OrderStatus.CANCELLED
+        record_order_status_changed(order, old_status)
+        restocked = release_order_stock(order)
         db.session.commit()
+        dashboard_metrics.on_order_status_changed(order, old_status)
+        on_stock_changed(restocked)
     return order
 
 
@@ -242,4 +274,5 @@ def update_order(
                 pass
 
         db.session.commit()
+        dashboard_metrics.on_order_updated(order)
     return order
@@ -0,0 +1,574 @@
+"""
+Module service nhập sản phẩm hàng loạt từ file CSV/XLSX.
+
+File được đọc và kiểm tra từng dòng một (không nạp cả file vào bộ nhớ). Các
+dòng hợp lệ được gom thành từng lô: sản phẩm của lô được chèn cùng lúc (kèm
+RETURNING để lấy mã nếu CSDL hỗ trợ), sau đó hình ảnh, kích thước và chất liệu
+được chèn bằng một lệnh executemany cho mỗi bảng, rồi commit một lần cho cả lô. Dòng lỗi không chặn
+các dòng khác; lỗi được trả về kèm số dòng trong file.
+"""
+
+import csv
+import io
+import math
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.cache import config_value
+from app.extensions import db
+from app.models.brand import Brand
+from app.models.collection import Collection
+from app.models.material import Material
+from app.models.product import Product
+from app.models.product__material import ProductMaterial
+from app.models.product_image import ProductImage
+from app.models.product_size import ProductSize
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.facet_service import GENDER_LABELS
+from app.services.inventory_ledger_service import record_new_stock
+from app.services.product_service import refresh_product_indexes
+from app.services.search_service import normalize_text
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Số lỗi tối đa được giữ lại chi tiết trong kết quả (vẫn đếm đủ).
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+
+IMPORT_COLUMNS = (
+    "ten_san_pham",
+    "gia_nhap",
+    "gia_xuat",
+    "trong_luong",
+    "ma_kich_thuoc",
+    "gioi_tinh",
+    "so_luong",
+    "don_vi_tinh",
+    "trang_thai",
+    "mo_ta",
+    "thuong_hieu",
+    "bo_suu_tap",
+    "chat_lieu",
+    "kich_thuoc",
+    "hinh_anh",
+)
+
+REQUIRED_COLUMNS = ("ten_san_pham", "gia_nhap", "gia_xuat", "don_vi_tinh")
+
+# Ký tự phân tách các giá trị trong một ô (ảnh, chất liệu, kích thước).
+LIST_SEPARATOR = "|"
+
+# Kích thước ghi dạng "kích_thước:số_lượng", ví dụ "16:5|17:3".
+SIZE_SEPARATOR = ":"
+
+MAX_TEXT_LENGTH = 256
+
+# Giới hạn của cột Numeric(10, 2).
+MAX_PRICE = Decimal("99999999.99")
+
+# Trạng thái được phép khi nhập (không nhập sản phẩm đã xoá).
+IMPORT_STATUSES = (1, 2)
+
+_GENDER_BY_LABEL = {normalize_text(label): value for value, label in GENDER_LABELS.items()}
+
+
+class ImportFileError(ValueError):
+    """File nhập không đọc được hoặc thiếu cột bắt buộc."""
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportResult:
+    """Kết quả một lần nhập.
+
+    Attributes:
+        total_rows: Số dòng dữ liệu đã đọc.
+        imported: Số sản phẩm đã lưu (hoặc hợp lệ, khi chạy thử).
+        error_count: Tổng số dòng lỗi.
+        errors: Chi tiết lỗi (tối đa MAX_REPORTED_ERRORS dòng).
+        dry_run: Chỉ kiểm tra, không ghi vào cơ sở dữ liệu.
+    """
+
+    total_rows: int = 0
+    imported: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    dry_run: bool = False
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, message))
+
+
+# -----------------------------------------------------------------------------
+# Đọc file
+# -----------------------------------------------------------------------------
+
+def _normalize_header(header: Iterable) -> List[str]:
+    return [str(name or "").strip().lower() for name in header]
+
+
+def _check_header(header: List[str]) -> None:
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFileError(f"Thiếu cột bắt buộc: {', '.join(missing)}.")
+
+
+def iter_csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    """Đọc từng dòng của file CSV (UTF-8, có hoặc không có BOM).
+
+    Args:
+        stream: File nhị phân.
+
+    Yields:
+        tuple: (số dòng trong file, dict cột -> giá trị).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = _normalize_header(next(reader, []))
+        _check_header(header)
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, dict(zip(header, row))
+    except UnicodeDecodeError as exc:
+        raise ImportFileError("File CSV phải được lưu với mã hoá UTF-8.") from exc
+    finally:
+        # Không để TextIOWrapper đóng luôn file gốc của người gọi.
+        text.detach()
+
+
+def iter_xlsx_rows(stream: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    """Đọc từng dòng của sheet đầu tiên trong file XLSX (chế độ read-only).
+
+    Args:
+        stream: File nhị phân.
+
+    Yields:
+        tuple: (số dòng trong file, dict cột -> giá trị).
+    """
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError("Không đọc được file XLSX.") from exc
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _normalize_header(next(rows, ()))
+        _check_header(header)
+        for line, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            yield line, dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(stream: IO[bytes], filename: str) -> Iterator[Tuple[int, dict]]:
+    """Chọn cách đọc theo phần mở rộng của file.
+
+    Args:
+        stream: File nhị phân.
+        filename (str): Tên file (để xác định định dạng).
+
+    Returns:
+        Iterator: Các dòng (số dòng, dict cột -> giá trị).
+
+    Raises:
+        ImportFileError: Định dạng file không được hỗ trợ.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return iter_csv_rows(stream)
+    if extension == ".xlsx":
+        return iter_xlsx_rows(stream)
+    raise ImportFileError("Chỉ hỗ trợ file .csv hoặc .xlsx.")
+
+
+# -----------------------------------------------------------------------------
+# Kiểm tra dữ liệu
+# -----------------------------------------------------------------------------
+
+class _ReferenceLookup:
+    """Tra cứu mã của bảng tham chiếu theo mã hoặc theo tên."""
+
+    def __init__(self, rows: Iterable[Tuple[int, str]]) -> None:
+        self.ids = set()
+        self.by_name: Dict[str, int] = {}
+        for ref_id, name in rows:
+            self.ids.add(ref_id)
+            self.by_name.setdefault(normalize_text(name), ref_id)
+
+    def resolve(self, value) -> Optional[int]:
+        text = str(value).strip()
+        if text.isdigit():
+            return int(text) if int(text) in self.ids else None
+        return self.by_name.get(normalize_text(text))
+
+
+def _load_references() -> Dict[str, _ReferenceLookup]:
+    return {
+        "thuong_hieu": _ReferenceLookup(
+            db.session.query(Brand.ma_thuong_hieu, Brand.ten_thuong_hieu)
+        ),
+        "bo_suu_tap": _ReferenceLookup(
+            db.session.query(Collection.ma_bo_suu_tap, Collection.ten_bo_suu_tap)
+        ),
+        "chat_lieu": _ReferenceLookup(
+            db.session.query(Material.ma_chat_lieu, Material.ten_chat_lieu)
+        ),
+    }
+
+
+def _cell(row: dict, column: str) -> str:
+    value = row.get(column)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()]
+
+
+def _parse_decimal(value: str, label: str, errors: List[str]) -> Optional[Decimal]:
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        errors.append(f"{label} không hợp lệ: {value!r}.")
+        return None
+    if not number.is_finite() or number < 0 or number > MAX_PRICE:
+        errors.append(f"{label} phải nằm trong khoảng 0 - {MAX_PRICE}.")
+        return None
+    return number.quantize(Decimal("0.01"))
+
+
+def _parse_float(value: str, label: str, errors: List[str]) -> Optional[float]:
+    if value == "":
+        return 0.0
+    try:
+        number = float(value)
+    except ValueError:
+        errors.append(f"{label} không hợp lệ: {value!r}.")
+        return None
+    if not math.isfinite(number):
+        errors.append(f"{label} không hợp lệ: {value!r}.")
+        return None
+    if number < 0:
+        errors.append(f"{label} không được âm.")
+        return None
+    return number
+
+
+def _parse_int(value: str, label: str, errors: List[str]) -> Optional[int]:
+    try:
+        number = int(value)
+    except ValueError:
+        errors.append(f"{label} không hợp lệ: {value!r}.")
+        return None
+    if number < 0:
+        errors.append(f"{label} không được âm.")
+        return None
+    return number
+
+
+def _parse_gender(value: str, errors: List[str]) -> int:
+    if value == "":
+        return 0
+    if value.isdigit() and int(value) in GENDER_LABELS:
+        return int(value)
+    gender = _GENDER_BY_LABEL.get(normalize_text(value))
+    if gender is None:
+        errors.append(f"Giới tính không hợp lệ: {value!r}.")
+        return 0
+    return gender
+
+
+def _parse_sizes(value: str, errors: List[str]) -> List[Tuple[float, int]]:
+    sizes = []
+    for part in _split(value):
+        size_text, _, quantity_text = part.partition(SIZE_SEPARATOR)
+        size = _parse_float(size_text.strip(), "Kích thước", errors)
+        quantity = _parse_int(quantity_text.strip() or "0", "Số lượng kích thước", errors)
+        if size is not None and quantity is not None:
+            sizes.append((size, quantity))
+    return sizes
+
+
+def parse_row(row: dict, references: Dict[str, _ReferenceLookup]) -> Tuple[Optional[dict], List[str]]:
+    """Kiểm tra và chuyển một dòng của file thành dữ liệu sản phẩm.
+
+    Args:
+        row (dict): Cột -> giá trị của dòng.
+        references (dict): Bảng tra cứu thương hiệu, bộ sưu tập, chất liệu.
+
+    Returns:
+        tuple: (bản ghi, danh sách lỗi). Bản ghi là None nếu dòng có lỗi.
+    """
+    errors: List[str] = []
+
+    name = _cell(row, "ten_san_pham")
+    unit = _cell(row, "don_vi_tinh")
+    if not name:
+        errors.append("Thiếu tên sản phẩm.")
+    elif len(name) > MAX_TEXT_LENGTH:
+        errors.append(f"Tên sản phẩm dài quá {MAX_TEXT_LENGTH} ký tự.")
+    if not unit:
+        errors.append("Thiếu đơn vị tính.")
+    elif len(unit) > MAX_TEXT_LENGTH:
+        errors.append(f"Đơn vị tính dài quá {MAX_TEXT_LENGTH} ký tự.")
+
+    import_price = _parse_decimal(_cell(row, "gia_nhap"), "Giá nhập", errors)
+    sale_price = _parse_decimal(_cell(row, "gia_xuat"), "Giá xuất", errors)
+    weight = _parse_float(_cell(row, "trong_luong"), "Trọng lượng", errors)
+    size_code = _parse_float(_cell(row, "ma_kich_thuoc"), "Mã kích thước", errors)
+    gender = _parse_gender(_cell(row, "gioi_tinh"), errors)
+    sizes = _parse_sizes(_cell(row, "kich_thuoc"), errors)
+
+    quantity_text = _cell(row, "so_luong")
+    if quantity_text:
+        quantity = _parse_int(quantity_text, "Số lượng", errors)
+    else:
+        quantity = sum(size_quantity for _, size_quantity in sizes)
+
+    status_text = _cell(row, "trang_thai")
+    if status_text:
+        status = _parse_int(status_text, "Trạng thái", errors)
+        if status is not None and status not in IMPORT_STATUSES:
+            errors.append(f"Trạng thái không hợp lệ: {status_text!r}.")
+    else:
+        status = 1 if quantity else 2
+
+    related = {}
+    for column, label in (("thuong_hieu", "Thương hiệu"), ("bo_suu_tap", "Bộ sưu tập")):
+        value = _cell(row, column)
+        related[column] = references[column].resolve(value) if value else None
+        if value and related[column] is None:
+            errors.append(f"{label} không tồn tại: {value!r}.")
+
+    materials = []
+    for value in _split(_cell(row, "chat_lieu")):
+        material_id = references["chat_lieu"].resolve(value)
+        if material_id is None:
+            errors.append(f"Chất liệu không tồn tại: {value!r}.")
+        elif material_id not in materials:
+            materials.append(material_id)
+
+    images = _split(_cell(row, "hinh_anh"))
+    if any(len(path) > MAX_TEXT_LENGTH for path in images):
+        errors.append(f"Đường dẫn ảnh dài quá {MAX_TEXT_LENGTH} ký tự.")
+
+    if errors:
+        return None, errors
+
+    record = {
+        "product": {
+            "ten_san_pham": name,
+            "gia_nhap": import_price,
+            "gia_xuat": sale_price,
+            "trong_luong": weight,
+            "ma_kich_thuoc": size_code,
+            "gioi_tinh": gender,
+            "so_luong": quantity,
+            "don_vi_tinh": unit,
+            "trang_thai": status,
+            "mo_ta": _cell(row, "mo_ta") or None,
+            "thuong_hieu": related["thuong_hieu"],
+            "bo_suu_tap": related["bo_suu_tap"],
+        },
+        "images": images,
+        "sizes": sizes,
+        "materials": materials,
+    }
+    return record, []
+
+
+# -----------------------------------------------------------------------------
+# Ghi dữ liệu
+# -----------------------------------------------------------------------------
+
+def _get_chunk_size() -> int:
+    return config_value("PRODUCT_IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def _insert_products(rows: List[dict]) -> List[int]:
+    """Chèn một lô sản phẩm và trả về mã theo đúng thứ tự các dòng."""
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.session.execute(
+            insert(Product).returning(
+                Product.ma_san_pham, sort_by_parameter_order=True
+            ),
+            rows,
+        )
+        return list(result.scalars())
+
+    # CSDL không hỗ trợ RETURNING (MySQL): ORM chèn và lấy mã từng dòng,
+    # vẫn trong cùng transaction của lô.
+    products = [Product(**row) for row in rows]
+    db.session.add_all(products)
+    db.session.flush()
+    return [product.ma_san_pham for product in products]
+
+
+def _insert_chunk(records: List[dict]) -> List[int]:
+    """Lưu một lô sản phẩm cùng ảnh, kích thước, chất liệu và commit.
+
+    Args:
+        records: Các bản ghi đã kiểm tra bởi parse_row().
+
+    Returns:
+        list: Mã các sản phẩm vừa tạo, theo thứ tự của records.
+    """
+    product_ids = _insert_products([record["product"] for record in records])
+
+    images, sizes, materials = [], [], []
+    for product_id, record in zip(product_ids, records):
+        for position, path in enumerate(record["images"], start=1):
+            images.append(
+                {
+                    "ma_san_pham": product_id,
+                    "duong_dan": path,
+                    "anh_chinh": 1 if position == 1 else 0,
+                    "thu_tu_sap_xep": position,
+                }
+            )
+        for size, quantity in record["sizes"]:
+            sizes.append(
+                {"ma_san_pham": product_id, "ten_kich_thuoc": size, "so_luong": quantity}
+            )
+        for material_id in record["materials"]:
+            materials.append({"ma_san_pham": product_id, "ma_chat_lieu": material_id})
+
+    for model, rows in (
+        (ProductImage, images),
+        (ProductSize, sizes),
+        (ProductMaterial, materials),
+    ):
+        if rows:
+            db.session.execute(insert(model), rows)
+
+    record_new_stock(product_ids)
+    db.session.commit()
+    return product_ids
+
+
+def _save_error_message(exc: SQLAlchemyError) -> str:
+    detail = getattr(exc, "orig", None) or exc
+    return f"Lỗi khi lưu: {exc.__class__.__name__}: {detail}"
+
+
+def import_products(
+    rows: Iterable[Tuple[int, dict]],
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> ImportResult:
+    """Kiểm tra và lưu sản phẩm theo từng lô.
+
+    Mỗi lô được commit riêng; nếu một lô lỗi khi ghi, lô đó được rollback và
+    các dòng của lô được lưu lại từng dòng một, để chỉ dòng gây lỗi bị báo
+    lỗi.
+
+    Args:
+        rows: Các dòng (số dòng, dict cột -> giá trị), ví dụ từ iter_file_rows().
+        chunk_size (int, optional): Số sản phẩm mỗi lô. Mặc định lấy từ
+            PRODUCT_IMPORT_CHUNK_SIZE.
+        dry_run (bool, optional): Chỉ kiểm tra, không ghi. Defaults to False.
+
+    Returns:
+        ImportResult: Kết quả nhập.
+    """
+    chunk_size = max(1, chunk_size or _get_chunk_size())
+    result = ImportResult(dry_run=dry_run)
+    references = _load_references()
+    chunk: List[Tuple[int, dict]] = []
+
+    def flush_chunk() -> None:
+        if not chunk:
+            return
+        if dry_run:
+            result.imported += len(chunk)
+            chunk.clear()
+            return
+        try:
+            product_ids = _insert_chunk([record for _, record in chunk])
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            if len(chunk) == 1:
+                result.add_error(chunk[0][0], _save_error_message(exc))
+                chunk.clear()
+                return
+            # Lưu lại từng dòng để tìm dòng gây lỗi.
+            product_ids = []
+            for line, record in chunk:
+                try:
+                    product_ids.extend(_insert_chunk([record]))
+                except SQLAlchemyError as row_exc:
+                    db.session.rollback()
+                    result.add_error(line, _save_error_message(row_exc))
+
+        result.imported += len(product_ids)
+        if product_ids:
+            refresh_product_indexes(product_ids)
+        chunk.clear()
+
+    for line, row in rows:
+        result.total_rows += 1
+        record, errors = parse_row(row, references)
+        if errors:
+            result.add_error(line, " ".join(errors))
+            continue
+        chunk.append((line, record))
+        if len(chunk) >= chunk_size:
+            flush_chunk()
+    flush_chunk()
+
+    if result.imported and not dry_run:
+        # Tính lại toàn bộ dashboard ở lần đọc sau.
+        dashboard_metrics.invalidate()
+
+    return result
+
+
+def import_products_file(
+    stream: IO[bytes],
+    filename: str,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> ImportResult:
+    """Nhập sản phẩm từ file CSV hoặc XLSX.
+
+    Args:
+        stream: File nhị phân.
+        filename (str): Tên file (để xác định định dạng).
+        chunk_size (int, optional): Số sản phẩm mỗi lô.
+        dry_run (bool, optional): Chỉ kiểm tra, không ghi. Defaults to False.
+
+    Returns:
+        ImportResult: Kết quả nhập.
+
+    Raises:
+        ImportFileError: File không đọc được hoặc thiếu cột bắt buộc.
+    """
+    return import_products(iter_file_rows(stream, filename), chunk_size, dry_run)
@@ -1,5 +1,19 @@
 from app.extensions import db
 from app.models.product import Product
+from app.pagination import paginate_by_key
+from app.services.best_seller_service import best_sellers
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.facet_service import product_facets
+from app.services.home_rail_service import home_rails
+from app.services.inventory_ledger_service import (
+    MOVEMENT_ADJUSTMENT,
+    record_movement,
+    record_new_stock,
+)
+from app.services.search_service import product_search
+from app.services.suggestion_service import product_suggestions
+from app.services.status_count_service import count_by_status
+from app.services.user_product_service import invalidate_product_pages
 from sqlalchemy import or_, cast
 from sqlalchemy.types import String
 
@@ -36,7 +50,9 @@ def build_product_query(keyword: str, status: str):
     return query
 
 
-def get_product_page(keyword: str, status: str, page: int, per_page: int = 3):
+def get_product_page(
+    keyword: str, status: str, page: int, per_page: int = 3, cursor: str = None
+):
     """Lấy dữ liệu sản phẩm theo trang kèm thống kê.
 
     Args:
@@ -44,6 +60,8 @@ def get_product_page(keyword: str, status: str, page: int, per_page: int = 3):
         status (str): Trạng thái lọc (1, 2, 3 hoặc None).
         page (int): Trang hiện tại.
         per_page (int, optional): Số bản ghi mỗi trang. Defaults to 3.
+        cursor (str, optional): Con trỏ phân trang theo khoá; khi có thì bỏ
+            qua page. Defaults to None.
 
     Returns:
         tuple: (pagination, products, total_products, con_hang, het_hang,
@@ -51,15 +69,12 @@ def get_product_page(keyword: str, status: str, page: int, per_page: int = 3):
     """
     query = build_product_query(keyword, status)
 
-    pagination = query.order_by(Product.ma_san_pham.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
+    pagination = paginate_by_key(query, Product.ma_san_pham, page, per_page, cursor)
 
-    total_products = Product.query.filter(Product.trang_thai != 3).count()
-    con_hang = Product.query.filter_by(trang_thai=1).count()
-    het_hang = Product.query.filter_by(trang_thai=2).count()
+    status_counts = count_by_status(Product)
+    total_products = status_counts.total_excluding(3)
+    con_hang = status_counts.get(1)
+    het_hang = status_counts.get(2)
 
     san_pham_noi_bat = Product.query.filter(Product.trang_thai != 3).limit(3).all()
     ten_sp_noi_bat = ", ".join(sp.ten_san_pham for sp in san_pham_noi_bat)
@@ -74,6 +89,21 @@ def get_product_page(keyword: str, status: str, page: int, per_page: int = 3):
     )
 
 
+def refresh_product_indexes(product_ids):
+    """Cập nhật chỉ mục tìm kiếm, gợi ý, bộ lọc và các dải sản phẩm trang chủ
+    sau khi sản phẩm thay đổi.
+
+    Args:
+        product_ids: Mã các sản phẩm vừa thay đổi.
+    """
+    product_ids = list(product_ids)
+    product_search.refresh_products(product_ids)
+    product_suggestions.refresh_products(product_ids)
+    product_facets.refresh_products(product_ids)
+    best_sellers.refresh_products(product_ids)
+    home_rails.invalidate()
+
+
 def get_product_or_404(product_id: int):
     """Lấy sản phẩm theo id hoặc trả về 404.
 
@@ -128,7 +158,11 @@ def create_product(
         mo_ta=mo_ta,
     )
     db.session.add(product)
+    db.session.flush()
+    record_new_stock([product.ma_san_pham])
     db.session.commit()
+    dashboard_metrics.on_product_changed(product)
+    refresh_product_indexes([product.ma_san_pham])
     return product
 
 
@@ -163,6 +197,8 @@ def update_product(
     Returns:
         Product: Sản phẩm sau khi cập nhật.
     """
+    old_state = (product.trang_thai, product.so_luong)
+
     product.ten_san_pham = ten_san_pham
     product.gia_nhap = gia_nhap
     product.gia_xuat = gia_xuat
@@ -174,7 +210,16 @@ def update_product(
     product.trang_thai = 3 if new_status == 3 else new_status
     product.mo_ta = mo_ta
 
+    record_movement(
+        product.ma_san_pham,
+        (so_luong or 0) - (old_state[1] or 0),
+        MOVEMENT_ADJUSTMENT,
+        note="Cập nhật sản phẩm",
+    )
     db.session.commit()
+    dashboard_metrics.on_product_changed(product, old_state)
+    refresh_product_indexes([product.ma_san_pham])
+    invalidate_product_pages([product.ma_san_pham])
     return product
 
 
@@ -184,5 +229,9 @@ def soft_delete_product(product: Product):
     Args:
         product (Product): Sản phẩm cần xoá.
     """
+    old_state = (product.trang_thai, product.so_luong)
     product.trang_thai = 3
     db.session.commit()
+    dashboard_metrics.on_product_changed(product, old_state)
+    refresh_product_indexes([product.ma_san_pham])
+    invalidate_product_pages([product.ma_san_pham])
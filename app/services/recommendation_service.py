@@ -0,0 +1,233 @@
+"""
+Module service gợi ý sản phẩm theo hành vi (item-to-item, "mua cùng").
+
+Lệnh ``flask build-recommendations`` chạy ngoài request (cron) để xây ma trận
+đồng xuất hiện thưa giữa các sản phẩm:
+
+- mỗi đơn hàng (trừ đơn đã hủy) là một "giỏ" trọng số 1;
+- danh sách yêu thích của mỗi tài khoản là một "giỏ" trọng số
+  RECOMMENDATION_FAVORITE_WEIGHT.
+
+Hai sản phẩm cùng nằm trong một giỏ được cộng trọng số của giỏ. Điểm tương
+đồng là cosine ``c(i, j) / sqrt(n(i) * n(j))`` với n là tổng trọng số các giỏ
+chứa sản phẩm, để sản phẩm phổ biến không lấn át mọi danh sách. Với mỗi sản
+phẩm chỉ giữ RECOMMENDATION_TOP_K sản phẩm có điểm cao nhất, ghi vào bảng
+SanPhamGoiY.
+
+Ma trận được giữ dạng dict lồng nhau (chỉ lưu cặp khác 0) thay vì NumPy/SciPy
+để không thêm phụ thuộc. Khi phục vụ, các danh sách được nạp vào bộ nhớ của
+từng tiến trình và nạp lại định kỳ ở luồng nền (RECOMMENDATION_RELOAD_INTERVAL).
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from itertools import combinations, groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+
+from app.cache import PeriodicRefresh, config_value
+from app.constants import OrderStatus
+from app.extensions import db
+from app.models.favorite import Favorite
+from app.models.order import Order
+from app.models.order_detail import OrderDetail
+from app.models.product_recommendation import ProductRecommendation
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_RELOAD_INTERVAL = 900
+DEFAULT_TOP_K = 20
+DEFAULT_FAVORITE_WEIGHT = 0.5
+
+# Giỏ lớn hơn chỉ lấy MAX_BASKET_SIZE sản phẩm đầu (số cặp tăng theo bình phương).
+MAX_BASKET_SIZE = 50
+
+# Số dòng đọc mỗi lần khi duyệt chi tiết đơn hàng / yêu thích.
+FETCH_BATCH_SIZE = 5000
+
+# Số dòng mỗi lệnh INSERT khi ghi SanPhamGoiY.
+INSERT_BATCH_SIZE = 1000
+
+
+Basket = Tuple[List[int], float]
+
+
+# -----------------------------------------------------------------------------
+# Tính ma trận đồng xuất hiện
+# -----------------------------------------------------------------------------
+
+def _grouped(rows: Iterable[Tuple[int, int]]) -> Iterator[List[int]]:
+    """Gom các dòng (mã nhóm, mã sản phẩm) đã sắp theo nhóm thành danh sách sản phẩm."""
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        yield list(dict.fromkeys(product_id for _, product_id in group))
+
+
+def order_baskets() -> Iterator[Basket]:
+    """Các giỏ từ đơn hàng chưa hủy, trọng số 1."""
+    rows = (
+        db.session.query(OrderDetail.ma_don_hang, OrderDetail.ma_san_pham)
+        .join(Order, Order.ma_don_hang == OrderDetail.ma_don_hang)
+        .filter(Order.trang_thai != OrderStatus.CANCELLED)
+        .order_by(OrderDetail.ma_don_hang)
+        .yield_per(FETCH_BATCH_SIZE)
+    )
+    for products in _grouped(rows):
+        yield products, 1.0
+
+
+def favorite_baskets(weight: float) -> Iterator[Basket]:
+    """Các giỏ từ danh sách yêu thích của từng tài khoản (mới nhất trước)."""
+    if weight <= 0:
+        return
+    rows = (
+        db.session.query(Favorite.ma_tai_khoan, Favorite.ma_san_pham)
+        .order_by(Favorite.ma_tai_khoan, Favorite.ngay_tao.desc())
+        .yield_per(FETCH_BATCH_SIZE)
+    )
+    for products in _grouped(rows):
+        yield products, weight
+
+
+def co_occurrence(
+    baskets: Iterable[Basket],
+) -> Tuple[Dict[int, Dict[int, float]], Dict[int, float]]:
+    """Xây ma trận đồng xuất hiện thưa.
+
+    Args:
+        baskets: Các cặp (danh sách mã sản phẩm không trùng, trọng số).
+
+    Returns:
+        tuple: (pairs, counts) - pairs[i][j] là tổng trọng số các giỏ chứa cả
+        i và j (đối xứng), counts[i] là tổng trọng số các giỏ chứa i.
+    """
+    pairs: Dict[int, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    counts: Dict[int, float] = defaultdict(float)
+    for products, weight in baskets:
+        products = products[:MAX_BASKET_SIZE]
+        for product_id in products:
+            counts[product_id] += weight
+        for first, second in combinations(products, 2):
+            pairs[first][second] += weight
+            pairs[second][first] += weight
+    return pairs, counts
+
+
+def top_neighbors(
+    pairs: Dict[int, Dict[int, float]],
+    counts: Dict[int, float],
+    top_k: int,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """Chọn top_k sản phẩm tương đồng nhất (cosine) cho mỗi sản phẩm.
+
+    Args:
+        pairs: Ma trận đồng xuất hiện (xem co_occurrence()).
+        counts: Tổng trọng số theo sản phẩm.
+        top_k: Số sản phẩm gợi ý tối đa mỗi sản phẩm.
+
+    Returns:
+        dict: Mã sản phẩm -> [(mã sản phẩm gợi ý, điểm)], điểm giảm dần.
+    """
+    neighbors = {}
+    for product_id, row in pairs.items():
+        norm = counts[product_id]
+        scored = (
+            (other, weight / math.sqrt(norm * counts[other]))
+            for other, weight in row.items()
+        )
+        neighbors[product_id] = heapq.nlargest(
+            top_k, scored, key=lambda item: (item[1], -item[0])
+        )
+    return neighbors
+
+
+def build_recommendations(top_k: Optional[int] = None) -> Tuple[int, int]:
+    """Tính lại và ghi toàn bộ bảng SanPhamGoiY.
+
+    Args:
+        top_k (int, optional): Số gợi ý mỗi sản phẩm. Mặc định theo
+            RECOMMENDATION_TOP_K.
+
+    Returns:
+        tuple: (số sản phẩm có gợi ý, số dòng đã ghi).
+    """
+    top_k = top_k or config_value("RECOMMENDATION_TOP_K", DEFAULT_TOP_K)
+    favorite_weight = config_value(
+        "RECOMMENDATION_FAVORITE_WEIGHT", DEFAULT_FAVORITE_WEIGHT
+    )
+
+    def baskets() -> Iterator[Basket]:
+        yield from order_baskets()
+        yield from favorite_baskets(favorite_weight)
+
+    neighbors = top_neighbors(*co_occurrence(baskets()), top_k)
+
+    rows = [
+        {
+            "ma_san_pham": product_id,
+            "thu_hang": rank,
+            "ma_san_pham_goi_y": other,
+            "diem": score,
+        }
+        for product_id in sorted(neighbors)
+        for rank, (other, score) in enumerate(neighbors[product_id], start=1)
+    ]
+
+    db.session.execute(delete(ProductRecommendation))
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(
+            insert(ProductRecommendation), rows[start:start + INSERT_BATCH_SIZE]
+        )
+    db.session.commit()
+    recommendations.clear()
+    return len(neighbors), len(rows)
+
+
+# -----------------------------------------------------------------------------
+# Phục vụ gợi ý
+# -----------------------------------------------------------------------------
+
+class RecommendationEngine(PeriodicRefresh):
+    """Giữ danh sách gợi ý của mọi sản phẩm trong bộ nhớ tiến trình.
+
+    Danh sách được nạp từ SanPhamGoiY ở lần gọi đầu tiên và nạp lại ở luồng
+    nền sau mỗi chu kỳ (``RECOMMENDATION_RELOAD_INTERVAL``) để nhận kết quả
+    của lần chạy ``flask build-recommendations`` mới nhất; trong lúc nạp,
+    request vẫn dùng danh sách cũ.
+    """
+
+    interval_key = "RECOMMENDATION_RELOAD_INTERVAL"
+    default_interval = DEFAULT_RELOAD_INTERVAL
+    thread_name = "recommendation-reload"
+
+    def _load(self) -> Dict[int, Tuple[int, ...]]:
+        rows = db.session.query(
+            ProductRecommendation.ma_san_pham,
+            ProductRecommendation.ma_san_pham_goi_y,
+        ).order_by(ProductRecommendation.ma_san_pham, ProductRecommendation.thu_hang)
+        return {
+            product_id: tuple(other for _, other in group)
+            for product_id, group in groupby(rows, key=lambda row: row[0])
+        }
+
+    def neighbors(self, product_id: int) -> Tuple[int, ...]:
+        """Lấy mã các sản phẩm gợi ý cho một sản phẩm, phù hợp nhất trước.
+
+        Danh sách có thể chứa sản phẩm đã ngừng bán; người gọi tự lọc.
+
+        Args:
+            product_id: Mã sản phẩm.
+
+        Returns:
+            tuple: Mã sản phẩm gợi ý, rỗng nếu chưa có dữ liệu.
+        """
+        self.ensure_ready()
+        neighbors = self._data
+        return neighbors.get(product_id, ()) if neighbors else ()
+
+
+recommendations = RecommendationEngine()
@@ -0,0 +1,105 @@
+"""
+Module service nạp hàng loạt bản ghi liên quan.
+
+Các trang danh sách thường cần "gắn" thêm bản ghi liên quan cho từng dòng
+(tài khoản của đơn hàng, sản phẩm của chi tiết hóa đơn, ...). Gọi
+``Model.query.get`` cho từng dòng tạo ra N truy vấn; module này gom các mã
+cần lấy, bỏ qua những bản ghi đã có trong identity map của session và nạp
+phần còn lại bằng một truy vấn ``IN (...)`` cho mỗi bảng. Quan hệ một-nhiều
+(chi tiết của nhiều đơn hàng) được nạp bằng ``load_grouped``.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import inspect
+
+from app.extensions import db
+
+
+# Số mã tối đa trong một mệnh đề IN.
+IN_CHUNK_SIZE = 500
+
+
+def load_by_ids(model, ids: Iterable[Any], options: Sequence = ()) -> Dict[Any, Any]:
+    """Nạp các bản ghi theo khoá chính bằng truy vấn IN.
+
+    Bản ghi đã có trong session được dùng lại, không truy vấn lại.
+
+    Args:
+        model: Model SQLAlchemy (khoá chính một cột).
+        ids: Các giá trị khoá chính (bỏ qua None và trùng lặp).
+        options: Các loader option (ví dụ selectinload) áp dụng khi truy vấn.
+
+    Returns:
+        dict: Khoá chính -> bản ghi. Mã không tồn tại sẽ không có trong dict.
+    """
+    mapper = inspect(model)
+    pk_column = mapper.primary_key[0]
+    identity_map = db.session.identity_map
+
+    found: Dict[Any, Any] = {}
+    missing = []
+    for pk in dict.fromkeys(pk for pk in ids if pk is not None):
+        instance = None
+        # Có loader option thì phải truy vấn lại để option được áp dụng.
+        if not options:
+            instance = identity_map.get(mapper.identity_key_from_primary_key([pk]))
+        if instance is not None:
+            found[pk] = instance
+        else:
+            missing.append(pk)
+
+    attribute = mapper.get_property_by_column(pk_column).key
+    for start in range(0, len(missing), IN_CHUNK_SIZE):
+        chunk = missing[start:start + IN_CHUNK_SIZE]
+        query = model.query.options(*options).filter(pk_column.in_(chunk))
+        for instance in query:
+            found[getattr(instance, attribute)] = instance
+
+    return found
+
+
+def load_related(rows: Iterable[Any], model, foreign_key: str, options: Sequence = ()) -> Dict[Any, Any]:
+    """Nạp các bản ghi liên quan của một danh sách dòng.
+
+    Args:
+        rows: Các dòng cần gắn bản ghi liên quan.
+        model: Model của bản ghi liên quan.
+        foreign_key: Tên thuộc tính trên dòng chứa khoá của bản ghi liên quan.
+        options: Các loader option áp dụng khi truy vấn.
+
+    Returns:
+        dict: Khoá -> bản ghi liên quan, tra cứu bằng
+        ``related.get(getattr(row, foreign_key))``.
+    """
+    return load_by_ids(
+        model, (getattr(row, foreign_key, None) for row in rows), options
+    )
+
+
+def load_grouped(model, foreign_key: str, ids: Iterable[Any], order_by=None) -> Dict[Any, List[Any]]:
+    """Nạp các bản ghi con của nhiều bản ghi cha, gom theo khoá ngoại.
+
+    Args:
+        model: Model của bản ghi con.
+        foreign_key: Tên thuộc tính khoá ngoại trên bản ghi con.
+        ids: Các mã bản ghi cha (bỏ qua None và trùng lặp).
+        order_by: Thứ tự các bản ghi con trong mỗi nhóm. Mặc định theo khoá chính.
+
+    Returns:
+        dict: Mã bản ghi cha -> danh sách bản ghi con. Bản ghi cha không có
+        bản ghi con nào sẽ không có trong dict.
+    """
+    column = getattr(model, foreign_key)
+    if order_by is None:
+        order_by = inspect(model).primary_key[0]
+
+    ids = list(dict.fromkeys(pk for pk in ids if pk is not None))
+    grouped: Dict[Any, List[Any]] = {}
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        query = model.query.filter(column.in_(chunk)).order_by(order_by)
+        for instance in query:
+            grouped.setdefault(getattr(instance, foreign_key), []).append(instance)
+
+    return grouped
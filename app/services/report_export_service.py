@@ -0,0 +1,279 @@
+"""
+Module service xuất báo cáo ra file Excel.
+
+Workbook được tạo ở chế độ write-only của openpyxl: mỗi dòng được ghi thẳng
+xuống file tạm trên đĩa thay vì giữ cả bảng tính trong bộ nhớ. Dữ liệu đơn
+hàng và chi tiết đơn hàng được đọc bằng server-side cursor (``yield_per``),
+nên bộ nhớ dùng khi xuất không phụ thuộc số đơn hàng trong khoảng thời gian.
+"""
+
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import IO, Iterator, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from app.constants import OrderStatus
+from app.extensions import db
+from app.models.account import Account
+from app.models.order import Order
+from app.models.order_detail import OrderDetail
+from app.models.product import Product
+
+
+# Số dòng đọc mỗi lần từ server-side cursor.
+EXPORT_BATCH_SIZE = 1000
+
+# Bộ nhớ tối đa của file tạm trước khi chuyển xuống đĩa.
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_HEADER_FONT = Font(bold=True)
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def parse_export_date(value: Optional[str]) -> Optional[date]:
+    """Chuyển chuỗi YYYY-MM-DD thành ngày, None nếu rỗng hoặc sai định dạng.
+
+    Args:
+        value (str | None): Chuỗi ngày.
+
+    Returns:
+        date | None: Ngày đã chuyển đổi.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _date_criteria(column, date_from: Optional[date], date_to: Optional[date]) -> list:
+    """Điều kiện lọc khoảng ngày (bao gồm cả hai đầu) trên cột datetime."""
+    criteria = []
+    if date_from:
+        criteria.append(column >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        criteria.append(
+            column < datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        )
+    return criteria
+
+
+def _append_header(worksheet, titles: Sequence[str]) -> None:
+    """Ghi dòng tiêu đề in đậm và cố định dòng đầu."""
+    row = []
+    for title in titles:
+        cell = WriteOnlyCell(worksheet, value=title)
+        cell.font = _HEADER_FONT
+        row.append(cell)
+    worksheet.freeze_panes = "A2"
+    worksheet.append(row)
+
+
+def _money(value) -> float:
+    return float(value or 0)
+
+
+# -----------------------------------------------------------------------------
+# Đọc dữ liệu theo lô
+# -----------------------------------------------------------------------------
+
+def iter_order_rows(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Iterator[list]:
+    """Duyệt các đơn hàng trong khoảng ngày, mỗi lần đọc một lô.
+
+    Args:
+        date_from (date, optional): Ngày bắt đầu.
+        date_to (date, optional): Ngày kết thúc.
+
+    Yields:
+        list: [mã đơn, ngày tạo, khách hàng, email, trạng thái, tổng tiền].
+    """
+    query = (
+        db.session.query(
+            Order.ma_don_hang,
+            Order.ngay_tao,
+            Account.ho_ten,
+            Account.email,
+            Order.trang_thai,
+            Order.tong_tien_tam_tinh,
+        )
+        .outerjoin(Account, Account.ma_tai_khoan == Order.ma_tai_khoan)
+        .filter(*_date_criteria(Order.ngay_tao, date_from, date_to))
+        .order_by(Order.ma_don_hang)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for order_id, created_at, name, email, status, total in query:
+        yield [
+            order_id,
+            created_at,
+            name,
+            email,
+            OrderStatus.get_label(status),
+            _money(total),
+        ]
+
+
+def iter_order_line_rows(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Iterator[list]:
+    """Duyệt chi tiết các đơn hàng trong khoảng ngày, mỗi lần đọc một lô.
+
+    Args:
+        date_from (date, optional): Ngày bắt đầu.
+        date_to (date, optional): Ngày kết thúc.
+
+    Yields:
+        list: [mã đơn, ngày tạo, mã sản phẩm, tên sản phẩm, số lượng,
+        đơn giá, thành tiền].
+    """
+    query = (
+        db.session.query(
+            OrderDetail.ma_don_hang,
+            Order.ngay_tao,
+            OrderDetail.ma_san_pham,
+            Product.ten_san_pham,
+            OrderDetail.so_luong,
+            OrderDetail.don_gia,
+            OrderDetail.thanh_tien,
+        )
+        .join(Order, Order.ma_don_hang == OrderDetail.ma_don_hang)
+        .outerjoin(Product, Product.ma_san_pham == OrderDetail.ma_san_pham)
+        .filter(*_date_criteria(Order.ngay_tao, date_from, date_to))
+        .order_by(OrderDetail.ma_don_hang, OrderDetail.ma_chi_tiet_don_hang)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for order_id, created_at, product_id, name, quantity, price, amount in query:
+        yield [
+            order_id,
+            created_at,
+            product_id,
+            name,
+            quantity,
+            _money(price),
+            _money(amount),
+        ]
+
+
+# -----------------------------------------------------------------------------
+# Ghi workbook
+# -----------------------------------------------------------------------------
+
+def write_report_workbook(
+    report_data: dict,
+    output: IO[bytes],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> None:
+    """Ghi báo cáo (tổng quan, theo kỳ, trạng thái, đơn hàng, chi tiết) ra file xlsx.
+
+    Args:
+        report_data (dict): Dữ liệu từ build_report_data().
+        output: File nhị phân để ghi workbook.
+        date_from (date, optional): Ngày bắt đầu của các sheet đơn hàng.
+        date_to (date, optional): Ngày kết thúc của các sheet đơn hàng.
+    """
+    revenue = report_data["revenue_stats"]
+    purchase = report_data["purchase_stats"]
+
+    wb = Workbook(write_only=True)
+
+    period = report_data["period"]
+
+    ws_summary = wb.create_sheet(title="Tổng quan")
+    _append_header(ws_summary, ["Thông tin", "Giá trị"])
+    ws_summary.append(["Khoảng thời gian", period["label"]])
+    ws_summary.append(["Tổng doanh thu", revenue["total_revenue"]])
+    ws_summary.append(["Tổng lượt mua", purchase["total_orders"]])
+    ws_summary.append(["Giá trị đơn trung bình", purchase["avg_order_value"]])
+    ws_summary.append(["Tỷ lệ huỷ đơn (%)", purchase["cancel_rate"]])
+    if period["compare_period_label"]:
+        ws_summary.append([f"So sánh ({period['compare_label']})", period["compare_period_label"]])
+        ws_summary.append(["Doanh thu kỳ so sánh", revenue["previous_revenue"]])
+        ws_summary.append(["Tăng trưởng doanh thu (%)", revenue["growth_percent"]])
+        ws_summary.append(["Lượt mua kỳ so sánh", purchase["previous_orders"]])
+        ws_summary.append(["Tăng trưởng lượt mua (%)", purchase["growth_percent"]])
+
+    ws_series = wb.create_sheet(title=f"Theo {period['granularity_label'].lower()}")
+    _append_header(ws_series, [period["granularity_label"], "Từ ngày", "Doanh thu", "Lượt mua"])
+    for revenue_item, order_item in zip(revenue["series"], purchase["series"]):
+        ws_series.append(
+            [
+                revenue_item["date"],
+                revenue_item["start"],
+                revenue_item["amount"],
+                order_item["total"],
+            ]
+        )
+
+    ws_status = wb.create_sheet(title="Trạng thái đơn hàng")
+    _append_header(ws_status, ["Trạng thái", "Số đơn", "Tỷ lệ (%)"])
+    for item in report_data["status_breakdown"]:
+        ws_status.append([item["label"], item["value"], item["percent"]])
+
+    ws_orders = wb.create_sheet(title="Đơn hàng")
+    _append_header(
+        ws_orders,
+        ["Mã đơn hàng", "Ngày tạo", "Khách hàng", "Email", "Trạng thái", "Tổng tiền"],
+    )
+    for row in iter_order_rows(date_from, date_to):
+        ws_orders.append(row)
+
+    ws_lines = wb.create_sheet(title="Chi tiết đơn hàng")
+    _append_header(
+        ws_lines,
+        [
+            "Mã đơn hàng",
+            "Ngày tạo",
+            "Mã sản phẩm",
+            "Tên sản phẩm",
+            "Số lượng",
+            "Đơn giá",
+            "Thành tiền",
+        ],
+    )
+    for row in iter_order_line_rows(date_from, date_to):
+        ws_lines.append(row)
+
+    wb.save(output)
+
+
+def export_report_file(
+    report_data: dict,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> IO[bytes]:
+    """Xuất báo cáo ra file tạm, sẵn sàng để gửi theo từng đoạn.
+
+    File tạm nằm trong bộ nhớ khi nhỏ hơn SPOOL_MAX_SIZE và tự chuyển xuống
+    đĩa khi lớn hơn; file bị xoá khi đóng.
+
+    Args:
+        report_data (dict): Dữ liệu từ build_report_data().
+        date_from (date, optional): Ngày bắt đầu của các sheet đơn hàng.
+        date_to (date, optional): Ngày kết thúc của các sheet đơn hàng.
+
+    Returns:
+        File nhị phân đã ghi xong, con trỏ ở đầu file.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        write_report_workbook(report_data, output, date_from, date_to)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
@@ -1,163 +1,304 @@
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Tuple
+from typing import Dict, List, Optional
 
-from sqlalchemy import func
+from app.models.daily_sales import DailySales
 
-from app.extensions import db
-from app.models.invoice import Invoice
-from app.models.order import Order
 
+# Độ chi tiết của chuỗi số liệu và cách so sánh được hỗ trợ.
+GRANULARITIES = {
+    "day": "Ngày",
+    "week": "Tuần",
+    "month": "Tháng",
+}
 
-def _month_boundaries(today: date) -> Tuple[datetime, datetime, datetime, datetime]:
-    """Tính mốc thời gian đầu/cuối tháng hiện tại và tháng trước."""
-    start_current = date(today.year, today.month, 1)
-    start_last = (start_current - timedelta(days=1)).replace(day=1)
-    end_last = datetime.combine(start_current, datetime.min.time()) - timedelta(seconds=1)
-    return (
-        datetime.combine(start_current, datetime.min.time()),
-        datetime.combine(today, datetime.max.time()),
-        datetime.combine(start_last, datetime.min.time()),
-        end_last,
-    )
+COMPARISONS = {
+    "previous": "Kỳ trước",
+    "last_year": "Cùng kỳ năm trước",
+    "none": "Không so sánh",
+}
 
+DEFAULT_RANGE_DAYS = 30
+DEFAULT_GRANULARITY = "day"
+DEFAULT_COMPARISON = "previous"
 
-def _safe_percent_change(current: float, previous: float) -> float:
-    """Tính % thay đổi, trả về 0 nếu không có dữ liệu so sánh."""
-    if previous in (0, None):
-        return 0.0
-    return round(((current - previous) / previous) * 100, 2)
+# Khoảng báo cáo dài nhất (ngày), tránh sinh chuỗi quá lớn.
+MAX_RANGE_DAYS = 3 * 366
 
+_SUMMED_COLUMNS = (
+    "doanh_thu",
+    "so_hoa_don",
+    "so_don_hang",
+    "so_don_cho_xu_ly",
+    "so_don_dang_xu_ly",
+    "so_don_dang_giao",
+    "so_don_hoan_thanh",
+    "so_don_da_huy",
+)
 
-def get_revenue_stats(days: int = 30):
-    """Tính toán các chỉ số doanh thu."""
-    today = date.today()
-    start_current, end_current, start_last, end_last = _month_boundaries(today)
-    days_ago = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
 
-    base_query = Invoice.query.filter(Invoice.trang_thai != 3)
+# -----------------------------------------------------------------------------
+# Khoảng thời gian
+# -----------------------------------------------------------------------------
 
-    total_revenue = (
-        db.session.query(func.coalesce(func.sum(Invoice.tong_tien_tam_tinh), 0))
-        .filter(Invoice.trang_thai != 3)
-        .scalar()
-        or 0
-    )
+@dataclass(frozen=True)
+class ReportPeriod:
+    """Khoảng ngày của báo cáo (bao gồm cả hai đầu)."""
 
-    revenue_this_month = (
-        db.session.query(func.coalesce(func.sum(Invoice.tong_tien_tam_tinh), 0))
-        .filter(Invoice.trang_thai != 3, Invoice.ngay_tao >= start_current, Invoice.ngay_tao <= end_current)
-        .scalar()
-        or 0
-    )
+    date_from: date
+    date_to: date
 
-    revenue_last_month = (
-        db.session.query(func.coalesce(func.sum(Invoice.tong_tien_tam_tinh), 0))
-        .filter(Invoice.trang_thai != 3, Invoice.ngay_tao >= start_last, Invoice.ngay_tao <= end_last)
-        .scalar()
-        or 0
-    )
+    @property
+    def days(self) -> int:
+        return (self.date_to - self.date_from).days + 1
 
-    daily_revenue_rows = (
-        base_query.filter(Invoice.ngay_tao >= days_ago)
-        .with_entities(func.date(Invoice.ngay_tao).label("day"), func.coalesce(func.sum(Invoice.tong_tien_tam_tinh), 0).label("amount"))
-        .group_by(func.date(Invoice.ngay_tao))
-        .order_by(func.date(Invoice.ngay_tao))
-        .all()
-    )
+    @property
+    def label(self) -> str:
+        return f"{self.date_from:%d/%m/%Y} - {self.date_to:%d/%m/%Y}"
 
-    daily_revenue = [
-        {"date": row.day.strftime("%d/%m"), "amount": float(row.amount or 0)}
-        for row in daily_revenue_rows
-    ]
+    def previous(self) -> "ReportPeriod":
+        """Khoảng cùng độ dài ngay trước khoảng này."""
+        end = self.date_from - timedelta(days=1)
+        return ReportPeriod(end - timedelta(days=self.days - 1), end)
 
-    return {
-        "total_revenue": float(total_revenue),
-        "revenue_this_month": float(revenue_this_month),
-        "revenue_last_month": float(revenue_last_month),
-        "growth_percent": _safe_percent_change(revenue_this_month, revenue_last_month),
-        "daily_revenue": daily_revenue,
-    }
+    def last_year(self) -> "ReportPeriod":
+        """Cùng khoảng ngày của năm trước (29/02 lùi về 28/02)."""
+        return ReportPeriod(_shift_year(self.date_from), _shift_year(self.date_to))
 
 
-def get_purchase_stats(days: int = 30):
-    """Tính toán các chỉ số lượt mua (đơn hàng)."""
-    today = date.today()
-    start_current, end_current, start_last, end_last = _month_boundaries(today)
-    days_ago = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+def _shift_year(day: date) -> date:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        return day.replace(year=day.year - 1, day=28)
 
-    total_orders = Order.query.count()
-    delivered = Order.query.filter_by(trang_thai=3).count()
-    cancelled = Order.query.filter_by(trang_thai=4).count()
-    pending = Order.query.filter(Order.trang_thai.in_([0, 1, 2])).count()
 
-    orders_this_month = (
-        Order.query.filter(Order.ngay_tao >= start_current, Order.ngay_tao <= end_current).count()
-    )
-    orders_last_month = (
-        Order.query.filter(Order.ngay_tao >= start_last, Order.ngay_tao <= end_last).count()
-    )
+def resolve_report_period(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> ReportPeriod:
+    """Chuẩn hoá khoảng báo cáo từ tham số người dùng.
+
+    Thiếu ngày kết thúc thì lấy hôm nay theo giờ UTC (DoanhThuNgay được ghi
+    theo ngày UTC của đơn hàng); thiếu ngày bắt đầu thì lấy
+    DEFAULT_RANGE_DAYS ngày tính đến ngày kết thúc. Khoảng bị đảo ngược sẽ
+    được đổi chỗ và bị cắt bớt nếu dài hơn MAX_RANGE_DAYS.
+
+    Args:
+        date_from (date, optional): Ngày bắt đầu.
+        date_to (date, optional): Ngày kết thúc.
+
+    Returns:
+        ReportPeriod: Khoảng báo cáo hợp lệ.
+    """
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        date_from = date_to - timedelta(days=MAX_RANGE_DAYS - 1)
+    return ReportPeriod(date_from, date_to)
+
+
+def comparison_period(period: ReportPeriod, compare: str) -> Optional[ReportPeriod]:
+    """Khoảng dùng để so sánh, None nếu không so sánh."""
+    if compare == "previous":
+        return period.previous()
+    if compare == "last_year":
+        return period.last_year()
+    return None
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Ngày đầu của nhóm (ngày / tuần bắt đầu thứ Hai / tháng) chứa ``day``."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _bucket_label(start: date, granularity: str) -> str:
+    if granularity == "week":
+        return f"Tuần {start:%d/%m}"
+    if granularity == "month":
+        return f"{start:%m/%Y}"
+    return f"{start:%d/%m}"
+
 
-    daily_orders_rows = (
-        Order.query.filter(Order.ngay_tao >= days_ago)
-        .with_entities(func.date(Order.ngay_tao).label("day"), func.count(Order.ma_don_hang).label("total"))
-        .group_by(func.date(Order.ngay_tao))
-        .order_by(func.date(Order.ngay_tao))
+# -----------------------------------------------------------------------------
+# Đọc bảng tổng hợp
+# -----------------------------------------------------------------------------
+
+def _load_daily(period: ReportPeriod) -> List[DailySales]:
+    """Đọc các dòng tổng hợp theo ngày trong khoảng (quét theo khoá chính)."""
+    return (
+        DailySales.query.filter(
+            DailySales.ngay >= period.date_from,
+            DailySales.ngay <= period.date_to,
+        )
+        .order_by(DailySales.ngay)
         .all()
     )
 
-    daily_orders = [
-        {"date": row.day.strftime("%d/%m"), "total": int(row.total or 0)}
-        for row in daily_orders_rows
-    ]
 
-    cancel_rate = round((cancelled / total_orders) * 100, 2) if total_orders else 0.0
+def _totals(rows: List[DailySales]) -> Dict[str, float]:
+    totals = {column: 0 for column in _SUMMED_COLUMNS}
+    for row in rows:
+        for column in _SUMMED_COLUMNS:
+            totals[column] += getattr(row, column) or 0
+    totals["doanh_thu"] = float(totals["doanh_thu"])
+    return totals
 
-    return {
-        "total_orders": total_orders,
-        "delivered": delivered,
-        "cancelled": cancelled,
-        "pending": pending,
-        "orders_this_month": orders_this_month,
-        "orders_last_month": orders_last_month,
-        "growth_percent": _safe_percent_change(orders_this_month, orders_last_month),
-        "daily_orders": daily_orders,
-        "cancel_rate": cancel_rate,
-    }
 
+def _series(rows: List[DailySales], period: ReportPeriod, granularity: str) -> List[dict]:
+    """Gom các dòng theo ngày thành chuỗi theo nhóm, kể cả nhóm không có dữ liệu."""
+    buckets: Dict[date, dict] = {}
+    start = bucket_start(period.date_from, granularity)
+    while start <= period.date_to:
+        buckets[start] = {
+            "date": _bucket_label(start, granularity),
+            "start": start,
+            "amount": 0.0,
+            "total": 0,
+        }
+        start = _next_bucket(start, granularity)
+
+    for row in rows:
+        bucket = buckets[bucket_start(row.ngay, granularity)]
+        bucket["amount"] += float(row.doanh_thu or 0)
+        bucket["total"] += row.so_don_hang or 0
+
+    return list(buckets.values())
+
+
+def _safe_percent_change(current: float, previous: float) -> float:
+    """Tính % thay đổi, trả về 0 nếu không có dữ liệu so sánh."""
+    if previous in (0, None):
+        return 0.0
+    return round(((current - previous) / previous) * 100, 2)
 
-def build_report_data():
-    """Tổng hợp dữ liệu cho trang báo cáo."""
-    revenue_stats = get_revenue_stats()
-    purchase_stats = get_purchase_stats()
+
+def _percent(value: int, total: int) -> float:
+    return round((value / total) * 100, 1) if total else 0.0
+
+
+# -----------------------------------------------------------------------------
+# Dữ liệu báo cáo
+# -----------------------------------------------------------------------------
+
+def build_report_data(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    granularity: str = DEFAULT_GRANULARITY,
+    compare: str = DEFAULT_COMPARISON,
+):
+    """Tổng hợp dữ liệu cho trang báo cáo và file Excel.
+
+    Mọi số liệu được đọc từ bảng tổng hợp theo ngày (DoanhThuNgay), nên chi
+    phí chỉ phụ thuộc số ngày trong khoảng, không phụ thuộc số đơn hàng.
+
+    Args:
+        date_from (date, optional): Ngày bắt đầu. Mặc định 30 ngày gần nhất.
+        date_to (date, optional): Ngày kết thúc. Mặc định hôm nay.
+        granularity (str, optional): "day", "week" hoặc "month".
+        compare (str, optional): "previous", "last_year" hoặc "none".
+
+    Returns:
+        dict: revenue_stats, purchase_stats, status_breakdown và period.
+    """
+    if granularity not in GRANULARITIES:
+        granularity = DEFAULT_GRANULARITY
+    if compare not in COMPARISONS:
+        compare = DEFAULT_COMPARISON
+
+    period = resolve_report_period(date_from, date_to)
+    previous_period = comparison_period(period, compare)
+
+    rows = _load_daily(period)
+    current = _totals(rows)
+    previous = _totals(_load_daily(previous_period)) if previous_period else None
+
+    total_orders = int(current["so_don_hang"])
+    delivered = int(current["so_don_hoan_thanh"])
+    cancelled = int(current["so_don_da_huy"])
+    pending = int(
+        current["so_don_cho_xu_ly"]
+        + current["so_don_dang_xu_ly"]
+        + current["so_don_dang_giao"]
+    )
+    cancel_rate = round((cancelled / total_orders) * 100, 2) if total_orders else 0.0
 
     avg_order_value = 0.0
-    if purchase_stats["total_orders"]:
-        avg_order_value = round(revenue_stats["total_revenue"] / purchase_stats["total_orders"], 2)
+    if total_orders:
+        avg_order_value = round(current["doanh_thu"] / total_orders, 2)
+
+    series = _series(rows, period, granularity)
 
     return {
-        "revenue_stats": revenue_stats,
-        "purchase_stats": {**purchase_stats, "avg_order_value": avg_order_value},
+        "period": {
+            "date_from": period.date_from,
+            "date_to": period.date_to,
+            "label": period.label,
+            "granularity": granularity,
+            "granularity_label": GRANULARITIES[granularity],
+            "compare": compare,
+            "compare_label": COMPARISONS[compare],
+            "compare_period_label": previous_period.label if previous_period else None,
+        },
+        "revenue_stats": {
+            "total_revenue": current["doanh_thu"],
+            "total_invoices": int(current["so_hoa_don"]),
+            "previous_revenue": previous["doanh_thu"] if previous else None,
+            "growth_percent": _safe_percent_change(
+                current["doanh_thu"], previous["doanh_thu"] if previous else 0
+            ),
+            "series": [
+                {"date": item["date"], "start": item["start"], "amount": item["amount"]}
+                for item in series
+            ],
+        },
+        "purchase_stats": {
+            "total_orders": total_orders,
+            "delivered": delivered,
+            "cancelled": cancelled,
+            "pending": pending,
+            "previous_orders": int(previous["so_don_hang"]) if previous else None,
+            "growth_percent": _safe_percent_change(
+                total_orders, previous["so_don_hang"] if previous else 0
+            ),
+            "series": [
+                {"date": item["date"], "start": item["start"], "total": item["total"]}
+                for item in series
+            ],
+            "cancel_rate": cancel_rate,
+            "avg_order_value": avg_order_value,
+        },
         "status_breakdown": [
             {
                 "label": "Đã giao",
-                "value": purchase_stats["delivered"],
-                "percent": round((purchase_stats["delivered"] / purchase_stats["total_orders"]) * 100, 1)
-                if purchase_stats["total_orders"]
-                else 0.0,
+                "value": delivered,
+                "percent": _percent(delivered, total_orders),
                 "color": "bg-emerald-500",
             },
             {
                 "label": "Đang xử lý",
-                "value": purchase_stats["pending"],
-                "percent": round((purchase_stats["pending"] / purchase_stats["total_orders"]) * 100, 1)
-                if purchase_stats["total_orders"]
-                else 0.0,
+                "value": pending,
+                "percent": _percent(pending, total_orders),
                 "color": "bg-amber-400",
             },
             {
                 "label": "Đã hủy",
-                "value": purchase_stats["cancelled"],
-                "percent": purchase_stats["cancel_rate"],
+                "value": cancelled,
+                "percent": cancel_rate,
                 "color": "bg-rose-500",
             },
         ],
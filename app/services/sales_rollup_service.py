@@ -0,0 +1,388 @@
+"""
+Module service bảng tổng hợp bán hàng theo ngày.
+
+Trang báo cáo đọc doanh thu, số đơn hàng theo trạng thái và số lượng bán của
+từng sản phẩm từ hai bảng tổng hợp DoanhThuNgay và SanPhamBanNgay thay vì
+quét HoaDon/DonHang mỗi lần tải trang.
+
+Các bảng được cập nhật dần bằng lệnh ``UPDATE cột = cột + delta`` (upsert)
+ngay trong transaction của thao tác ghi đơn hàng/hóa đơn, nên luôn khớp với
+dữ liệu gốc sau khi commit. Lệnh ``flask backfill-sales-rollup`` tính lại
+toàn bộ (hoặc một khoảng ngày) từ dữ liệu gốc, dùng khi triển khai lần đầu
+hoặc khi dữ liệu bị sửa trực tiếp trong cơ sở dữ liệu.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.constants import OrderStatus
+from app.extensions import db
+from app.models.daily_product_sales import DailyProductSales
+from app.models.daily_sales import DailySales
+from app.models.invoice import Invoice
+from app.models.invoice_detail import InvoiceDetail
+from app.models.order import Order
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+# Cột đếm đơn hàng tương ứng với từng trạng thái.
+ORDER_STATUS_COLUMNS = {
+    OrderStatus.PENDING: "so_don_cho_xu_ly",
+    OrderStatus.PROCESSING: "so_don_dang_xu_ly",
+    OrderStatus.SHIPPING: "so_don_dang_giao",
+    OrderStatus.COMPLETED: "so_don_hoan_thanh",
+    OrderStatus.CANCELLED: "so_don_da_huy",
+}
+
+# Trạng thái hóa đơn đã xóa (không tính doanh thu).
+INVOICE_DELETED = 3
+
+# Số dòng mỗi lệnh INSERT khi tính lại.
+BACKFILL_BATCH_SIZE = 1000
+
+_UPSERT_INSERTS = {
+    "mysql": mysql_insert,
+    "mariadb": mysql_insert,
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+# -----------------------------------------------------------------------------
+# Hàm hỗ trợ
+# -----------------------------------------------------------------------------
+
+def _as_date(value) -> Optional[date]:
+    """Chuyển giá trị ngày/giờ (hoặc chuỗi từ func.date) thành date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _money(value) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def increment_counters(model, keys: Dict[str, object], deltas: Dict[str, object]) -> None:
+    """Cộng dồn các cột của một dòng tổng hợp, tạo dòng nếu chưa có.
+
+    Args:
+        model: Model bảng tổng hợp.
+        keys: Giá trị khoá chính của dòng.
+        deltas: Cột -> lượng cần cộng thêm (có thể âm).
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    table = model.__table__
+    values = {**keys, **deltas}
+    dialect_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+
+    if dialect_insert is mysql_insert:
+        stmt = mysql_insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            {column: table.c[column] + stmt.inserted[column] for column in deltas}
+        )
+        db.session.execute(stmt)
+        return
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + stmt.excluded[column] for column in deltas},
+        )
+        db.session.execute(stmt)
+        return
+
+    # CSDL khác: cập nhật trước, chưa có dòng thì chèn mới.
+    result = db.session.execute(
+        update(table)
+        .where(*(table.c[column] == value for column, value in keys.items()))
+        .values({column: table.c[column] + delta for column, delta in deltas.items()})
+    )
+    if not result.rowcount:
+        db.session.execute(insert(table).values(**values))
+
+
+def _is_counted_invoice(status: Optional[int]) -> bool:
+    # Khớp với điều kiện SQL "trang_thai != 3" của backfill (loại cả NULL).
+    return status is not None and status != INVOICE_DELETED
+
+
+def _add_invoice_lines(day: date, lines: Iterable, sign: int) -> None:
+    """Cộng (sign=1) hoặc trừ (sign=-1) số lượng bán của các chi tiết hóa đơn."""
+    totals: Dict[int, Tuple[int, Decimal]] = {}
+    for line in lines:
+        quantity, amount = totals.get(line.ma_san_pham, (0, Decimal("0")))
+        totals[line.ma_san_pham] = (
+            quantity + (line.so_luong or 0),
+            amount + _money(line.thanh_tien),
+        )
+
+    for product_id, (quantity, amount) in totals.items():
+        increment_counters(
+            DailyProductSales,
+            {"ngay": day, "ma_san_pham": product_id},
+            {"so_luong_ban": sign * quantity, "doanh_thu": sign * amount},
+        )
+
+
+# -----------------------------------------------------------------------------
+# Cập nhật dần (gọi trước commit của thao tác ghi)
+# -----------------------------------------------------------------------------
+
+def record_order_created(order: Order) -> None:
+    """Ghi nhận đơn hàng mới (đơn hàng phải đã được flush để có ngay_tao).
+
+    Args:
+        order (Order): Đơn hàng vừa tạo.
+    """
+    day = _as_date(order.ngay_tao)
+    if day is None:
+        return
+
+    deltas = {"so_don_hang": 1}
+    status_column = ORDER_STATUS_COLUMNS.get(order.trang_thai)
+    if status_column:
+        deltas[status_column] = 1
+    increment_counters(DailySales, {"ngay": day}, deltas)
+
+
+def record_order_status_changed(order: Order, old_status: Optional[int]) -> None:
+    """Chuyển đơn hàng sang cột trạng thái mới trong ngày tạo đơn.
+
+    Args:
+        order (Order): Đơn hàng đã đổi trạng thái.
+        old_status (int | None): Trạng thái trước khi đổi.
+    """
+    day = _as_date(order.ngay_tao)
+    if day is None or old_status == order.trang_thai:
+        return
+
+    deltas: Dict[str, int] = defaultdict(int)
+    old_column = ORDER_STATUS_COLUMNS.get(old_status)
+    new_column = ORDER_STATUS_COLUMNS.get(order.trang_thai)
+    if old_column:
+        deltas[old_column] -= 1
+    if new_column:
+        deltas[new_column] += 1
+    increment_counters(DailySales, {"ngay": day}, deltas)
+
+
+def record_invoice_created(invoice: Invoice, lines: Iterable = ()) -> None:
+    """Cộng doanh thu và số lượng bán của hóa đơn mới.
+
+    Args:
+        invoice (Invoice): Hóa đơn vừa tạo.
+        lines: Các chi tiết của hóa đơn (nếu có).
+    """
+    day = _as_date(invoice.ngay_tao)
+    if day is None or not _is_counted_invoice(invoice.trang_thai):
+        return
+
+    increment_counters(
+        DailySales,
+        {"ngay": day},
+        {"doanh_thu": _money(invoice.tong_tien_tam_tinh), "so_hoa_don": 1},
+    )
+    _add_invoice_lines(day, lines, 1)
+
+
+def record_invoice_changed(
+    invoice: Invoice,
+    old_status: Optional[int],
+    old_amount,
+) -> None:
+    """Điều chỉnh tổng hợp khi hóa đơn đổi tổng tiền hoặc bị xóa/khôi phục.
+
+    Args:
+        invoice (Invoice): Hóa đơn sau khi thay đổi.
+        old_status (int | None): Trạng thái trước khi thay đổi.
+        old_amount: Tổng tiền trước khi thay đổi.
+    """
+    day = _as_date(invoice.ngay_tao)
+    if day is None:
+        return
+
+    was_counted = int(_is_counted_invoice(old_status))
+    is_counted = int(_is_counted_invoice(invoice.trang_thai))
+
+    increment_counters(
+        DailySales,
+        {"ngay": day},
+        {
+            "doanh_thu": is_counted * _money(invoice.tong_tien_tam_tinh)
+            - was_counted * _money(old_amount),
+            "so_hoa_don": is_counted - was_counted,
+        },
+    )
+
+    if is_counted != was_counted:
+        lines = InvoiceDetail.query.filter_by(ma_hoa_don=invoice.ma_hoa_don).all()
+        _add_invoice_lines(day, lines, is_counted - was_counted)
+
+
+def record_invoice_line_changed(
+    invoice_id: int,
+    product_id: int,
+    quantity_delta: int,
+    amount_delta,
+) -> None:
+    """Điều chỉnh số lượng bán khi chi tiết hóa đơn được thêm, sửa hoặc xóa.
+
+    Args:
+        invoice_id (int): Mã hóa đơn chứa chi tiết.
+        product_id (int): Mã sản phẩm của chi tiết.
+        quantity_delta (int): Thay đổi số lượng.
+        amount_delta: Thay đổi thành tiền.
+    """
+    invoice = db.session.get(Invoice, invoice_id)
+    if invoice is None or not _is_counted_invoice(invoice.trang_thai):
+        return
+    day = _as_date(invoice.ngay_tao)
+    if day is None:
+        return
+
+    increment_counters(
+        DailyProductSales,
+        {"ngay": day, "ma_san_pham": product_id},
+        {"so_luong_ban": quantity_delta, "doanh_thu": _money(amount_delta)},
+    )
+
+
+# -----------------------------------------------------------------------------
+# Tính lại từ dữ liệu gốc
+# -----------------------------------------------------------------------------
+
+def _range_criteria(column, date_from: Optional[date], date_to: Optional[date]) -> list:
+    criteria = [column.isnot(None)]
+    if date_from:
+        criteria.append(column >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        criteria.append(
+            column < datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        )
+    return criteria
+
+
+def _insert_rows(model, rows: list) -> None:
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BACKFILL_BATCH_SIZE])
+
+
+def rebuild_sales_rollups(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Tuple[int, int]:
+    """Tính lại bảng tổng hợp từ DonHang, HoaDon và ChiTietHoaDon.
+
+    Việc gom nhóm được thực hiện trong cơ sở dữ liệu; chỉ kết quả theo ngày
+    được đọc về. Xóa và ghi lại trong cùng một transaction.
+
+    Args:
+        date_from (date, optional): Ngày bắt đầu, None để tính từ đầu.
+        date_to (date, optional): Ngày kết thúc, None để tính đến hiện tại.
+
+    Returns:
+        tuple: (số ngày, số dòng sản phẩm-ngày) đã ghi.
+    """
+    days: Dict[date, dict] = {}
+
+    def day_row(day: date) -> dict:
+        if day not in days:
+            days[day] = {
+                "ngay": day,
+                "doanh_thu": Decimal("0"),
+                "so_hoa_don": 0,
+                "so_don_hang": 0,
+                **{column: 0 for column in ORDER_STATUS_COLUMNS.values()},
+            }
+        return days[day]
+
+    order_day = func.date(Order.ngay_tao)
+    order_rows = (
+        db.session.query(order_day, Order.trang_thai, func.count(Order.ma_don_hang))
+        .filter(*_range_criteria(Order.ngay_tao, date_from, date_to))
+        .group_by(order_day, Order.trang_thai)
+    )
+    for day, status, total in order_rows:
+        row = day_row(_as_date(day))
+        row["so_don_hang"] += total
+        status_column = ORDER_STATUS_COLUMNS.get(status)
+        if status_column:
+            row[status_column] += total
+
+    invoice_day = func.date(Invoice.ngay_tao)
+    invoice_rows = (
+        db.session.query(
+            invoice_day,
+            func.coalesce(func.sum(Invoice.tong_tien_tam_tinh), 0),
+            func.count(Invoice.ma_hoa_don),
+        )
+        .filter(
+            Invoice.trang_thai != INVOICE_DELETED,
+            *_range_criteria(Invoice.ngay_tao, date_from, date_to),
+        )
+        .group_by(invoice_day)
+    )
+    for day, amount, total in invoice_rows:
+        row = day_row(_as_date(day))
+        row["doanh_thu"] = _money(amount)
+        row["so_hoa_don"] = total
+
+    product_rows = [
+        {
+            "ngay": _as_date(day),
+            "ma_san_pham": product_id,
+            "so_luong_ban": int(quantity or 0),
+            "doanh_thu": _money(amount),
+        }
+        for day, product_id, quantity, amount in (
+            db.session.query(
+                invoice_day,
+                InvoiceDetail.ma_san_pham,
+                func.sum(InvoiceDetail.so_luong),
+                func.coalesce(func.sum(InvoiceDetail.thanh_tien), 0),
+            )
+            .join(Invoice, Invoice.ma_hoa_don == InvoiceDetail.ma_hoa_don)
+            .filter(
+                Invoice.trang_thai != INVOICE_DELETED,
+                *_range_criteria(Invoice.ngay_tao, date_from, date_to),
+            )
+            .group_by(invoice_day, InvoiceDetail.ma_san_pham)
+        )
+    ]
+
+    for model in (DailySales, DailyProductSales):
+        criteria = []
+        if date_from:
+            criteria.append(model.ngay >= date_from)
+        if date_to:
+            criteria.append(model.ngay <= date_to)
+        model.query.filter(*criteria).delete(synchronize_session=False)
+
+    _insert_rows(DailySales, list(days.values()))
+    _insert_rows(DailyProductSales, product_rows)
+    db.session.commit()
+
+    return len(days), len(product_rows)
@@ -0,0 +1,476 @@
+"""
+Module service tìm kiếm sản phẩm.
+
+Module này cung cấp chỉ mục đảo ngược (inverted index) trong bộ nhớ cho sản
+phẩm đang kinh doanh, xếp hạng kết quả theo BM25. Văn bản được chuẩn hoá bỏ
+dấu tiếng Việt ("Nhẫn Vàng" -> "nhan vang") trên các trường tên, mô tả, chất
+liệu, thương hiệu và bộ sưu tập; mỗi từ truy vấn khớp cả các từ có cùng tiền tố ("nha"
+khớp "nhan") với điểm thấp hơn khớp chính xác.
+
+Bộ máy tìm kiếm được chọn qua cấu hình ``SEARCH_BACKEND``:
+- "memory": chỉ mục trong bộ nhớ (mặc định).
+- "sql": truy vấn LIKE trực tiếp trên tên sản phẩm.
+
+Chỉ mục được xây ở lần tìm kiếm đầu tiên của mỗi tiến trình, cập nhật ngay
+khi sản phẩm được tạo/sửa/xoá trong tiến trình đó và định kỳ đồng bộ các sản
+phẩm có ``ngay_chinh_sua`` mới (thay đổi từ worker khác).
+"""
+
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy.orm import selectinload
+
+from app.cache import PeriodicRefresh, config_value
+from app.extensions import db
+from app.models.brand import Brand
+from app.models.collection import Collection
+from app.models.material import Material
+from app.models.product import Product
+from app.models.product__material import ProductMaterial
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+DEFAULT_BACKEND = "memory"
+DEFAULT_SYNC_INTERVAL = 60
+
+# Trọng số của từng trường khi tính tần suất từ.
+FIELD_WEIGHTS: Dict[str, float] = {
+    "name": 3.0,
+    "brand": 2.0,
+    "collection": 2.0,
+    "materials": 2.0,
+    "description": 1.0,
+}
+
+# Tham số BM25.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Khớp tiền tố: độ dài tối thiểu, số từ mở rộng tối đa và hệ số giảm điểm.
+PREFIX_MIN_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 64
+PREFIX_BOOST = 0.7
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+# -----------------------------------------------------------------------------
+# Chuẩn hoá văn bản
+# -----------------------------------------------------------------------------
+
+def normalize_text(text: Optional[str]) -> str:
+    """Chuẩn hoá văn bản: chữ thường, bỏ dấu tiếng Việt.
+
+    Args:
+        text: Văn bản cần chuẩn hoá.
+
+    Returns:
+        str: Văn bản đã chuẩn hoá.
+    """
+    if not text:
+        return ""
+    text = text.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tách văn bản thành danh sách từ đã chuẩn hoá.
+
+    Args:
+        text: Văn bản cần tách.
+
+    Returns:
+        list[str]: Các từ theo thứ tự xuất hiện.
+    """
+    return _TOKEN_PATTERN.findall(normalize_text(text))
+
+
+# -----------------------------------------------------------------------------
+# Chỉ mục đảo ngược
+# -----------------------------------------------------------------------------
+
+class InvertedIndex:
+    """Chỉ mục đảo ngược với xếp hạng BM25.
+
+    Mỗi tài liệu là một dict tên trường -> văn bản; tần suất từ được nhân
+    với trọng số của trường trong FIELD_WEIGHTS. Lớp này không tự khoá,
+    việc đồng bộ luồng do ProductSearchEngine đảm nhận.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]]) -> None:
+        """Thêm hoặc thay thế một tài liệu trong chỉ mục.
+
+        Args:
+            doc_id: Mã tài liệu (mã sản phẩm).
+            fields: Dict tên trường -> văn bản.
+        """
+        self.remove(doc_id)
+
+        weights: Counter = Counter()
+        for field_name, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field_name, 1.0)
+            for term in tokenize(text):
+                weights[term] += weight
+
+        if not weights:
+            return
+
+        terms = dict(weights)
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+
+        for term, weight in terms.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._vocabulary = None
+            self._postings[term][doc_id] = weight
+
+    def remove(self, doc_id: int) -> None:
+        """Xoá một tài liệu khỏi chỉ mục (nếu có).
+
+        Args:
+            doc_id: Mã tài liệu cần xoá.
+        """
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Mở rộng một từ truy vấn thành các từ trong chỉ mục kèm hệ số."""
+        expansions = []
+        if term in self._postings:
+            expansions.append((term, 1.0))
+
+        if len(term) < PREFIX_MIN_LENGTH:
+            return expansions
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+
+        start = bisect_left(self._vocabulary, term)
+        for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not candidate.startswith(term):
+                break
+            if candidate != term:
+                expansions.append((candidate, PREFIX_BOOST))
+
+        return expansions
+
+    def _idf(self, term: str) -> float:
+        doc_count = len(self._doc_terms)
+        doc_freq = len(self._postings[term])
+        return math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str) -> List[int]:
+        """Tìm các tài liệu chứa tất cả các từ của truy vấn.
+
+        Args:
+            query: Chuỗi truy vấn.
+
+        Returns:
+            list[int]: Mã tài liệu theo điểm BM25 giảm dần (cùng điểm thì
+            mã lớn hơn, tức sản phẩm mới hơn, đứng trước).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._doc_terms:
+            return []
+
+        avg_length = self._total_length / len(self._doc_terms)
+        scores: Optional[Dict[int, float]] = None
+
+        for term in terms:
+            term_scores: Dict[int, float] = {}
+            for candidate, boost in self._expand(term):
+                idf = self._idf(candidate)
+                for doc_id, freq in self._postings[candidate].items():
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    norm = 1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length
+                    score = boost * idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * norm)
+                    # Một từ truy vấn chỉ tính điểm của từ khớp tốt nhất.
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc_id: scores[doc_id] + score
+                    for doc_id, score in term_scores.items()
+                }
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], -doc_id))
+
+
+# -----------------------------------------------------------------------------
+# Nạp dữ liệu sản phẩm
+# -----------------------------------------------------------------------------
+
+def _load_documents(*criteria) -> Tuple[Dict[int, dict], Optional[datetime]]:
+    """Nạp văn bản cần đánh chỉ mục của các sản phẩm thoả điều kiện.
+
+    Dùng hai truy vấn: sản phẩm kèm tên thương hiệu và bộ sưu tập, và chất
+    liệu của chúng.
+
+    Args:
+        *criteria: Điều kiện lọc trên Product.
+
+    Returns:
+        tuple: (dict mã sản phẩm -> {"active", "fields"},
+        thời điểm chỉnh sửa lớn nhất trong các sản phẩm đã nạp).
+    """
+    rows = (
+        db.session.query(
+            Product.ma_san_pham,
+            Product.ten_san_pham,
+            Product.mo_ta,
+            Product.trang_thai,
+            Product.ngay_chinh_sua,
+            Brand.ten_thuong_hieu,
+            Collection.ten_bo_suu_tap,
+        )
+        .outerjoin(Brand, Brand.ma_thuong_hieu == Product.thuong_hieu)
+        .outerjoin(Collection, Collection.ma_bo_suu_tap == Product.bo_suu_tap)
+        .filter(*criteria)
+        .all()
+    )
+
+    documents: Dict[int, dict] = {}
+    latest: Optional[datetime] = None
+    for product_id, name, description, status, modified_at, brand, collection in rows:
+        documents[product_id] = {
+            "active": status == 1,
+            "fields": {
+                "name": name,
+                "description": description,
+                "brand": brand,
+                "collection": collection,
+                "materials": "",
+            },
+        }
+        if modified_at is not None and (latest is None or modified_at > latest):
+            latest = modified_at
+
+    active_ids = [pid for pid, doc in documents.items() if doc["active"]]
+    if active_ids:
+        material_query = db.session.query(
+            ProductMaterial.ma_san_pham, Material.ten_chat_lieu
+        ).join(Material, Material.ma_chat_lieu == ProductMaterial.ma_chat_lieu)
+        if criteria:
+            material_query = material_query.filter(
+                ProductMaterial.ma_san_pham.in_(active_ids)
+            )
+
+        materials: Dict[int, List[str]] = {}
+        for product_id, material_name in material_query.all():
+            materials.setdefault(product_id, []).append(material_name)
+
+        for product_id, names in materials.items():
+            if product_id in documents:
+                documents[product_id]["fields"]["materials"] = " ".join(names)
+
+    return documents, latest
+
+
+# -----------------------------------------------------------------------------
+# Bộ máy tìm kiếm sản phẩm
+# -----------------------------------------------------------------------------
+
+class ProductSearchEngine(PeriodicRefresh):
+    """Quản lý chỉ mục tìm kiếm sản phẩm của tiến trình hiện tại.
+
+    Chỉ mục được xây ở lần gọi đầu tiên; sau mỗi chu kỳ
+    (``SEARCH_INDEX_SYNC_INTERVAL``) chỉ các sản phẩm được chỉnh sửa kể từ
+    lần đồng bộ trước được nạp lại.
+    """
+
+    interval_key = "SEARCH_INDEX_SYNC_INTERVAL"
+    default_interval = DEFAULT_SYNC_INTERVAL
+    background = False
+    thread_name = "search-index-sync"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._last_modified: Optional[datetime] = None
+
+    def _apply(self, index: InvertedIndex, documents: Dict[int, dict]) -> None:
+        for product_id, document in documents.items():
+            if document["active"]:
+                index.add(product_id, document["fields"])
+            else:
+                index.remove(product_id)
+
+    def _track_modified(self, latest: Optional[datetime]) -> None:
+        if latest is not None and (
+            self._last_modified is None or latest > self._last_modified
+        ):
+            self._last_modified = latest
+
+    def _load(self):
+        documents, latest = _load_documents()
+        index = InvertedIndex()
+        self._apply(index, documents)
+        return index, latest
+
+    def _install(self, data) -> None:
+        self._data, self._last_modified = data
+
+    def refresh(self) -> None:
+        """Đồng bộ các sản phẩm được chỉnh sửa kể từ lần đồng bộ trước."""
+        with self._lock:
+            since = self._last_modified
+        criteria = () if since is None else (Product.ngay_chinh_sua >= since,)
+
+        documents, latest = _load_documents(*criteria)
+        with self._lock:
+            self._apply(self._data, documents)
+            self._track_modified(latest)
+            self._built_at = time.monotonic()
+
+    def refresh_products(self, product_ids: Iterable[int]) -> None:
+        """Cập nhật chỉ mục cho các sản phẩm vừa thay đổi.
+
+        Không làm gì nếu chỉ mục chưa được xây (lần tìm kiếm đầu tiên sẽ
+        nạp dữ liệu mới nhất).
+
+        Args:
+            product_ids: Mã các sản phẩm cần cập nhật.
+        """
+        product_ids = list(product_ids)
+        if self._data is None or not product_ids:
+            return
+
+        documents, _ = _load_documents(Product.ma_san_pham.in_(product_ids))
+        with self._lock:
+            self._apply(self._data, documents)
+            for product_id in set(product_ids) - set(documents):
+                self._data.remove(product_id)
+
+    def search(self, keyword: str) -> List[int]:
+        """Tìm mã các sản phẩm khớp từ khoá, đã xếp hạng.
+
+        Args:
+            keyword: Từ khoá tìm kiếm.
+
+        Returns:
+            list[int]: Mã sản phẩm theo mức độ liên quan giảm dần.
+        """
+        self.ensure_ready()
+        with self._lock:
+            return self._data.search(keyword)
+
+
+product_search = ProductSearchEngine()
+
+
+# -----------------------------------------------------------------------------
+# Phân trang kết quả
+# -----------------------------------------------------------------------------
+
+class RankedPagination(Pagination):
+    """Phân trang trên danh sách mã sản phẩm đã xếp hạng.
+
+    Có cùng giao diện với kết quả ``Query.paginate`` nên dùng chung được
+    template phân trang.
+    """
+
+    def _query_items(self) -> List[Product]:
+        start = self._query_offset
+        page_ids = self._query_args["ids"][start:start + self.per_page]
+        if not page_ids:
+            return []
+
+        products = (
+            Product.query.options(selectinload(Product.hinh_anhs))
+            .filter(Product.ma_san_pham.in_(page_ids), Product.trang_thai == 1)
+            .all()
+        )
+        by_id = {product.ma_san_pham: product for product in products}
+        return [by_id[pid] for pid in page_ids if pid in by_id]
+
+    def _query_count(self) -> int:
+        return len(self._query_args["ids"])
+
+
+def _get_backend() -> str:
+    return config_value("SEARCH_BACKEND", DEFAULT_BACKEND)
+
+
+def search_product_ids(keyword: str) -> List[int]:
+    """Tìm mã các sản phẩm đang kinh doanh khớp từ khoá.
+
+    Args:
+        keyword (str): Từ khoá tìm kiếm.
+
+    Returns:
+        list[int]: Mã sản phẩm theo mức độ liên quan (backend "memory") hoặc
+        mới nhất trước (backend "sql").
+    """
+    if _get_backend() == "memory":
+        return product_search.search(keyword)
+
+    rows = (
+        db.session.query(Product.ma_san_pham)
+        .filter(Product.trang_thai == 1, Product.ten_san_pham.ilike(f"%{keyword}%"))
+        .order_by(Product.ngay_tao.desc())
+        .all()
+    )
+    return [product_id for (product_id,) in rows]
+
+
+def search_products(keyword: str, page: int, per_page: int) -> Pagination:
+    """Tìm kiếm sản phẩm đang kinh doanh và phân trang kết quả.
+
+    Args:
+        keyword (str): Từ khoá tìm kiếm (rỗng để liệt kê sản phẩm mới nhất).
+        page (int): Trang hiện tại.
+        per_page (int): Số sản phẩm mỗi trang.
+
+    Returns:
+        Pagination: Kết quả phân trang.
+    """
+    if keyword and _get_backend() == "memory":
+        return RankedPagination(
+            page=page, per_page=per_page, ids=product_search.search(keyword)
+        )
+
+    query = Product.query.filter(Product.trang_thai == 1)
+    if keyword:
+        query = query.filter(Product.ten_san_pham.ilike(f"%{keyword}%"))
+
+    return query.order_by(Product.ngay_tao.desc()).paginate(
+        page=page, per_page=per_page
+    )
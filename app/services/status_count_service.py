@@ -0,0 +1,95 @@
+"""
+Module service thống kê số lượng bản ghi theo trạng thái.
+
+Module này cung cấp hàm đếm số bản ghi theo từng giá trị ``trang_thai`` của
+một model bằng một truy vấn ``GROUP BY`` duy nhất, thay cho việc gọi
+``count()`` riêng cho từng trạng thái trên các trang quản trị.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+
+from app.extensions import db
+
+
+@dataclass(frozen=True)
+class StatusHistogram:
+    """Kết quả đếm số bản ghi theo trạng thái.
+
+    Attributes:
+        counts: Dict ánh xạ giá trị trạng thái -> số bản ghi. Bản ghi có
+            trạng thái NULL được gom vào khoá None.
+    """
+
+    counts: Dict[Optional[int], int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        """Tổng số bản ghi (kể cả trạng thái NULL)."""
+        return sum(self.counts.values())
+
+    def get(self, status: int) -> int:
+        """Lấy số bản ghi của một trạng thái.
+
+        Args:
+            status: Giá trị trạng thái.
+
+        Returns:
+            Số bản ghi, 0 nếu không có.
+        """
+        return self.counts.get(status, 0)
+
+    def total_of(self, statuses: Iterable[int]) -> int:
+        """Tổng số bản ghi thuộc các trạng thái cho trước.
+
+        Args:
+            statuses: Danh sách trạng thái cần cộng dồn.
+
+        Returns:
+            Tổng số bản ghi.
+        """
+        return sum(self.get(status) for status in set(statuses))
+
+    def total_excluding(self, *statuses: int) -> int:
+        """Tổng số bản ghi không thuộc các trạng thái cho trước.
+
+        Tương đương điều kiện SQL ``trang_thai != x``: bản ghi có trạng thái
+        NULL không được tính.
+
+        Args:
+            *statuses: Các trạng thái cần loại trừ.
+
+        Returns:
+            Tổng số bản ghi còn lại.
+        """
+        return sum(
+            count
+            for status, count in self.counts.items()
+            if status is not None and status not in statuses
+        )
+
+
+def count_by_status(model, *criteria, column: str = "trang_thai") -> StatusHistogram:
+    """Đếm số bản ghi theo từng trạng thái trong một truy vấn.
+
+    Args:
+        model: Model SQLAlchemy cần thống kê.
+        *criteria: Các điều kiện lọc bổ sung (tuỳ chọn).
+        column (str, optional): Tên cột trạng thái. Defaults to "trang_thai".
+
+    Returns:
+        StatusHistogram: Số bản ghi theo từng trạng thái.
+    """
+    status_column = getattr(model, column)
+
+    rows = (
+        db.session.query(status_column, func.count())
+        .select_from(model)
+        .filter(*criteria)
+        .group_by(status_column)
+        .all()
+    )
+
+    return StatusHistogram(counts={status: int(count) for status, count in rows})
@@ -0,0 +1,313 @@
+"""
+Module service gợi ý tìm kiếm (typeahead).
+
+Module này giữ trong bộ nhớ một mảng đã sắp xếp gồm các cụm từ đã chuẩn hoá
+(bỏ dấu) của tên sản phẩm, thương hiệu và bộ sưu tập. Gợi ý cho một tiền tố
+được tìm bằng bisect trên mảng này và xếp theo độ phổ biến (số lượng đã bán),
+kết quả của từng tiền tố được ghi nhớ cho tới khi chỉ mục thay đổi.
+
+Mỗi tên được đánh chỉ mục tại mọi vị trí đầu từ, nên "vang" gợi ý được cả
+"Nhẫn vàng hoa hồng".
+"""
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.cache import PeriodicRefresh
+from app.constants import OrderStatus
+from app.extensions import db
+from app.models.brand import Brand
+from app.models.collection import Collection
+from app.models.order import Order
+from app.models.order_detail import OrderDetail
+from app.models.product import Product
+from app.services.search_service import tokenize
+
+
+# -----------------------------------------------------------------------------
+# Hằng số
+# -----------------------------------------------------------------------------
+
+MAX_SUGGESTIONS = 10
+DEFAULT_REBUILD_INTERVAL = 300
+
+# Số tiền tố được ghi nhớ kết quả tối đa trước khi xoá bộ nhớ tạm.
+_MEMO_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """Một mục gợi ý.
+
+    Attributes:
+        kind: Loại gợi ý ("product", "brand" hoặc "collection").
+        ref_id: Mã bản ghi tương ứng.
+        label: Tên hiển thị.
+        popularity: Độ phổ biến (tổng số lượng đã bán).
+    """
+
+    kind: str
+    ref_id: int
+    label: str
+    popularity: int = 0
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.kind, self.ref_id
+
+
+def _phrases(label: str) -> List[str]:
+    """Các cụm từ bắt đầu tại mỗi từ của tên đã chuẩn hoá."""
+    tokens = tokenize(label)
+    return list(dict.fromkeys(" ".join(tokens[i:]) for i in range(len(tokens))))
+
+
+# -----------------------------------------------------------------------------
+# Chỉ mục tiền tố
+# -----------------------------------------------------------------------------
+
+class SuggestionIndex:
+    """Chỉ mục tiền tố trên mảng cụm từ đã sắp xếp.
+
+    Lớp này không tự khoá, việc đồng bộ luồng do SuggestionEngine đảm nhận.
+    """
+
+    def __init__(self) -> None:
+        self._phrases: List[Tuple[str, Tuple[str, int]]] = []
+        self._entries: Dict[Tuple[str, int], Suggestion] = {}
+        self._entry_phrases: Dict[Tuple[str, int], List[str]] = {}
+        self._memo: Dict[str, List[Suggestion]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, suggestion: Suggestion) -> None:
+        """Thêm hoặc thay thế một mục gợi ý.
+
+        Args:
+            suggestion: Mục gợi ý cần lưu.
+        """
+        self.remove(suggestion.key)
+
+        phrases = _phrases(suggestion.label)
+        if not phrases:
+            return
+
+        self._entries[suggestion.key] = suggestion
+        self._entry_phrases[suggestion.key] = phrases
+        for phrase in phrases:
+            insort(self._phrases, (phrase, suggestion.key))
+        self._memo.clear()
+
+    def load(self, suggestions: Iterable[Suggestion]) -> None:
+        """Nạp một loạt mục gợi ý (sắp xếp một lần thay vì chèn từng mục).
+
+        Args:
+            suggestions: Các mục gợi ý.
+        """
+        for suggestion in suggestions:
+            phrases = _phrases(suggestion.label)
+            if not phrases:
+                continue
+            self._entries[suggestion.key] = suggestion
+            self._entry_phrases[suggestion.key] = phrases
+            self._phrases.extend((phrase, suggestion.key) for phrase in phrases)
+        self._phrases.sort()
+        self._memo.clear()
+
+    def remove(self, key: Tuple[str, int]) -> None:
+        """Xoá một mục gợi ý (nếu có).
+
+        Args:
+            key: Bộ (loại, mã bản ghi) của mục cần xoá.
+        """
+        phrases = self._entry_phrases.pop(key, None)
+        if phrases is None:
+            return
+
+        del self._entries[key]
+        for phrase in phrases:
+            index = bisect_left(self._phrases, (phrase, key))
+            if index < len(self._phrases) and self._phrases[index] == (phrase, key):
+                del self._phrases[index]
+        self._memo.clear()
+
+    def complete(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+        """Lấy các gợi ý phổ biến nhất khớp tiền tố.
+
+        Args:
+            prefix: Chuỗi người dùng đang gõ.
+            limit: Số gợi ý tối đa.
+
+        Returns:
+            list[Suggestion]: Gợi ý theo độ phổ biến giảm dần.
+        """
+        normalized = " ".join(tokenize(prefix))
+        if not normalized:
+            return []
+
+        cached = self._memo.get(normalized)
+        if cached is None:
+            matches = {}
+            index = bisect_left(self._phrases, (normalized,))
+            while index < len(self._phrases):
+                phrase, key = self._phrases[index]
+                if not phrase.startswith(normalized):
+                    break
+                matches[key] = self._entries[key]
+                index += 1
+
+            cached = nlargest(
+                MAX_SUGGESTIONS,
+                matches.values(),
+                key=lambda item: (item.popularity, -len(item.label), item.ref_id),
+            )
+            if len(self._memo) >= _MEMO_SIZE:
+                self._memo.clear()
+            self._memo[normalized] = cached
+
+        return cached[:limit]
+
+
+# -----------------------------------------------------------------------------
+# Nạp dữ liệu
+# -----------------------------------------------------------------------------
+
+def _load_product_rows(product_ids: Optional[List[int]] = None) -> list:
+    """Nạp sản phẩm kèm tổng số lượng đã bán (trừ đơn đã huỷ).
+
+    Args:
+        product_ids (list, optional): Chỉ nạp các sản phẩm này (kể cả sản phẩm
+            không còn bán); None để nạp mọi sản phẩm đang bán.
+    """
+    sold = (
+        db.session.query(
+            OrderDetail.ma_san_pham.label("ma_san_pham"),
+            func.sum(OrderDetail.so_luong).label("da_ban"),
+        )
+        .join(Order, Order.ma_don_hang == OrderDetail.ma_don_hang)
+        .filter(Order.trang_thai != OrderStatus.CANCELLED)
+    )
+    products = db.session.query(
+        Product.ma_san_pham,
+        Product.ten_san_pham,
+        Product.trang_thai,
+        Product.thuong_hieu,
+        Product.bo_suu_tap,
+    )
+    if product_ids is None:
+        products = products.filter(Product.trang_thai == 1)
+    else:
+        # Chỉ tổng hợp chi tiết đơn hàng của các sản phẩm cần cập nhật.
+        sold = sold.filter(OrderDetail.ma_san_pham.in_(product_ids))
+        products = products.filter(Product.ma_san_pham.in_(product_ids))
+
+    sold = sold.group_by(OrderDetail.ma_san_pham).subquery()
+    return (
+        products.add_columns(func.coalesce(sold.c.da_ban, 0))
+        .outerjoin(sold, sold.c.ma_san_pham == Product.ma_san_pham)
+        .all()
+    )
+
+
+def _load_suggestions() -> List[Suggestion]:
+    """Nạp toàn bộ gợi ý: sản phẩm đang bán, thương hiệu và bộ sưu tập.
+
+    Độ phổ biến của thương hiệu/bộ sưu tập là tổng độ phổ biến của các sản
+    phẩm đang bán thuộc về nó.
+    """
+    suggestions = []
+    brand_sales: Dict[int, int] = {}
+    collection_sales: Dict[int, int] = {}
+
+    for product_id, name, status, brand_id, collection_id, sold in _load_product_rows():
+        sold = int(sold)
+        suggestions.append(Suggestion("product", product_id, name, sold))
+        if brand_id is not None:
+            brand_sales[brand_id] = brand_sales.get(brand_id, 0) + sold
+        if collection_id is not None:
+            collection_sales[collection_id] = collection_sales.get(collection_id, 0) + sold
+
+    for brand_id, name in db.session.query(Brand.ma_thuong_hieu, Brand.ten_thuong_hieu):
+        suggestions.append(
+            Suggestion("brand", brand_id, name, brand_sales.get(brand_id, 0))
+        )
+
+    collections = db.session.query(
+        Collection.ma_bo_suu_tap, Collection.ten_bo_suu_tap
+    ).filter(Collection.trang_thai == 1)
+    for collection_id, name in collections:
+        suggestions.append(
+            Suggestion(
+                "collection", collection_id, name, collection_sales.get(collection_id, 0)
+            )
+        )
+
+    return suggestions
+
+
+# -----------------------------------------------------------------------------
+# Bộ máy gợi ý
+# -----------------------------------------------------------------------------
+
+class SuggestionEngine(PeriodicRefresh):
+    """Quản lý chỉ mục gợi ý của tiến trình hiện tại.
+
+    Chỉ mục được xây ở lần gọi đầu tiên. Sau mỗi chu kỳ
+    (``SUGGESTION_REBUILD_INTERVAL``) chỉ mục được xây lại ở luồng nền để cập
+    nhật độ phổ biến và thay đổi từ các worker khác, trong lúc đó request vẫn
+    dùng chỉ mục cũ; thay đổi sản phẩm trong tiến trình được áp dụng ngay.
+    """
+
+    interval_key = "SUGGESTION_REBUILD_INTERVAL"
+    default_interval = DEFAULT_REBUILD_INTERVAL
+    thread_name = "suggestion-rebuild"
+
+    def _load(self) -> SuggestionIndex:
+        index = SuggestionIndex()
+        index.load(_load_suggestions())
+        return index
+
+    def refresh_products(self, product_ids: Iterable[int]) -> None:
+        """Cập nhật gợi ý cho các sản phẩm vừa thay đổi.
+
+        Không làm gì nếu chỉ mục chưa được xây.
+
+        Args:
+            product_ids: Mã các sản phẩm cần cập nhật.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        self._touch()
+        if self._data is None:
+            return
+
+        rows = _load_product_rows(product_ids)
+        with self._lock:
+            for product_id in product_ids:
+                self._data.remove(("product", product_id))
+            for product_id, name, status, _, _, sold in rows:
+                if status == 1:
+                    self._data.put(Suggestion("product", product_id, name, int(sold)))
+
+    def suggest(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+        """Lấy gợi ý cho chuỗi đang gõ.
+
+        Args:
+            prefix: Chuỗi người dùng đang gõ.
+            limit: Số gợi ý tối đa (không vượt quá MAX_SUGGESTIONS).
+
+        Returns:
+            list[Suggestion]: Gợi ý theo độ phổ biến giảm dần.
+        """
+        self.ensure_ready()
+        with self._lock:
+            return self._data.complete(prefix, min(limit, MAX_SUGGESTIONS))
+
+
+product_suggestions = SuggestionEngine()
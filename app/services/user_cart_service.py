@@ -6,13 +6,19 @@ bao gồm lấy giỏ hàng, tính toán tổng tiền, và phân trang.
 """
 
 import math
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+from flask import g, has_app_context
+from sqlalchemy import func
+
+from app.cache import TTLCache, config_value
 from app.extensions import db
 from app.models.cart import Cart
 from app.models.cart_detail import CartDetail
 from app.models.product import Product
+from app.models.product_image import ProductImage
 
 
 # -----------------------------------------------------------------------------
@@ -22,6 +28,43 @@ from app.models.product import Product
 CART_STATUS_ACTIVE = 0
 CART_STATUS_COMPLETED = 1
 CART_ITEMS_PER_PAGE = 5
+CART_COUNT_CACHE_SIZE = 10000
+
+# Số lượng sản phẩm trong giỏ hàng theo mã tài khoản (dùng cho badge giỏ hàng).
+_cart_count_cache = TTLCache(ttl=300, maxsize=CART_COUNT_CACHE_SIZE)
+
+
+# -----------------------------------------------------------------------------
+# Mô hình hiển thị giỏ hàng
+# -----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CartItemView:
+    """Thông tin tối thiểu của một dòng giỏ hàng dùng để hiển thị."""
+
+    product_id: int
+    name: str
+    quantity: int
+    price: float
+    image: Optional[str]  # Đường dẫn ảnh (tương đối với thư mục static)
+
+
+@dataclass(frozen=True)
+class CartView:
+    """Nội dung giỏ hàng đã nạp sẵn kèm tổng tiền và tổng số lượng."""
+
+    items: list[CartItemView]
+    total_price: float
+    total_quantity: int
+
+
+@dataclass(frozen=True)
+class CartSummary:
+    """Tổng hợp giỏ hàng được tính bằng một truy vấn tổng hợp SQL."""
+
+    total_items: int  # Số dòng giỏ hàng có sản phẩm còn tồn tại
+    total_price: float
+    total_quantity: int
 
 
 # -----------------------------------------------------------------------------
@@ -111,97 +154,259 @@ def get_cart_item_count(user_id: int) -> int:
     return CartDetail.query.filter_by(ma_gio_hang=cart.ma_gio_hang).count()
 
 
-# -----------------------------------------------------------------------------
-# Tính toán giỏ hàng
-# -----------------------------------------------------------------------------
+def get_cached_cart_item_count(user_id: int) -> int:
+    """Đếm số lượng sản phẩm trong giỏ hàng, có dùng bộ nhớ đệm.
 
-def calculate_cart_totals(cart_items: list[CartDetail]) -> tuple[float, int]:
-    """Tính tổng tiền và tổng số lượng sản phẩm trong giỏ hàng.
+    Kết quả được ghi nhớ trong phạm vi request (flask.g) và trong bộ nhớ đệm
+    dùng chung theo người dùng; bộ nhớ đệm bị xoá khi giỏ hàng thay đổi
+    (xem invalidate_cart_count).
 
     Args:
-        cart_items: Danh sách chi tiết giỏ hàng.
+        user_id: Mã tài khoản người dùng.
 
     Returns:
-        Tuple gồm (tổng tiền, tổng số lượng).
+        Số lượng sản phẩm trong giỏ hàng.
     """
-    total_price = 0.0
-    total_quantity = 0
+    request_counts = g.setdefault("cart_item_counts", {}) if has_app_context() else {}
+    if user_id in request_counts:
+        return request_counts[user_id]
 
-    for item in cart_items:
-        total_price += item.so_luong * float(item.gia_tai_thoi_diem)
-        total_quantity += item.so_luong
+    ttl = config_value("CART_COUNT_CACHE_TTL", None)
+    count = _cart_count_cache.get_or_set(
+        user_id,
+        lambda: get_cart_item_count(user_id),
+        ttl=ttl,
+    )
+    request_counts[user_id] = count
+    return count
 
-    return total_price, total_quantity
 
+def invalidate_cart_count(user_id: int) -> None:
+    """Xoá số lượng giỏ hàng đã lưu đệm của người dùng.
 
-def build_cart_items_for_display(cart_items: list[CartDetail]) -> list[dict]:
-    """Xây dựng danh sách sản phẩm giỏ hàng để hiển thị trên trang giỏ hàng.
+    Args:
+        user_id: Mã tài khoản người dùng.
+    """
+    _cart_count_cache.delete(user_id)
+    if has_app_context():
+        g.get("cart_item_counts", {}).pop(user_id, None)
+
+
+def get_main_images(product_ids: list[int]) -> dict[int, str]:
+    """Lấy đường dẫn ảnh chính của nhiều sản phẩm trong một truy vấn.
+
+    Thứ tự ưu tiên giống Product.anh_chinh: ảnh có anh_chinh=1, sau đó ảnh
+    có thứ tự sắp xếp nhỏ nhất.
 
     Args:
-        cart_items: Danh sách chi tiết giỏ hàng.
+        product_ids: Danh sách mã sản phẩm.
 
     Returns:
-        Danh sách dict chứa thông tin hiển thị cơ bản.
+        Dict ánh xạ mã sản phẩm -> đường dẫn ảnh. Sản phẩm không có ảnh sẽ
+        không có trong dict.
     """
-    result = []
-    for item in cart_items:
-        product = Product.query.get(item.ma_san_pham)
-
-        if product is None:
-            continue
-
-        # Lấy ảnh chính hoặc ảnh đầu tiên nếu có
-        image_url = None
-        if product.hinh_anhs:
-            main_imgs = [img for img in product.hinh_anhs if img.anh_chinh == 1]
-            if main_imgs:
-                image_url = main_imgs[0].duong_dan
-            else:
-                image_url = product.hinh_anhs[0].duong_dan
-
-        result.append({
-            "id": item.ma_san_pham,
-            "name": product.ten_san_pham,
-            "quantity": item.so_luong,
-            "price": float(item.gia_tai_thoi_diem),
-            "image": f"/static/{image_url}" if image_url else "",
-        })
-    return result
-
-
-def build_checkout_items(cart_items: list[CartDetail]) -> list[dict]:
-    """Xây dựng danh sách sản phẩm để hiển thị trên trang thanh toán.
+    if not product_ids:
+        return {}
+
+    rows = (
+        db.session.query(ProductImage.ma_san_pham, ProductImage.duong_dan)
+        .filter(ProductImage.ma_san_pham.in_(set(product_ids)))
+        .order_by(
+            ProductImage.anh_chinh.desc(),
+            func.coalesce(ProductImage.thu_tu_sap_xep, 999),
+            ProductImage.ma_hinh_anh,
+        )
+        .all()
+    )
+
+    images: dict[int, str] = {}
+    for product_id, path in rows:
+        images.setdefault(product_id, path)
+    return images
+
+
+def _query_cart_rows(cart_id: int):
+    """Tạo truy vấn các dòng giỏ hàng kèm tên sản phẩm (LEFT JOIN sản phẩm)."""
+    return (
+        db.session.query(
+            CartDetail.ma_san_pham,
+            CartDetail.so_luong,
+            CartDetail.gia_tai_thoi_diem,
+            Product.ten_san_pham,
+        )
+        .outerjoin(Product, Product.ma_san_pham == CartDetail.ma_san_pham)
+        .filter(CartDetail.ma_gio_hang == cart_id)
+        .order_by(CartDetail.ma_chi_tiet_gio_hang)
+    )
+
+
+def _build_item_views(rows) -> list[CartItemView]:
+    """Chuyển các dòng truy vấn thành CartItemView, bỏ qua sản phẩm đã bị xoá."""
+    visible_rows = [row for row in rows if row.ten_san_pham is not None]
+    images = get_main_images([row.ma_san_pham for row in visible_rows])
+
+    return [
+        CartItemView(
+            product_id=row.ma_san_pham,
+            name=row.ten_san_pham,
+            quantity=row.so_luong,
+            price=float(row.gia_tai_thoi_diem),
+            image=images.get(row.ma_san_pham),
+        )
+        for row in visible_rows
+    ]
 
-    Bao gồm thông tin chi tiết sản phẩm như tên và hình ảnh.
+
+def load_cart_view(cart_id: int) -> CartView:
+    """Nạp toàn bộ giỏ hàng để hiển thị với số truy vấn cố định.
+
+    Chi tiết giỏ hàng và sản phẩm được lấy bằng một truy vấn JOIN, ảnh chính
+    được lấy bằng một truy vấn IN, thay vì truy vấn sản phẩm và ảnh cho
+    từng dòng giỏ hàng.
 
     Args:
-        cart_items: Danh sách chi tiết giỏ hàng.
+        cart_id: Mã giỏ hàng.
 
     Returns:
-        Danh sách dict chứa thông tin đầy đủ cho trang checkout.
+        CartView gồm các dòng hiển thị và tổng tiền/tổng số lượng.
     """
-    result = []
+    rows = _query_cart_rows(cart_id).all()
 
-    for cart_detail in cart_items:
-        product = Product.query.get(cart_detail.ma_san_pham)
+    # Dòng có sản phẩm đã bị xoá vẫn được tính vào tổng nhưng không hiển thị.
+    total_price = sum(row.so_luong * float(row.gia_tai_thoi_diem) for row in rows)
+    total_quantity = sum(row.so_luong for row in rows)
 
-        if product is None:
-            continue
+    return CartView(
+        items=_build_item_views(rows),
+        total_price=total_price,
+        total_quantity=total_quantity,
+    )
 
-        # Lấy ảnh đầu tiên nếu có
-        image_url = None
-        if product.hinh_anhs:
-            image_url = product.hinh_anhs[0].duong_dan
 
-        result.append({
-            "id": product.ma_san_pham,
-            "name": product.ten_san_pham,
-            "price": float(cart_detail.gia_tai_thoi_diem),
-            "quantity": cart_detail.so_luong,
-            "image": image_url,
-        })
+def get_cart_summary(cart_id: int) -> CartSummary:
+    """Tính số dòng, tổng tiền và tổng số lượng của giỏ hàng bằng SQL.
 
-    return result
+    Args:
+        cart_id: Mã giỏ hàng.
+
+    Returns:
+        CartSummary của giỏ hàng.
+    """
+    total_items, total_price, total_quantity = (
+        db.session.query(
+            func.count(Product.ma_san_pham),
+            func.coalesce(
+                func.sum(CartDetail.so_luong * CartDetail.gia_tai_thoi_diem), 0
+            ),
+            func.coalesce(func.sum(CartDetail.so_luong), 0),
+        )
+        .select_from(CartDetail)
+        .outerjoin(Product, Product.ma_san_pham == CartDetail.ma_san_pham)
+        .filter(CartDetail.ma_gio_hang == cart_id)
+        .one()
+    )
+
+    return CartSummary(
+        total_items=int(total_items),
+        total_price=float(total_price),
+        total_quantity=int(total_quantity),
+    )
+
+
+def load_cart_page(
+    cart_id: int,
+    page: int,
+    per_page: int = CART_ITEMS_PER_PAGE,
+) -> tuple[CartView, dict]:
+    """Nạp một trang giỏ hàng, phân trang và tính tổng ngay trong cơ sở dữ liệu.
+
+    Chỉ các dòng của trang hiện tại được lấy (LIMIT/OFFSET); tổng tiền và
+    tổng số lượng của cả giỏ hàng được tính bằng một truy vấn tổng hợp.
+
+    Args:
+        cart_id: Mã giỏ hàng.
+        page: Số trang hiện tại (bắt đầu từ 1).
+        per_page: Số dòng mỗi trang.
+
+    Returns:
+        Tuple gồm (CartView của trang hiện tại, dict thông tin phân trang).
+    """
+    page = max(page, 1)
+    summary = get_cart_summary(cart_id)
+
+    rows = []
+    if summary.total_items:
+        rows = (
+            _query_cart_rows(cart_id)
+            .filter(Product.ma_san_pham.isnot(None))
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+            .all()
+        )
+
+    cart_view = CartView(
+        items=_build_item_views(rows),
+        total_price=summary.total_price,
+        total_quantity=summary.total_quantity,
+    )
+
+    pagination = {
+        "page": page,
+        "total_pages": math.ceil(summary.total_items / per_page)
+        if summary.total_items
+        else 1,
+        "total_items": summary.total_items,
+    }
+
+    return cart_view, pagination
+
+
+# -----------------------------------------------------------------------------
+# Tính toán giỏ hàng
+# -----------------------------------------------------------------------------
+
+def build_cart_items_for_display(cart_items: list[CartItemView]) -> list[dict]:
+    """Xây dựng danh sách sản phẩm giỏ hàng để hiển thị trên trang giỏ hàng.
+
+    Args:
+        cart_items: Danh sách dòng giỏ hàng đã nạp (xem load_cart_view).
+
+    Returns:
+        Danh sách dict chứa thông tin hiển thị cơ bản.
+    """
+    return [
+        {
+            "id": item.product_id,
+            "name": item.name,
+            "quantity": item.quantity,
+            "price": item.price,
+            "image": f"/static/{item.image}" if item.image else "",
+        }
+        for item in cart_items
+    ]
+
+
+def build_checkout_items(cart_items: list[CartItemView]) -> list[dict]:
+    """Xây dựng danh sách sản phẩm để hiển thị trên trang thanh toán.
+
+    Bao gồm thông tin chi tiết sản phẩm như tên và hình ảnh.
+
+    Args:
+        cart_items: Danh sách dòng giỏ hàng đã nạp (xem load_cart_view).
+
+    Returns:
+        Danh sách dict chứa thông tin đầy đủ cho trang checkout.
+    """
+    return [
+        {
+            "id": item.product_id,
+            "name": item.name,
+            "price": item.price,
+            "quantity": item.quantity,
+            "image": item.image,
+        }
+        for item in cart_items
+    ]
 
 
 def build_single_product_checkout(product: Product, quantity: int = 1) -> tuple[list[dict], float, int]:
@@ -233,37 +438,6 @@ def build_single_product_checkout(product: Product, quantity: int = 1) -> tuple[
     return cart_items, total_price, total_quantity
 
 
-# -----------------------------------------------------------------------------
-# Phân trang
-# -----------------------------------------------------------------------------
-
-def paginate_items(items: list, page: int, per_page: int = CART_ITEMS_PER_PAGE) -> tuple[list, dict]:
-    """Phân trang danh sách items.
-
-    Args:
-        items: Danh sách cần phân trang.
-        page: Số trang hiện tại (bắt đầu từ 1).
-        per_page: Số items mỗi trang.
-
-    Returns:
-        Tuple gồm (danh sách items của trang hiện tại, dict thông tin phân trang).
-    """
-    total_items = len(items)
-    total_pages = math.ceil(total_items / per_page) if total_items else 1
-
-    start_index = (page - 1) * per_page
-    end_index = start_index + per_page
-    paginated_items = items[start_index:end_index]
-
-    pagination = {
-        "page": page,
-        "total_pages": total_pages,
-        "total_items": total_items,
-    }
-
-    return paginated_items, pagination
-
-
 # -----------------------------------------------------------------------------
 # Thao tác giỏ hàng
 # -----------------------------------------------------------------------------
@@ -297,6 +471,7 @@ def add_product_to_cart(cart: Cart, product: Product) -> CartDetail:
 
     update_cart_modified_time(cart)
     db.session.commit()
+    invalidate_cart_count(cart.ma_tai_khoan)
 
     return cart_item
 
@@ -309,7 +484,8 @@ def update_cart_item_quantity(cart_item: CartDetail, action: str) -> bool:
         action: Hành động ('increase' hoặc 'decrease').
 
     Returns:
-        True nếu item vẫn tồn tại, False nếu đã bị xóa.
+        True nếu item vẫn tồn tại, False nếu đã bị xóa (người gọi commit rồi
+        gọi invalidate_cart_count).
     """
     if action == "increase":
         cart_item.so_luong += 1
@@ -327,6 +503,8 @@ def update_cart_item_quantity(cart_item: CartDetail, action: str) -> bool:
 def remove_cart_item(cart_item: CartDetail) -> None:
     """Xóa sản phẩm khỏi giỏ hàng.
 
+    Không commit; người gọi commit rồi gọi invalidate_cart_count.
+
     Args:
         cart_item: Chi tiết giỏ hàng cần xóa.
     """
@@ -336,6 +514,8 @@ def remove_cart_item(cart_item: CartDetail) -> None:
 def clear_cart_items(cart_id: int) -> None:
     """Xóa tất cả sản phẩm trong giỏ hàng.
 
+    Không commit; người gọi commit rồi gọi invalidate_cart_count.
+
     Args:
         cart_id: Mã giỏ hàng.
     """
@@ -8,6 +8,7 @@ tách biệt với các thao tác đơn hàng admin trong order_service.py.
 from typing import Optional
 
 from flask_login import current_user
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.constants import OrderStatus
 from app.extensions import db
@@ -17,6 +18,23 @@ from app.models.invoice import Invoice
 from app.models.order import Order
 from app.models.order_detail import OrderDetail
 from app.models.product import Product
+from app.pagination import KeysetPagination, keyset_paginate
+from app.services.dashboard_metrics_service import dashboard_metrics
+from app.services.inventory_service import (
+    InsufficientStockError,
+    on_stock_changed,
+    release_order_stock,
+    reserve_order_stock,
+)
+from app.services.relation_loader_service import load_grouped, load_related
+from app.services.sales_rollup_service import (
+    record_order_created,
+    record_order_status_changed,
+)
+from app.services.user_cart_service import invalidate_cart_count
+
+
+DEFAULT_PURCHASE_HISTORY_PER_PAGE = 10
 
 
 # -----------------------------------------------------------------------------
@@ -56,26 +74,6 @@ def get_user_order_or_none(order_id: int, user_id: int) -> Optional[Order]:
     ).first()
 
 
-def get_user_completed_orders(user_id: int) -> list[Order]:
-    """Lấy tất cả đơn hàng đã hoàn thành của người dùng.
-
-    Args:
-        user_id: Mã tài khoản người dùng.
-
-    Returns:
-        Danh sách đối tượng Order đã hoàn thành, sắp xếp theo ngày tạo giảm dần.
-    """
-    return (
-        Order.query
-        .filter_by(
-            ma_tai_khoan=user_id,
-            trang_thai=OrderStatus.COMPLETED
-        )
-        .order_by(Order.ngay_tao.desc())
-        .all()
-    )
-
-
 def get_active_cart(user_id: int) -> Optional[Cart]:
     """Lấy giỏ hàng đang hoạt động (chưa hoàn thành) của người dùng.
 
@@ -159,6 +157,7 @@ def create_order_from_cart(user_id: int, cart: Cart, cart_details: list[CartDeta
     1. Tạo đơn hàng với trạng thái chờ xử lý
     2. Tạo chi tiết đơn hàng từ chi tiết giỏ hàng
     3. Đánh dấu giỏ hàng là đã hoàn thành (trang_thai=1)
+    4. Trừ tồn kho các sản phẩm (bước cuối, ngay trước commit)
 
     Args:
         user_id: Mã tài khoản người dùng.
@@ -167,6 +166,9 @@ def create_order_from_cart(user_id: int, cart: Cart, cart_details: list[CartDeta
 
     Returns:
         Đơn hàng vừa được tạo.
+
+    Raises:
+        InsufficientStockError: Một sản phẩm không đủ hàng; không có gì được lưu.
     """
     total = calculate_cart_total(cart_details)
 
@@ -180,6 +182,7 @@ def create_order_from_cart(user_id: int, cart: Cart, cart_details: list[CartDeta
     db.session.flush()  # Lấy mã đơn hàng trước khi tạo chi tiết
 
     # Tạo chi tiết đơn hàng
+    order_details = []
     for detail in cart_details:
         order_detail = OrderDetail(
             order_detail_id=order.ma_don_hang,
@@ -189,10 +192,20 @@ def create_order_from_cart(user_id: int, cart: Cart, cart_details: list[CartDeta
             total_fee=float(detail.so_luong) * float(detail.gia_tai_thoi_diem),
         )
         db.session.add(order_detail)
+        order_details.append(order_detail)
 
     # Đánh dấu giỏ hàng đã hoàn thành
     cart.trang_thai = 1
+    record_order_created(order)
+    try:
+        sold_out = reserve_order_stock(order, order_details)
+    except InsufficientStockError:
+        db.session.rollback()
+        raise
     db.session.commit()
+    invalidate_cart_count(user_id)
+    dashboard_metrics.on_order_created(order)
+    on_stock_changed(sold_out)
 
     return order
 
@@ -203,6 +216,7 @@ def create_order_from_product(user_id: int, product: Product, quantity: int = 1)
     Hàm này thực hiện:
     1. Tạo đơn hàng với trạng thái chờ xử lý
     2. Tạo chi tiết đơn hàng từ sản phẩm được chọn
+    3. Trừ tồn kho sản phẩm (bước cuối, ngay trước commit)
 
     Args:
         user_id: Mã tài khoản người dùng.
@@ -211,6 +225,9 @@ def create_order_from_product(user_id: int, product: Product, quantity: int = 1)
 
     Returns:
         Đơn hàng vừa được tạo.
+
+    Raises:
+        InsufficientStockError: Sản phẩm không đủ hàng; không có gì được lưu.
     """
     total = float(product.gia_xuat) * quantity
 
@@ -232,7 +249,15 @@ def create_order_from_product(user_id: int, product: Product, quantity: int = 1)
         total_fee=total,
     )
     db.session.add(order_detail)
+    record_order_created(order)
+    try:
+        sold_out = reserve_order_stock(order, [order_detail])
+    except InsufficientStockError:
+        db.session.rollback()
+        raise
     db.session.commit()
+    dashboard_metrics.on_order_created(order)
+    on_stock_changed(sold_out)
 
     return order
 
@@ -245,7 +270,7 @@ def cancel_user_order(order: Order) -> bool:
     """Hủy đơn hàng (do người dùng thực hiện).
 
     Chỉ đơn hàng ở trạng thái CHỜ XỬ LÝ hoặc ĐANG XỬ LÝ mới có thể
-    được hủy bởi người dùng.
+    được hủy bởi người dùng. Số lượng đã giữ được hoàn trả vào kho.
 
     Args:
         order: Đơn hàng cần hủy.
@@ -256,8 +281,13 @@ def cancel_user_order(order: Order) -> bool:
     if not OrderStatus.can_user_cancel(order.trang_thai):
         return False
 
+    old_status = order.trang_thai
     order.trang_thai = OrderStatus.CANCELLED
+    record_order_status_changed(order, old_status)
+    restocked = release_order_stock(order)
     db.session.commit()
+    dashboard_metrics.on_order_status_changed(order, old_status)
+    on_stock_changed(restocked)
     return True
 
 
@@ -269,7 +299,7 @@ def get_order_details_with_products(order: Order) -> list[dict]:
     """Lấy chi tiết đơn hàng kèm thông tin sản phẩm liên quan.
 
     Sử dụng relationship có sẵn trên model Order để lấy chi tiết,
-    sau đó lấy thông tin sản phẩm cho từng chi tiết.
+    sau đó nạp sản phẩm của tất cả chi tiết bằng một truy vấn.
 
     Args:
         order: Đơn hàng cần lấy chi tiết.
@@ -277,35 +307,42 @@ def get_order_details_with_products(order: Order) -> list[dict]:
     Returns:
         Danh sách dict với các key 'detail' và 'product'.
     """
-    result = []
-    for detail in order.chi_tiet_don_hang:
-        product = Product.query.get(detail.ma_san_pham)
-        result.append({
+    details = order.chi_tiet_don_hang
+    products = load_related(details, Product, "ma_san_pham")
+    return [
+        {
             'detail': detail,
-            'product': product
-        })
-    return result
+            'product': products.get(detail.ma_san_pham)
+        }
+        for detail in details
+    ]
+
 
+def index_invoices_by_order(invoices: list[Invoice]) -> dict[int, Invoice]:
+    """Lập chỉ mục hóa đơn theo mã đơn hàng.
 
-def find_invoice_for_order(invoices: list[Invoice], order_id: int) -> Optional[Invoice]:
-    """Tìm hóa đơn tương ứng với đơn hàng từ danh sách hóa đơn.
+    Nếu một đơn hàng có nhiều hóa đơn, giữ hóa đơn xuất hiện trước trong danh
+    sách (danh sách sắp xếp mới nhất trước thì giữ hóa đơn mới nhất).
 
     Args:
-        invoices: Danh sách hóa đơn cần tìm kiếm.
-        order_id: Mã đơn hàng cần khớp.
+        invoices: Danh sách hóa đơn.
 
     Returns:
-        Invoice khớp nếu tìm thấy, None nếu không.
+        Dict mã đơn hàng -> Invoice (bỏ qua hóa đơn không gắn đơn hàng).
     """
+    index: dict[int, Invoice] = {}
     for invoice in invoices:
-        if hasattr(invoice, 'ma_don_hang') and invoice.ma_don_hang == order_id:
-            return invoice
-    return None
+        if invoice.ma_don_hang:
+            index.setdefault(invoice.ma_don_hang, invoice)
+    return index
 
 
 def build_purchase_history(orders: list[Order], invoices: list[Invoice]) -> list[dict]:
     """Xây dựng cấu trúc dữ liệu lịch sử mua hàng để render template.
 
+    Chi tiết của tất cả đơn hàng và sản phẩm của các chi tiết được nạp bằng
+    một truy vấn mỗi bảng; hóa đơn được ghép với đơn hàng qua chỉ mục.
+
     Args:
         orders: Danh sách đơn hàng đã hoàn thành.
         invoices: Danh sách hóa đơn của người dùng.
@@ -313,11 +350,74 @@ def build_purchase_history(orders: list[Order], invoices: list[Invoice]) -> list
     Returns:
         Danh sách dict với các key 'order', 'invoice', và 'details'.
     """
+    invoice_index = index_invoices_by_order(invoices)
+    details_by_order = load_grouped(
+        OrderDetail, "ma_don_hang", (order.ma_don_hang for order in orders)
+    )
+    products = load_related(
+        (detail for details in details_by_order.values() for detail in details),
+        Product,
+        "ma_san_pham",
+    )
+
     history = []
     for order in orders:
+        details = details_by_order.get(order.ma_don_hang, [])
+        # Gắn sẵn relationship để truy cập order.chi_tiet_don_hang không truy vấn lại.
+        set_committed_value(order, "chi_tiet_don_hang", details)
         history.append({
             'order': order,
-            'invoice': find_invoice_for_order(invoices, order.ma_don_hang),
-            'details': get_order_details_with_products(order)
+            'invoice': invoice_index.get(order.ma_don_hang),
+            'details': [
+                {
+                    'detail': detail,
+                    'product': products.get(detail.ma_san_pham)
+                }
+                for detail in details
+            ]
         })
     return history
+
+
+def load_purchase_history(
+    user_id: int,
+    cursor: Optional[str] = None,
+    per_page: int = DEFAULT_PURCHASE_HISTORY_PER_PAGE,
+) -> tuple[KeysetPagination, list[dict]]:
+    """Lấy một trang lịch sử mua hàng của người dùng.
+
+    Đơn hàng đã hoàn thành được phân trang theo khoá (mới nhất trước); chỉ
+    chi tiết, sản phẩm và hóa đơn của các đơn trong trang được nạp, nên số
+    truy vấn không phụ thuộc số đơn hàng của người dùng.
+
+    Args:
+        user_id: Mã tài khoản người dùng.
+        cursor: Con trỏ trang nhận từ URL, None để lấy trang đầu.
+        per_page: Số đơn hàng mỗi trang.
+
+    Returns:
+        Tuple (pagination, lịch sử mua hàng của trang) - xem build_purchase_history().
+    """
+    query = Order.query.filter_by(
+        ma_tai_khoan=user_id,
+        trang_thai=OrderStatus.COMPLETED
+    )
+    pagination = keyset_paginate(
+        query, Order.ma_don_hang, cursor, per_page, count=False
+    )
+
+    order_ids = [order.ma_don_hang for order in pagination.items]
+    invoices = []
+    if order_ids:
+        invoices = (
+            Invoice.query
+            .filter(
+                Invoice.ma_tai_khoan == user_id,
+                Invoice.ma_don_hang.in_(order_ids),
+                Invoice.trang_thai != 3  # Loại trừ đã xóa
+            )
+            .order_by(Invoice.ngay_tao.desc())
+            .all()
+        )
+
+    return pagination, build_purchase_history(pagination.items, invoices)
@@ -1,22 +1,64 @@
+from flask import current_app
+from markupsafe import Markup
+
+from app.cache import TTLCache, config_value
 from app.models.product import Product
+from app.services.best_seller_service import best_sellers
+from app.services.recommendation_service import recommendations
+from app.services.relation_loader_service import load_by_ids
+
+
+DEFAULT_PRODUCT_PAGE_CACHE_TTL = 300
+PRODUCT_PAGE_CACHE_SIZE = 1024
+
+# Mã sản phẩm -> (phiên bản, HTML phần không phụ thuộc người dùng của trang chi tiết).
+_product_page_cache = TTLCache(ttl=DEFAULT_PRODUCT_PAGE_CACHE_TTL, maxsize=PRODUCT_PAGE_CACHE_SIZE)
+
+
+def _ranked_products(product_ids, limit: int, *criteria):
+    """Nạp sản phẩm theo thứ tự xếp hạng, bổ sung sản phẩm mới nhất nếu thiếu.
+
+    Args:
+        product_ids: Mã sản phẩm đã xếp hạng.
+        limit (int): Số sản phẩm cần lấy.
+        *criteria: Điều kiện lọc sản phẩm bổ sung (ngoài trạng thái đang bán).
+
+    Returns:
+        list: Tối đa limit sản phẩm.
+    """
+    loaded = load_by_ids(Product, product_ids)
+    products = [
+        loaded[pid]
+        for pid in product_ids
+        if pid in loaded and loaded[pid].trang_thai == 1
+    ][:limit]
+    if len(products) < limit:
+        products.extend(
+            Product.query.filter(
+                Product.trang_thai == 1,
+                Product.ma_san_pham.notin_(product_ids),
+                *criteria,
+            )
+            .order_by(Product.ngay_tao.desc())
+            .limit(limit - len(products))
+            .all()
+        )
+    return products
 
 
 def get_best_seller_products(limit: int = 5):
     """Lấy danh sách sản phẩm bán chạy nhất.
 
+    Xếp theo tốc độ bán (xem best_seller_service); nếu chưa đủ sản phẩm có
+    doanh số thì bổ sung sản phẩm mới nhất.
+
     Args:
         limit (int, optional): Số lượng sản phẩm cần lấy. Mặc định là 5.
 
     Returns:
         list: Danh sách sản phẩm bán chạy nhất.
     """
-    best_sellers = (
-        Product.query.filter(Product.trang_thai == 1)
-        .order_by(Product.so_luong.desc())
-        .limit(limit)
-        .all()
-    )
-    return best_sellers
+    return _ranked_products(best_sellers.top(limit), limit)
 
 
 def get_new_products(limit: int = 5):
@@ -37,14 +79,83 @@ def get_new_products(limit: int = 5):
     return new_products
 
 def get_related_products(product, limit=5):
-    related_products = (
-        Product.query.filter(
-            Product.trang_thai == 1,
-            Product.ma_san_pham != product.ma_san_pham,
-            Product.gioi_tinh == product.gioi_tinh,
+    """Lấy sản phẩm liên quan.
+
+    Ưu tiên sản phẩm thường được mua cùng / yêu thích cùng (xem
+    recommendation_service); nếu chưa đủ thì bổ sung sản phẩm cùng giới tính
+    bán chạy, sau đó mới nhất.
+
+    Args:
+        product (Product): Sản phẩm đang xem.
+        limit (int, optional): Số lượng sản phẩm cần lấy. Mặc định là 5.
+
+    Returns:
+        list: Danh sách sản phẩm liên quan.
+    """
+    # Lấy dư gợi ý để còn đủ sau khi bỏ sản phẩm đã ngừng bán.
+    ranked = list(recommendations.neighbors(product.ma_san_pham)[:limit * 2])
+    ranked.extend(
+        product_id
+        for product_id in best_sellers.top(
+            limit, gender=product.gioi_tinh, exclude=(product.ma_san_pham,)
         )
-        .order_by(Product.ngay_tao.desc())
-        .limit(limit)
-        .all()
+        if product_id not in ranked
+    )
+    return _ranked_products(
+        ranked,
+        limit,
+        Product.ma_san_pham != product.ma_san_pham,
+        Product.gioi_tinh == product.gioi_tinh,
+    )
+
+
+# -----------------------------------------------------------------------------
+# Bộ đệm trang chi tiết sản phẩm
+# -----------------------------------------------------------------------------
+
+def _product_page_ttl() -> float:
+    return config_value("PRODUCT_PAGE_CACHE_TTL", DEFAULT_PRODUCT_PAGE_CACHE_TTL)
+
+
+def _product_page_version(product) -> tuple:
+    # ngay_chinh_sua đổi ở mọi lần UPDATE sản phẩm (kể cả từ worker khác);
+    # so_luong phân biệt các lần trừ kho trong cùng một giây (DATETIME của MySQL).
+    return (product.ngay_chinh_sua, product.so_luong, product.trang_thai)
+
+
+def render_product_detail_content(product) -> Markup:
+    """Render phần không phụ thuộc người dùng của trang chi tiết sản phẩm.
+
+    Gồm hình ảnh, thông tin, thông số và sản phẩm liên quan. Kết quả được lưu
+    đệm theo mã sản phẩm và ngày chỉnh sửa, nên lần xem sau chỉ cần truy vấn
+    chính sản phẩm. Template được render trực tiếp qua jinja_env để không
+    chạy các context processor (số lượng giỏ hàng, ...) của người dùng hiện
+    tại. Sản phẩm liên quan có thể trễ tối đa PRODUCT_PAGE_CACHE_TTL giây.
+
+    Args:
+        product (Product): Sản phẩm cần hiển thị.
+
+    Returns:
+        Markup: HTML đã render.
+    """
+    version = _product_page_version(product)
+    cached = _product_page_cache.get(product.ma_san_pham)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    template = current_app.jinja_env.get_template("user/product_detail_content.html")
+    content = Markup(
+        template.render(product=product, related_products=get_related_products(product))
     )
-    return related_products
\ No newline at end of file
+    _product_page_cache.set(product.ma_san_pham, (version, content), ttl=_product_page_ttl())
+    return content
+
+
+def invalidate_product_pages(product_ids) -> None:
+    """Xoá trang chi tiết đã lưu đệm của các sản phẩm vừa thay đổi.
+
+    Args:
+        product_ids: Mã các sản phẩm.
+    """
+    for product_id in product_ids:
+        _product_page_cache.delete(product_id)
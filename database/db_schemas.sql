@@ -139,7 +139,8 @@ CREATE TABLE
         tong_tien_tam_tinh DECIMAL(10, 2),
         ngay_tao DATETIME,
         ngay_dat_hang DATETIME,
-        trang_thai TINYINT
+        trang_thai TINYINT,
+        giu_ton_kho TINYINT NOT NULL DEFAULT 0
     );
 
 CREATE TABLE
@@ -160,7 +161,8 @@ CREATE TABLE
         tong_tien_tam_tinh DECIMAL(10, 2),
         ngay_tao DATETIME,
         ngay_dat_hang DATETIME,
-        trang_thai TINYINT
+        trang_thai TINYINT,
+        ma_don_hang INT NULL
     );
 
 CREATE TABLE
@@ -173,3 +175,89 @@ CREATE TABLE
         thanh_tien DECIMAL(10, 2),
         ngay_tao DATETIME
     );
+
+CREATE TABLE
+    SanPhamYeuThich (
+        ma_yeu_thich INT PRIMARY KEY NOT NULL AUTO_INCREMENT,
+        ma_tai_khoan INT NOT NULL,
+        ma_san_pham INT NOT NULL,
+        ngay_tao DATETIME,
+        CONSTRAINT unique_user_product_favorite UNIQUE (ma_tai_khoan, ma_san_pham),
+        FOREIGN KEY (ma_tai_khoan) REFERENCES TaiKhoan (ma_tai_khoan),
+        FOREIGN KEY (ma_san_pham) REFERENCES SanPham (ma_san_pham)
+    );
+
+-- Bảng tổng hợp theo ngày cho trang báo cáo (flask backfill-sales-rollup để tính lại).
+CREATE TABLE
+    DoanhThuNgay (
+        ngay DATE PRIMARY KEY NOT NULL,
+        doanh_thu DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        so_hoa_don INT NOT NULL DEFAULT 0,
+        so_don_hang INT NOT NULL DEFAULT 0,
+        so_don_cho_xu_ly INT NOT NULL DEFAULT 0,
+        so_don_dang_xu_ly INT NOT NULL DEFAULT 0,
+        so_don_dang_giao INT NOT NULL DEFAULT 0,
+        so_don_hoan_thanh INT NOT NULL DEFAULT 0,
+        so_don_da_huy INT NOT NULL DEFAULT 0
+    );
+
+CREATE TABLE
+    SanPhamBanNgay (
+        ngay DATE NOT NULL,
+        ma_san_pham INT NOT NULL,
+        so_luong_ban INT NOT NULL DEFAULT 0,
+        doanh_thu DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (ngay, ma_san_pham)
+    );
+
+-- Sổ biến động tồn kho (chỉ thêm) và tồn kho hiện tại cộng dồn từ sổ
+-- (flask rebuild-stock-levels để đối soát và tính lại).
+CREATE TABLE
+    BienDongTonKho (
+        ma_bien_dong INT PRIMARY KEY NOT NULL AUTO_INCREMENT,
+        ma_san_pham INT NOT NULL,
+        ma_kich_thuoc_san_pham INT,
+        loai TINYINT NOT NULL,
+        so_luong INT NOT NULL,
+        ma_don_hang INT,
+        ghi_chu VARCHAR(255),
+        ngay_tao DATETIME,
+        INDEX ix_BienDongTonKho_san_pham (ma_san_pham, ngay_tao)
+    );
+
+CREATE TABLE
+    TonKhoSanPham (
+        ma_san_pham INT NOT NULL,
+        ma_kich_thuoc_san_pham INT NOT NULL DEFAULT 0,
+        so_luong INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (ma_san_pham, ma_kich_thuoc_san_pham),
+        INDEX ix_TonKhoSanPham_so_luong (ma_kich_thuoc_san_pham, so_luong)
+    );
+
+-- Sản phẩm gợi ý theo mua cùng / yêu thích cùng (flask build-recommendations).
+CREATE TABLE
+    SanPhamGoiY (
+        ma_san_pham INT NOT NULL,
+        thu_hang SMALLINT NOT NULL,
+        ma_san_pham_goi_y INT NOT NULL,
+        diem DOUBLE NOT NULL,
+        PRIMARY KEY (ma_san_pham, thu_hang)
+    );
+
+-- Chỉ mục cho các truy vấn lọc theo ngày/trạng thái/tài khoản
+-- (cùng nội dung với migration "add query indexes").
+CREATE INDEX ix_DonHang_ngay_tao ON DonHang (ngay_tao);
+CREATE INDEX ix_DonHang_trang_thai_ngay_tao ON DonHang (trang_thai, ngay_tao);
+CREATE INDEX ix_DonHang_tai_khoan_ngay_tao ON DonHang (ma_tai_khoan, ngay_tao);
+CREATE INDEX ix_ChiTietDonHang_don_hang ON ChiTietDonHang (ma_don_hang);
+CREATE INDEX ix_HoaDon_ngay_tao_trang_thai ON HoaDon (ngay_tao, trang_thai);
+CREATE INDEX ix_HoaDon_trang_thai_ngay_tao ON HoaDon (trang_thai, ngay_tao);
+CREATE INDEX ix_HoaDon_tai_khoan_ngay_tao ON HoaDon (ma_tai_khoan, ngay_tao);
+CREATE INDEX idx_hoadon_donhang ON HoaDon (ma_don_hang);
+CREATE INDEX ix_ChiTietHoaDon_hoa_don ON ChiTietHoaDon (ma_hoa_don);
+CREATE INDEX ix_GioHang_tai_khoan_trang_thai ON GioHang (ma_tai_khoan, trang_thai);
+CREATE INDEX ix_ChiTietGioHang_gio_hang_san_pham ON ChiTietGioHang (ma_gio_hang, ma_san_pham);
+CREATE INDEX ix_SanPham_trang_thai_so_luong ON SanPham (trang_thai, so_luong);
+CREATE INDEX ix_TaiKhoan_role_trang_thai ON TaiKhoan (role, trang_thai);
+CREATE INDEX ix_HinhAnhSanPham_san_pham ON HinhAnhSanPham (ma_san_pham);
+CREATE INDEX ix_KichThuocSanPham_san_pham ON KichThuocSanPham (ma_san_pham);
@@ -0,0 +1,126 @@
+"""add missing tables and columns
+
+Bring databases created from an older database/db_schemas.sql up to the
+current models. Every step is skipped when the table or column already
+exists, so the revision is safe on databases created from the current file.
+
+Revision ID: 08924b84caea
+Revises:
+Create Date: 2026-10-18 17:04:43.912114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '08924b84caea'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _has_table(name):
+    return _inspector().has_table(name)
+
+
+def _has_column(table, column):
+    return any(c["name"] == column for c in _inspector().get_columns(table))
+
+
+def _has_index(table, name):
+    return any(i["name"] == name for i in _inspector().get_indexes(table))
+
+
+def upgrade():
+    if not _has_column("HoaDon", "ma_don_hang"):
+        op.add_column("HoaDon", sa.Column("ma_don_hang", sa.Integer(), nullable=True))
+    if not _has_index("HoaDon", "idx_hoadon_donhang"):
+        op.create_index("idx_hoadon_donhang", "HoaDon", ["ma_don_hang"])
+
+    for column in ("bo_suu_tap", "thuong_hieu"):
+        if not _has_column("SanPham", column):
+            op.add_column("SanPham", sa.Column(column, sa.Integer(), nullable=True))
+
+    if not _has_column("DonHang", "giu_ton_kho"):
+        op.add_column(
+            "DonHang",
+            sa.Column("giu_ton_kho", sa.SmallInteger(), nullable=False, server_default="0"),
+        )
+
+    if not _has_table("SanPhamYeuThich"):
+        op.create_table(
+            "SanPhamYeuThich",
+            sa.Column("ma_yeu_thich", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("ma_tai_khoan", sa.Integer(), sa.ForeignKey("TaiKhoan.ma_tai_khoan"), nullable=False),
+            sa.Column("ma_san_pham", sa.Integer(), sa.ForeignKey("SanPham.ma_san_pham"), nullable=False),
+            sa.Column("ngay_tao", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("ma_tai_khoan", "ma_san_pham", name="unique_user_product_favorite"),
+        )
+
+    if not _has_table("DoanhThuNgay"):
+        op.create_table(
+            "DoanhThuNgay",
+            sa.Column("ngay", sa.Date(), primary_key=True),
+            sa.Column("doanh_thu", sa.Numeric(14, 2), nullable=False, server_default="0"),
+            sa.Column("so_hoa_don", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_hang", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_cho_xu_ly", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_dang_xu_ly", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_dang_giao", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_hoan_thanh", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("so_don_da_huy", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    if not _has_table("SanPhamBanNgay"):
+        op.create_table(
+            "SanPhamBanNgay",
+            sa.Column("ngay", sa.Date(), primary_key=True),
+            sa.Column("ma_san_pham", sa.Integer(), primary_key=True),
+            sa.Column("so_luong_ban", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("doanh_thu", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        )
+
+    if not _has_table("BienDongTonKho"):
+        op.create_table(
+            "BienDongTonKho",
+            sa.Column("ma_bien_dong", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("ma_san_pham", sa.Integer(), nullable=False),
+            sa.Column("ma_kich_thuoc_san_pham", sa.Integer(), nullable=True),
+            sa.Column("loai", sa.SmallInteger(), nullable=False),
+            sa.Column("so_luong", sa.Integer(), nullable=False),
+            sa.Column("ma_don_hang", sa.Integer(), nullable=True),
+            sa.Column("ghi_chu", sa.String(255), nullable=True),
+            sa.Column("ngay_tao", sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            "ix_BienDongTonKho_san_pham", "BienDongTonKho", ["ma_san_pham", "ngay_tao"]
+        )
+
+    if not _has_table("TonKhoSanPham"):
+        op.create_table(
+            "TonKhoSanPham",
+            sa.Column("ma_san_pham", sa.Integer(), primary_key=True),
+            sa.Column("ma_kich_thuoc_san_pham", sa.Integer(), primary_key=True, server_default="0"),
+            sa.Column("so_luong", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index(
+            "ix_TonKhoSanPham_so_luong",
+            "TonKhoSanPham",
+            ["ma_kich_thuoc_san_pham", "so_luong"],
+        )
+
+
+def downgrade():
+    # HoaDon.ma_don_hang, SanPhamYeuThich and SanPham.bo_suu_tap/thuong_hieu
+    # predate this revision in the models or the SQL file, so they are kept.
+    op.drop_table("TonKhoSanPham")
+    op.drop_table("BienDongTonKho")
+    op.drop_table("SanPhamBanNgay")
+    op.drop_table("DoanhThuNgay")
+    with op.batch_alter_table("DonHang") as batch_op:
+        batch_op.drop_column("giu_ton_kho")
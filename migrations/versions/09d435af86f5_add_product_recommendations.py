@@ -0,0 +1,34 @@
+"""add product recommendations
+
+Top-k co-purchase / co-favourite neighbours of each product, written by
+``flask build-recommendations``. Skipped when the table already exists.
+
+Revision ID: 09d435af86f5
+Revises: 72b9abc70531
+Create Date: 2026-10-18 17:16:15.927199
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '09d435af86f5'
+down_revision = '72b9abc70531'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("SanPhamGoiY"):
+        op.create_table(
+            "SanPhamGoiY",
+            sa.Column("ma_san_pham", sa.Integer(), primary_key=True),
+            sa.Column("thu_hang", sa.SmallInteger(), primary_key=True),
+            sa.Column("ma_san_pham_goi_y", sa.Integer(), nullable=False),
+            sa.Column("diem", sa.Float(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("SanPhamGoiY")
@@ -0,0 +1,55 @@
+"""add query indexes
+
+Composite indexes matching the filters and sort orders used by the
+dashboard, the sales rollup rebuild, the admin order/invoice lists, the
+cart and the purchase history. Indexes that already exist are skipped.
+
+Revision ID: 72b9abc70531
+Revises: 08924b84caea
+Create Date: 2026-10-18 17:04:44.256887
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '72b9abc70531'
+down_revision = '08924b84caea'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = (
+    ("ix_DonHang_ngay_tao", "DonHang", ["ngay_tao"]),
+    ("ix_DonHang_trang_thai_ngay_tao", "DonHang", ["trang_thai", "ngay_tao"]),
+    ("ix_DonHang_tai_khoan_ngay_tao", "DonHang", ["ma_tai_khoan", "ngay_tao"]),
+    ("ix_ChiTietDonHang_don_hang", "ChiTietDonHang", ["ma_don_hang"]),
+    ("ix_HoaDon_ngay_tao_trang_thai", "HoaDon", ["ngay_tao", "trang_thai"]),
+    ("ix_HoaDon_trang_thai_ngay_tao", "HoaDon", ["trang_thai", "ngay_tao"]),
+    ("ix_HoaDon_tai_khoan_ngay_tao", "HoaDon", ["ma_tai_khoan", "ngay_tao"]),
+    ("ix_ChiTietHoaDon_hoa_don", "ChiTietHoaDon", ["ma_hoa_don"]),
+    ("ix_GioHang_tai_khoan_trang_thai", "GioHang", ["ma_tai_khoan", "trang_thai"]),
+    ("ix_ChiTietGioHang_gio_hang_san_pham", "ChiTietGioHang", ["ma_gio_hang", "ma_san_pham"]),
+    ("ix_SanPham_trang_thai_so_luong", "SanPham", ["trang_thai", "so_luong"]),
+    ("ix_TaiKhoan_role_trang_thai", "TaiKhoan", ["role", "trang_thai"]),
+    ("ix_HinhAnhSanPham_san_pham", "HinhAnhSanPham", ["ma_san_pham"]),
+    ("ix_KichThuocSanPham_san_pham", "KichThuocSanPham", ["ma_san_pham"]),
+)
+
+
+def _index_names(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _index_names(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        if name in _index_names(table):
+            op.drop_index(name, table_name=table)